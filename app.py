@@ -3,21 +3,23 @@ import secrets
 import sqlite3
 import hashlib
 import time
+import calendar
 import json
-import requests
+from io import BytesIO
+import click
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, has_app_context, Response, g, send_file
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_mail import Mail, Message
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_mail import Mail, Message, Connection as MailConnection
 from dotenv import load_dotenv
 from apscheduler.schedulers.background import BackgroundScheduler
 import random
 import string
 from functools import wraps
 from collections import defaultdict, Counter
-from sqlalchemy import func, desc, and_, or_
+from sqlalchemy import func, desc, and_, or_, case, select, insert, text, bindparam
+from sqlalchemy.exc import IntegrityError
 import threading
 import atexit
 import smtplib
@@ -26,14 +28,13 @@ from email.mime.text import MIMEText
 
 # Conditional imports for optional features
 try:
-    from twilio.rest import Client
-    from twilio.base.exceptions import TwilioException
-    TWILIO_AVAILABLE = True
-except ImportError:
-    TWILIO_AVAILABLE = False
-    
-try:
-    from utils.captcha_utils import generate_captcha_challenge, verify_captcha, create_recaptcha_manager
+    from utils.captcha_utils import (
+        generate_captcha_challenge, verify_captcha, create_recaptcha_manager,
+        configure_captcha_pool, captcha_pool_metrics, set_captcha_renderer,
+        set_captcha_image_format, CaptchaTokenSigner, render_captcha_audio,
+        set_captcha_audio_clips, get_clip_library, AUDIO_CAPTCHA_AVAILABLE, configure_captcha_render_pool,
+        captcha_render_metrics, CaptchaUnavailable
+    )
     CAPTCHA_AVAILABLE = True
 except ImportError:
     CAPTCHA_AVAILABLE = False
@@ -47,18 +48,51 @@ except ImportError:
         characters = string.ascii_uppercase + string.digits
         challenge = ''.join(random.choice(characters) for _ in range(length))
         return {
-            'challenge': challenge,
+            'id': secrets.token_urlsafe(16),
             'type': 'text',
-            'image_data': None
+            'question': challenge,
+            'answer': challenge,
+            'image_bytes': None,
+            'mimetype': None
         }
     
     def verify_captcha(user_input, correct_answer):
         """Fallback CAPTCHA verification"""
         return str(user_input).upper() == str(correct_answer).upper()
     
-    def create_recaptcha_manager(site_key, secret_key):
+    def create_recaptcha_manager(site_key, secret_key, **options):
         """Fallback reCAPTCHA manager"""
         return None
+    
+    def captcha_pool_metrics():
+        """Fallback: no pre-rendered pool"""
+        return None
+    
+    def render_captcha_audio(question):
+        """Fallback: no audio challenges"""
+        return None
+    
+    AUDIO_CAPTCHA_AVAILABLE = False
+    
+    def captcha_render_metrics():
+        """Fallback: no render processes"""
+        return None
+    
+    class CaptchaUnavailable(Exception):
+        """Fallback: never raised"""
+
+from utils.retention_utils import RetentionPolicy, RetentionManager
+from utils.audit_utils import AuditWriter
+from utils.counter_utils import SlidingWindowStore
+from utils.cache_utils import LRUSet, GenerationCache, ExpiringStore
+from utils.rollup_utils import aggregate_rollups, bucket_start
+from utils.stream_utils import SnapshotBroadcaster, StreamLimitReached
+from utils.partition_utils import create_partition_manager
+from utils.outbound_utils import OutboundQueue, FakeTransport
+from utils.smtp_utils import get_smtp_pool, smtp_pool_metrics, close_smtp_pools
+from utils.sms_utils import SMSDispatcher, TwilioProvider, FakeSMSProvider, TWILIO_AVAILABLE
+from utils.breaker_utils import get_breaker, breaker_metrics, start_deadline, end_deadline
+from utils.password_utils import PasswordHasher
 
 # Load environment variables
 load_dotenv()
@@ -126,21 +160,128 @@ GMAIL_EMAIL = os.getenv('GMAIL_EMAIL', 'your-email@gmail.com')
 GMAIL_PASSWORD = os.getenv('GMAIL_PASSWORD', 'your-app-password')
 
 # SMS Configuration (Twilio)
-USE_SMS = os.getenv('USE_SMS', 'True').lower() == 'true'
+USE_SMS = os.getenv('USE_SMS', 'False').lower() == 'true'  # off unless set, so the placeholder credentials are never used
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID', 'your-twilio-account-sid')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN', 'your-twilio-auth-token')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER', '+1234567890')
+SMS_PROVIDER = os.getenv('SMS_PROVIDER', 'twilio')  # 'twilio' or 'fake'
+SMS_TIMEOUT = float(os.getenv('SMS_TIMEOUT', 5))  # seconds per provider request
+SMS_WORKERS = int(os.getenv('SMS_WORKERS', 2))
+SMS_MAX_ATTEMPTS = int(os.getenv('SMS_MAX_ATTEMPTS', 3))
+SMS_RETRY_BACKOFF = float(os.getenv('SMS_RETRY_BACKOFF', 1.0))  # seconds, doubled per attempt
+SMS_FAKE_LATENCY = float(os.getenv('SMS_FAKE_LATENCY', 0.2))  # seconds
+SMS_FAKE_FAILURE_RATE = float(os.getenv('SMS_FAKE_FAILURE_RATE', 0))
 
 # Notification Configuration
 ENABLE_EMAIL_ALERTS = os.getenv('ENABLE_EMAIL_ALERTS', 'True').lower() == 'true'
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@example.com')
+ADMIN_RECIPIENT_CACHE_SECONDS = float(os.getenv('ADMIN_RECIPIENT_CACHE_SECONDS', 300))
 ALERT_THRESHOLD_FAILED_LOGINS = int(os.getenv('ALERT_THRESHOLD_FAILED_LOGINS', 5))
 ALERT_THRESHOLD_TIME_WINDOW = int(os.getenv('ALERT_THRESHOLD_TIME_WINDOW', 15))  # minutes
+ALERT_THRESHOLD_RAPID_ATTEMPTS = int(os.getenv('ALERT_THRESHOLD_RAPID_ATTEMPTS', 10))
+ALERT_RAPID_ATTEMPTS_WINDOW = int(os.getenv('ALERT_RAPID_ATTEMPTS_WINDOW', 5))  # minutes
+ALERT_THRESHOLD_IP_FAILED_LOGINS = int(os.getenv('ALERT_THRESHOLD_IP_FAILED_LOGINS', 20))
+COUNTER_BUCKET_SECONDS = int(os.getenv('COUNTER_BUCKET_SECONDS', 10))
+KNOWN_IP_CACHE_SIZE = int(os.getenv('KNOWN_IP_CACHE_SIZE', 10000))
+
+# Log Retention Configuration (0 disables a rule)
+AUTH_LOG_MAX_ROWS = int(os.getenv('AUTH_LOG_MAX_ROWS', 10000))
+AUTH_LOG_MAX_AGE_DAYS = int(os.getenv('AUTH_LOG_MAX_AGE_DAYS', 0))
+ACTIVITY_LOG_MAX_ROWS = int(os.getenv('ACTIVITY_LOG_MAX_ROWS', 0))
+RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', 1000))
+RETENTION_INTERVAL_MINUTES = int(os.getenv('RETENTION_INTERVAL_MINUTES', 5))
+
+# Daily Cleanup Configuration (0 disables a rule)
+NOTIFICATION_MAX_AGE_DAYS = int(os.getenv('NOTIFICATION_MAX_AGE_DAYS', 30))
+ACTIVITY_LOG_MAX_AGE_DAYS = int(os.getenv('ACTIVITY_LOG_MAX_AGE_DAYS', 90))
+RESOLVED_ALERT_MAX_AGE_DAYS = int(os.getenv('RESOLVED_ALERT_MAX_AGE_DAYS', 30))
+CLEANUP_BATCH_PAUSE = float(os.getenv('CLEANUP_BATCH_PAUSE', 0.05))  # seconds between batches
+CLEANUP_LOCK_SECONDS = int(os.getenv('CLEANUP_LOCK_SECONDS', 6 * 3600))  # a crashed run's lock is taken over after this
+
+# Log Partitioning Configuration
+LOG_PARTITIONING = os.getenv('LOG_PARTITIONING', 'False').lower() == 'true'
+LOG_PARTITION_GRANULARITY = os.getenv('LOG_PARTITION_GRANULARITY', 'month')  # 'day' or 'month'
+LOG_PARTITION_RETENTION_DAYS = int(os.getenv('LOG_PARTITION_RETENTION_DAYS', 90))
+LOG_PARTITION_DIR = os.getenv('LOG_PARTITION_DIR', os.path.join(app.instance_path, 'partitions'))  # SQLite only
+
+# Dashboard Rollup Configuration
+ROLLUP_MINUTE_RETENTION_HOURS = int(os.getenv('ROLLUP_MINUTE_RETENTION_HOURS', 48))
+ROLLUP_HOUR_RETENTION_DAYS = int(os.getenv('ROLLUP_HOUR_RETENTION_DAYS', 35))
+ROLLUP_DAY_RETENTION_DAYS = int(os.getenv('ROLLUP_DAY_RETENTION_DAYS', 400))
+
+# Live Dashboard Stream Configuration
+DASHBOARD_STREAM_INTERVAL = float(os.getenv('DASHBOARD_STREAM_INTERVAL', 5))  # seconds
+DASHBOARD_STREAM_HEARTBEAT = float(os.getenv('DASHBOARD_STREAM_HEARTBEAT', 15))  # seconds
+DASHBOARD_STREAM_MAX_SECONDS = int(os.getenv('DASHBOARD_STREAM_MAX_SECONDS', 300))  # client reconnects after this
+DASHBOARD_STREAM_MAX_CLIENTS = int(os.getenv('DASHBOARD_STREAM_MAX_CLIENTS', 2))  # open streams per process; more poll
+
+# Dashboard Cache Configuration
+DASHBOARD_CACHE_MAX_STALENESS = float(os.getenv('DASHBOARD_CACHE_MAX_STALENESS', 5))  # seconds
+DASHBOARD_CACHE_MAX_AGE = float(os.getenv('DASHBOARD_CACHE_MAX_AGE', 300))  # seconds
+
+# Outbound Delivery Configuration
+OUTBOUND_TRANSPORT = os.getenv('OUTBOUND_TRANSPORT', 'smtp')  # 'smtp' or 'fake'
+OUTBOUND_WORKERS = int(os.getenv('OUTBOUND_WORKERS', 2))
+OUTBOUND_MAX_ATTEMPTS = int(os.getenv('OUTBOUND_MAX_ATTEMPTS', 3))
+OUTBOUND_RETRY_BACKOFF = float(os.getenv('OUTBOUND_RETRY_BACKOFF', 2.0))  # seconds, doubled per attempt
+OUTBOUND_QUEUE_SIZE = int(os.getenv('OUTBOUND_QUEUE_SIZE', 1000))
+OUTBOUND_COALESCE_SECONDS = float(os.getenv('OUTBOUND_COALESCE_SECONDS', 10))
+
+# SMTP Connection Pool Configuration
+OTP_SMTP_SERVER = os.getenv('OTP_SMTP_SERVER', 'smtp.gmail.com')
+OTP_SMTP_PORT = int(os.getenv('OTP_SMTP_PORT', 587))
+OTP_SMTP_USE_TLS = os.getenv('OTP_SMTP_USE_TLS', 'True').lower() == 'true'
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 4))
+SMTP_POOL_IDLE_TIMEOUT = float(os.getenv('SMTP_POOL_IDLE_TIMEOUT', 120))  # seconds
+SMTP_HEALTH_CHECK_AFTER = float(os.getenv('SMTP_HEALTH_CHECK_AFTER', 5))  # idle seconds before a NOOP probe
+
+# Dependency Guard Configuration
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', 8))  # budget for outbound calls per request
+RECAPTCHA_TIMEOUT = float(os.getenv('RECAPTCHA_TIMEOUT', 3))  # seconds
+BREAKER_WINDOW_SECONDS = float(os.getenv('BREAKER_WINDOW_SECONDS', 60))
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 10))
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', 0.5))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv('BREAKER_SLOW_CALL_SECONDS', 3))
+BREAKER_SLOW_CALL_RATE = float(os.getenv('BREAKER_SLOW_CALL_RATE', 0.8))
+BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', 30))
+
+# Password Hashing Configuration
+PASSWORD_HASH_SCHEME = os.getenv('PASSWORD_HASH_SCHEME', 'pbkdf2')  # 'pbkdf2', 'scrypt' or 'argon2' (argon2-cffi)
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 600000))
+PASSWORD_SCRYPT_N = int(os.getenv('PASSWORD_SCRYPT_N', 32768))
+PASSWORD_SCRYPT_R = int(os.getenv('PASSWORD_SCRYPT_R', 8))
+PASSWORD_SCRYPT_P = int(os.getenv('PASSWORD_SCRYPT_P', 1))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', 3))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', 65536))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', 4))
+PASSWORD_HASH_OFFLOAD = os.getenv('PASSWORD_HASH_OFFLOAD', 'none')  # 'none', 'thread' or 'process'
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))  # hashes computed at once when offloaded
+
+# Audit Writer Configuration
+AUDIT_WRITER_MODE = os.getenv('AUDIT_WRITER_MODE', 'buffered')  # 'sync' or 'buffered'
+AUDIT_FLUSH_SIZE = int(os.getenv('AUDIT_FLUSH_SIZE', 100))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0))  # seconds
 
 # CAPTCHA Configuration
 ENABLE_CAPTCHA = os.getenv('ENABLE_CAPTCHA', 'True').lower() == 'true'
 CAPTCHA_TYPE = os.getenv('CAPTCHA_TYPE', 'text')  # 'text' or 'math'
 CAPTCHA_ATTEMPTS_THRESHOLD = int(os.getenv('CAPTCHA_ATTEMPTS_THRESHOLD', 3))
+CAPTCHA_RENDERER = os.getenv('CAPTCHA_RENDERER', 'numpy')  # 'numpy' (falls back to 'pil' without NumPy) or 'pil'
+CAPTCHA_POOL_SIZE = int(os.getenv('CAPTCHA_POOL_SIZE', 200))  # ready-made challenges per type, 0 disables
+CAPTCHA_POOL_LOW_WATER = int(os.getenv('CAPTCHA_POOL_LOW_WATER', 50))  # refill below this depth
+CAPTCHA_RENDER_WORKERS = int(os.getenv('CAPTCHA_RENDER_WORKERS', 0))  # render processes, 0 renders in the request thread
+CAPTCHA_RENDER_QUEUE = int(os.getenv('CAPTCHA_RENDER_QUEUE', 32))  # renders queued or running at once
+CAPTCHA_RENDER_TIMEOUT = float(os.getenv('CAPTCHA_RENDER_TIMEOUT', 2))  # seconds a request waits for a render
+CAPTCHA_RENDER_OVERFLOW = os.getenv('CAPTCHA_RENDER_OVERFLOW', 'inline')  # 'inline' or 'reject' (503) when saturated
+CAPTCHA_IMAGE_FORMAT = os.getenv('CAPTCHA_IMAGE_FORMAT', 'png')  # 'png', 'png8' (palette) or 'webp'
+CAPTCHA_IMAGE_TTL = float(os.getenv('CAPTCHA_IMAGE_TTL', 300))  # seconds an issued image can be fetched
+CAPTCHA_AUDIO = os.getenv('CAPTCHA_AUDIO', 'True').lower() == 'true'
+CAPTCHA_AUDIO_CLIPS = os.getenv('CAPTCHA_AUDIO_CLIPS', '')  # directory of <char>.wav clips; espeak or tones otherwise
+CAPTCHA_AUDIO_TONES = os.getenv('CAPTCHA_AUDIO_TONES', 'False').lower() == 'true'  # offer audio built from tone clips
+CAPTCHA_TOKEN_MODE = os.getenv('CAPTCHA_TOKEN_MODE', 'session')  # 'session' or 'stateless' (signed tokens)
+CAPTCHA_TOKEN_SECRET = os.getenv('CAPTCHA_TOKEN_SECRET', app.config['SECRET_KEY'])
+CAPTCHA_TOKEN_TTL = int(os.getenv('CAPTCHA_TOKEN_TTL', 300))  # seconds
+CAPTCHA_NONCE_STORE = os.getenv('CAPTCHA_NONCE_STORE', 'database')  # 'database' (shared) or 'memory' (per process)
 
 # reCAPTCHA Configuration
 RECAPTCHA_SITE_KEY = os.getenv('RECAPTCHA_SITE_KEY', '')
@@ -148,29 +289,122 @@ RECAPTCHA_SECRET_KEY = os.getenv('RECAPTCHA_SECRET_KEY', '')
 RECAPTCHA_V3_SITE_KEY = os.getenv('RECAPTCHA_V3_SITE_KEY', '')
 RECAPTCHA_V3_SECRET_KEY = os.getenv('RECAPTCHA_V3_SECRET_KEY', '')
 RECAPTCHA_V3_MIN_SCORE = float(os.getenv('RECAPTCHA_V3_MIN_SCORE', '0.5'))
+RECAPTCHA_VERIFY_URL = os.getenv('RECAPTCHA_VERIFY_URL', 'https://www.google.com/recaptcha/api/siteverify')
+RECAPTCHA_POOL_SIZE = int(os.getenv('RECAPTCHA_POOL_SIZE', 10))  # keep-alive connections to siteverify
+RECAPTCHA_TOKEN_TTL = float(os.getenv('RECAPTCHA_TOKEN_TTL', 120))  # seconds a used token is remembered
 ENABLE_RECAPTCHA_V2 = os.getenv('ENABLE_RECAPTCHA_V2', 'False').lower() == 'true'
 ENABLE_RECAPTCHA_V3 = os.getenv('ENABLE_RECAPTCHA_V3', 'False').lower() == 'true'
 
+# Pre-rendered CAPTCHA challenges, so a burst of challenges does not render images in requests
+captcha_audio_enabled = False
+if CAPTCHA_AVAILABLE and ENABLE_CAPTCHA:
+    set_captcha_renderer(CAPTCHA_RENDERER)
+    set_captcha_image_format(CAPTCHA_IMAGE_FORMAT)
+    set_captcha_audio_clips(CAPTCHA_AUDIO_CLIPS)
+    if CAPTCHA_AUDIO and AUDIO_CAPTCHA_AVAILABLE:
+        # Loaded here rather than in the first audio request, which would wait on espeak for every clip
+        clip_sources = get_clip_library().sources
+        captcha_audio_enabled = clip_sources['tone'] == 0 or CAPTCHA_AUDIO_TONES
+        if not captcha_audio_enabled:
+            print(f"Audio CAPTCHA disabled: {clip_sources['tone']} clips are tones (set CAPTCHA_AUDIO_CLIPS or install espeak)")
+    captcha_render_pool = configure_captcha_render_pool(
+        CAPTCHA_RENDER_WORKERS, CAPTCHA_RENDER_QUEUE, CAPTCHA_RENDER_TIMEOUT, CAPTCHA_RENDER_OVERFLOW
+    )
+    if captcha_render_pool:
+        atexit.register(captcha_render_pool.close)
+    configure_captcha_pool(CAPTCHA_POOL_SIZE, CAPTCHA_POOL_LOW_WATER)
+
+# Circuit breakers for outbound dependencies: a dead service fails fast instead of tying up workers
+def dependency_breaker(name, **options):
+    """Shared breaker for an outbound dependency, with the configured thresholds"""
+    return get_breaker(
+        name,
+        window=BREAKER_WINDOW_SECONDS,
+        min_calls=BREAKER_MIN_CALLS,
+        failure_rate=BREAKER_FAILURE_RATE,
+        slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate=BREAKER_SLOW_CALL_RATE,
+        open_seconds=BREAKER_OPEN_SECONDS,
+        **options
+    )
+
+smtp_breaker = dependency_breaker('smtp', ignore=(smtplib.SMTPRecipientsRefused,))
+sms_breaker = dependency_breaker('sms')
+recaptcha_breaker = dependency_breaker('recaptcha')
+
+@app.before_request
+def start_request_deadline():
+    """Outbound calls made while handling a request share one time budget"""
+    g.deadline_token = start_deadline(REQUEST_DEADLINE_SECONDS)
+
+@app.teardown_request
+def end_request_deadline(exception=None):
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        end_deadline(token)
+
+# Initialize password hasher; older hashes are upgraded on the next successful login
+password_hasher = PasswordHasher(
+    PASSWORD_HASH_SCHEME,
+    pbkdf2_iterations=PASSWORD_PBKDF2_ITERATIONS,
+    scrypt_n=PASSWORD_SCRYPT_N,
+    scrypt_r=PASSWORD_SCRYPT_R,
+    scrypt_p=PASSWORD_SCRYPT_P,
+    argon2_time_cost=PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_cost=PASSWORD_ARGON2_MEMORY_COST,
+    argon2_parallelism=PASSWORD_ARGON2_PARALLELISM,
+    offload=PASSWORD_HASH_OFFLOAD,
+    workers=PASSWORD_HASH_WORKERS
+)
+atexit.register(password_hasher.close)
+
 # Initialize reCAPTCHA managers
 recaptcha_v2_manager = None
 recaptcha_v3_manager = None
 
+recaptcha_options = {
+    'timeout': RECAPTCHA_TIMEOUT,
+    'breaker': recaptcha_breaker,
+    'verify_url': RECAPTCHA_VERIFY_URL,
+    'pool_size': RECAPTCHA_POOL_SIZE,
+    'token_ttl': RECAPTCHA_TOKEN_TTL
+}
+
 if CAPTCHA_AVAILABLE:
     if ENABLE_RECAPTCHA_V2 and RECAPTCHA_SITE_KEY and RECAPTCHA_SECRET_KEY:
-        recaptcha_v2_manager = create_recaptcha_manager(RECAPTCHA_SITE_KEY, RECAPTCHA_SECRET_KEY)
+        recaptcha_v2_manager = create_recaptcha_manager(RECAPTCHA_SITE_KEY, RECAPTCHA_SECRET_KEY, **recaptcha_options)
+        atexit.register(recaptcha_v2_manager.close)
 
     if ENABLE_RECAPTCHA_V3 and RECAPTCHA_V3_SITE_KEY and RECAPTCHA_V3_SECRET_KEY:
-        recaptcha_v3_manager = create_recaptcha_manager(RECAPTCHA_V3_SITE_KEY, RECAPTCHA_V3_SECRET_KEY)
+        recaptcha_v3_manager = create_recaptcha_manager(RECAPTCHA_V3_SITE_KEY, RECAPTCHA_V3_SECRET_KEY, **recaptcha_options)
+        atexit.register(recaptcha_v3_manager.close)
 
-# Initialize Twilio client
-twilio_client = None
-if TWILIO_AVAILABLE and os.getenv('USE_SMS', 'False').lower() == 'true':
+# Initialize SMS dispatcher
+sms_dispatcher = None
+if USE_SMS:
     try:
-        twilio_client = Client(os.getenv('TWILIO_ACCOUNT_SID'), os.getenv('TWILIO_AUTH_TOKEN'))
+        if SMS_PROVIDER == 'fake':
+            sms_provider = FakeSMSProvider(
+                latency=SMS_FAKE_LATENCY, failure_rate=SMS_FAKE_FAILURE_RATE, timeout=SMS_TIMEOUT
+            )
+        elif TWILIO_AVAILABLE:
+            sms_provider = TwilioProvider(
+                TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, timeout=SMS_TIMEOUT
+            )
+        else:
+            sms_provider = None
+        
+        if sms_provider:
+            sms_dispatcher = SMSDispatcher(
+                sms_provider,
+                workers=SMS_WORKERS,
+                max_attempts=SMS_MAX_ATTEMPTS,
+                backoff=SMS_RETRY_BACKOFF,
+                breaker=sms_breaker
+            )
+            atexit.register(sms_dispatcher.close)
     except Exception as e:
-        print(f"Twilio initialization failed: {e}")
-else:
-    twilio_client = None
+        print(f"SMS initialization failed: {e}")
 
 # Database Models
 class User(db.Model):
@@ -195,10 +429,17 @@ class User(db.Model):
     notifications = db.relationship('Notification', backref='user_obj', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+    
+    def upgrade_password_hash(self, password):
+        """Rehash a just-verified password if its hash uses an older scheme or cost"""
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        return True
     
     def to_dict(self):
         """Convert user to dictionary"""
@@ -219,6 +460,8 @@ class User(db.Model):
 
 class AuthLog(db.Model):
     __tablename__ = 'auth_logs'
+    # Deletes through the partition view's triggers report no affected rows
+    __mapper_args__ = {'confirm_deleted_rows': not LOG_PARTITIONING}
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
@@ -251,6 +494,7 @@ class AuthLog(db.Model):
 
 class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
+    __mapper_args__ = {'confirm_deleted_rows': not LOG_PARTITIONING}
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
@@ -322,7 +566,7 @@ class SecurityAlert(db.Model):
     severity = db.Column(db.String(20), nullable=False, default='medium')  # low, medium, high, critical
     status = db.Column(db.String(20), nullable=False, default='active')  # active, resolved, ignored
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
-    resolved_at = db.Column(db.DateTime, nullable=True)
+    resolved_at = db.Column(db.DateTime, nullable=True, index=True)
     resolved_by = db.Column(db.String(120), nullable=True)
     
     def to_dict(self):
@@ -343,6 +587,67 @@ class SecurityAlert(db.Model):
     def __repr__(self):
         return f'<SecurityAlert {self.alert_type} - {self.severity}>'
 
+class KnownIP(db.Model):
+    __tablename__ = 'known_ips'
+    __table_args__ = (db.UniqueConstraint('email', 'ip_address', name='uq_known_ips_email_ip'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), nullable=False, index=True)
+    ip_address = db.Column(db.String(45), nullable=False)
+    first_seen = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<KnownIP {self.email} - {self.ip_address}>'
+
+class UsedCaptchaNonce(db.Model):
+    """Nonces of spent stateless CAPTCHA tokens, shared by all workers"""
+    __tablename__ = 'used_captcha_nonces'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nonce = db.Column(db.String(32), nullable=False, unique=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<UsedCaptchaNonce {self.nonce}>'
+
+class JobLock(db.Model):
+    """Lease on a maintenance job, so only one process runs it at a time"""
+    __tablename__ = 'job_locks'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    locked_until = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<JobLock {self.name} until {self.locked_until}>'
+
+class EventRollup(db.Model):
+    __tablename__ = 'event_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'source', 'dimension', 'value', name='uq_event_rollups_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False, default='minute')  # minute, hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False, index=True)
+    source = db.Column(db.String(20), nullable=False)  # auth, activity
+    dimension = db.Column(db.String(30), nullable=False)  # event_type, delivery_method, risk_level, severity
+    value = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        """Convert rollup bucket to dictionary"""
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'source': self.source,
+            'dimension': self.dimension,
+            'value': self.value,
+            'count': self.count
+        }
+    
+    def __repr__(self):
+        return f'<EventRollup {self.granularity} {self.bucket_start} {self.dimension}={self.value}: {self.count}>'
+
 class LoginAttempt(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False)
@@ -353,30 +658,326 @@ class LoginAttempt(db.Model):
     captcha_used = db.Column(db.String(50))
     captcha_success = db.Column(db.Boolean)
 
+# Dashboard aggregates cache; writers bump the generation of the tables they touch
+dashboard_cache = GenerationCache(
+    max_staleness=DASHBOARD_CACHE_MAX_STALENESS,
+    max_age=DASHBOARD_CACHE_MAX_AGE
+)
+
+@db.event.listens_for(User, 'after_insert')
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def bump_users_generation(mapper, connection, target):
+    """Invalidate cached user counts when a user row changes"""
+    dashboard_cache.bump('users')
+
+# Admin recipients for alert fan-out; no stale reads once a generation moves on
+admin_recipient_cache = GenerationCache(max_staleness=0, max_age=ADMIN_RECIPIENT_CACHE_SECONDS)
+
+@db.event.listens_for(User, 'after_insert')
+@db.event.listens_for(User, 'after_delete')
+def bump_admins_on_membership(mapper, connection, target):
+    """Invalidate the admin recipient list when an admin is created or deleted"""
+    if target.role == 'admin':
+        admin_recipient_cache.bump('admins')
+
+@db.event.listens_for(User, 'after_update')
+def bump_admins_on_update(mapper, connection, target):
+    """Invalidate the admin recipient list when a role or an admin's email changes"""
+    state = db.inspect(target)
+    if state.attrs.role.history.has_changes() or (
+        target.role == 'admin' and state.attrs.email.history.has_changes()
+    ):
+        admin_recipient_cache.bump('admins')
+
+def get_admin_recipients():
+    """(id, email) of every admin user"""
+    return admin_recipient_cache.get('admins', ('admins',), lambda: [
+        (user_id, email) for user_id, email in
+        db.session.query(User.id, User.email).filter(User.role == 'admin').order_by(User.id).all()
+    ])
+
+# Optional time partitioning of the log tables (table -> timestamp column)
+PARTITIONED_TABLES = {
+    'auth_logs': 'timestamp',
+    'activity_logs': 'timestamp'
+}
+
+log_partitions = None
+if LOG_PARTITIONING:
+    with app.app_context():
+        log_partitions = create_partition_manager(
+            db,
+            PARTITIONED_TABLES,
+            directory=LOG_PARTITION_DIR,
+            granularity=LOG_PARTITION_GRANULARITY,
+            retention_days=LOG_PARTITION_RETENTION_DAYS
+        )
+        if log_partitions:
+            log_partitions.install()
+
+# Audit Log Writer
+AUDIT_TABLES = {
+    'auth_logs': AuthLog,
+    'activity_logs': ActivityLog
+}
+
+def resolve_user_ids(emails):
+    """Map emails to user ids with a single query"""
+    if not emails:
+        return {}
+    rows = db.session.query(User.email, User.id).filter(User.email.in_(emails)).all()
+    return {email: user_id for email, user_id in rows}
+
+# Rollup counters maintained alongside the audit rows
+ROLLUP_DIMENSIONS = {
+    'auth_logs': ('auth', ('event_type', 'delivery_method', 'risk_level')),
+    'activity_logs': ('activity', ('severity',))
+}
+ROLLUP_GRANULARITIES = ('minute', 'hour', 'day')
+ROLLUP_STEPS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1)
+}
+
+ROLLUP_UPSERT = text(
+    "INSERT INTO event_rollups (granularity, bucket_start, source, dimension, value, count) "
+    "VALUES (:granularity, :bucket_start, :source, :dimension, :value, :count) "
+    "ON CONFLICT (granularity, bucket_start, source, dimension, value) "
+    "DO UPDATE SET count = event_rollups.count + excluded.count"
+).bindparams(
+    # Stored in the same format as EventRollup.bucket_start, so ORM filters and the conflict key match
+    bindparam('bucket_start', type_=db.DateTime)
+)
+
+def upsert_event_rollups(table, rows):
+    """Add the rollup increments for freshly written audit rows"""
+    if table not in ROLLUP_DIMENSIONS:
+        return
+    
+    source, dimensions = ROLLUP_DIMENSIONS[table]
+    counts = aggregate_rollups(rows, source, dimensions, ROLLUP_GRANULARITIES)
+    if counts:
+        db.session.execute(ROLLUP_UPSERT, [
+            {
+                'granularity': granularity,
+                'bucket_start': bucket,
+                'source': source,
+                'dimension': dimension,
+                'value': value,
+                'count': count
+            }
+            for (granularity, bucket, source, dimension, value), count in counts.items()
+        ])
+
+def rebuild_event_rollups(since):
+    """Recompute rollups from the raw log tables for everything newer than ``since``"""
+    # Start on a day boundary so coarse buckets are rebuilt from complete data
+    since = bucket_start(since, 'day')
+    EventRollup.query.filter(EventRollup.bucket_start >= since).delete(synchronize_session=False)
+    
+    for table in ROLLUP_DIMENSIONS:
+        model = AUDIT_TABLES[table]
+        query = db.session.query(model.__table__).filter(model.timestamp >= since).execution_options(yield_per=5000)
+        batch = []
+        for row in query:
+            batch.append(dict(row._mapping))
+            if len(batch) >= 5000:
+                upsert_event_rollups(table, batch)
+                batch = []
+        upsert_event_rollups(table, batch)
+    
+    db.session.commit()
+
+def rollup_granularity_for(since):
+    """Finest rollup granularity still retained as far back as ``since``"""
+    age = datetime.utcnow() - since
+    if age <= timedelta(hours=ROLLUP_MINUTE_RETENTION_HOURS):
+        return 'minute'
+    if age <= timedelta(days=ROLLUP_HOUR_RETENTION_DAYS):
+        return 'hour'
+    return 'day'
+
+def get_rollup_totals(source, dimension, since, granularity=None):
+    """Event counts per value of ``dimension`` since a point in time"""
+    granularity = granularity or rollup_granularity_for(since)
+    rows = db.session.query(EventRollup.value, func.sum(EventRollup.count)).filter(
+        and_(
+            EventRollup.granularity == granularity,
+            EventRollup.source == source,
+            EventRollup.dimension == dimension,
+            EventRollup.bucket_start >= bucket_start(since, granularity)
+        )
+    ).group_by(EventRollup.value).all()
+    return {value: int(total) for value, total in rows}
+
+def get_rollup_series(source, dimension, since, granularity):
+    """Per-bucket counts for each value of ``dimension``, with empty buckets filled in"""
+    start = bucket_start(since, granularity)
+    rows = db.session.query(EventRollup.bucket_start, EventRollup.value, EventRollup.count).filter(
+        and_(
+            EventRollup.granularity == granularity,
+            EventRollup.source == source,
+            EventRollup.dimension == dimension,
+            EventRollup.bucket_start >= start
+        )
+    ).all()
+    
+    buckets = []
+    current, end = start, bucket_start(datetime.utcnow(), granularity)
+    while current <= end:
+        buckets.append(current)
+        current += ROLLUP_STEPS[granularity]
+    
+    positions = {bucket: index for index, bucket in enumerate(buckets)}
+    datasets = defaultdict(lambda: [0] * len(buckets))
+    for bucket, value, count in rows:
+        if bucket in positions:
+            datasets[value][positions[bucket]] += count
+    
+    return {
+        'labels': [bucket.isoformat() for bucket in buckets],
+        'datasets': dict(datasets)
+    }
+
+def write_audit_records(records):
+    """Bulk insert queued audit records in one transaction"""
+    if audit_writer.synchronous and has_app_context():
+        # Written inline with the request, in its session: a second connection
+        # could wait on the write lock the request's transaction still holds
+        return _write_audit_records(records)
+    
+    # A fresh app context has its own session, so a back-pressure flush from a
+    # request thread never commits or rolls back the request's work
+    with app.app_context():
+        _write_audit_records(records)
+
+def _write_audit_records(records):
+    try:
+        user_ids = resolve_user_ids({row['email'] for _, row in records if 'user_id' not in row})
+
+        rows_by_table = defaultdict(list)
+        for table, row in records:
+            if 'user_id' not in row:
+                row['user_id'] = user_ids.get(row['email'])
+            rows_by_table[table].append(row)
+
+        for table, rows in rows_by_table.items():
+            # A list of parameter sets runs as a single executemany
+            db.session.execute(AUDIT_TABLES[table].__table__.insert(), rows)
+            upsert_event_rollups(table, rows)
+
+        db.session.commit()
+        dashboard_cache.bump(*rows_by_table)
+    except Exception:
+        db.session.rollback()
+        raise
+
+audit_writer = AuditWriter(
+    write_audit_records,
+    mode=AUDIT_WRITER_MODE,
+    flush_size=AUDIT_FLUSH_SIZE,
+    flush_interval=AUDIT_FLUSH_INTERVAL
+)
+
+# Flush whatever is still queued when the process exits
+atexit.register(audit_writer.close)
+
+# Sliding-window counters for suspicious activity detection
+COUNTED_AUTH_EVENTS = ('login_attempt', 'login_failed')
+
+suspicion_counters = SlidingWindowStore(
+    window_seconds=max(ALERT_THRESHOLD_TIME_WINDOW, ALERT_RAPID_ATTEMPTS_WINDOW) * 60,
+    bucket_seconds=COUNTER_BUCKET_SECONDS
+)
+suspicion_counters_loaded = threading.Event()
+suspicion_counters_lock = threading.Lock()
+
+def load_suspicion_counters():
+    """Rebuild the in-memory counters from auth_logs (cold start only)"""
+    if suspicion_counters_loaded.is_set():
+        return
+
+    with suspicion_counters_lock:
+        if suspicion_counters_loaded.is_set():
+            return
+
+        cutoff = datetime.utcnow() - timedelta(seconds=suspicion_counters.window_seconds)
+        rows = db.session.query(AuthLog.email, AuthLog.event_type, AuthLog.ip_address, AuthLog.timestamp).filter(
+            and_(
+                AuthLog.event_type.in_(COUNTED_AUTH_EVENTS),
+                AuthLog.timestamp >= cutoff
+            )
+        ).all()
+
+        events = []
+        for email, event_type, ip_address, timestamp in rows:
+            when = calendar.timegm(timestamp.utctimetuple()) + timestamp.microsecond / 1e6
+            events.append((('email', email, event_type), when))
+            if ip_address:
+                events.append((('ip', ip_address, event_type), when))
+
+        suspicion_counters.rebuild(events)
+        suspicion_counters_loaded.set()
+
+def record_auth_counters(email, event_type, ip_address):
+    """Count an auth event for the suspicious activity detectors"""
+    if event_type not in COUNTED_AUTH_EVENTS:
+        return
+
+    load_suspicion_counters()
+    suspicion_counters.record(('email', email, event_type))
+    if ip_address:
+        suspicion_counters.record(('ip', ip_address, event_type))
+
+# Known login IPs per user, fronted by an in-process LRU of confirmed pairs
+known_ip_cache = LRUSet(KNOWN_IP_CACHE_SIZE)
+
+def remember_login_ip(email, ip_address):
+    """Record a successful login IP; returns True if it is new for a user with login history"""
+    key = (email, ip_address)
+    if key in known_ip_cache:
+        return False
+    
+    known = db.session.query(KnownIP.id).filter_by(email=email, ip_address=ip_address).first()
+    if known:
+        known_ip_cache.add(key)
+        return False
+    
+    has_history = db.session.query(KnownIP.id).filter_by(email=email).first() is not None
+    
+    try:
+        db.session.add(KnownIP(email=email, ip_address=ip_address))
+        db.session.commit()
+    except IntegrityError:
+        # Another request registered the same IP first
+        db.session.rollback()
+        has_history = False
+    
+    known_ip_cache.add(key)
+    return has_history
+
 # Activity Logging Functions
 def log_activity(email, activity_type, description, target_user=None, severity='info', ip_address=None, user_agent=None):
     """Log user/admin activity"""
     try:
-        # Get user ID if user exists
-        user = User.query.filter_by(email=email).first()
-        user_id = user.id if user else None
-        
-        activity = ActivityLog(
-            user_id=user_id,
-            email=email,
-            activity_type=activity_type,
-            description=description,
-            target_user=target_user,
-            ip_address=ip_address or request.remote_addr if request else '127.0.0.1',
-            user_agent=user_agent or request.headers.get('User-Agent', '') if request else '',
-            severity=severity
-        )
+        record = {
+            'email': email,
+            'activity_type': activity_type,
+            'description': description,
+            'target_user': target_user,
+            'ip_address': ip_address or request.remote_addr if request else '127.0.0.1',
+            'user_agent': user_agent or request.headers.get('User-Agent', '') if request else '',
+            'severity': severity,
+            'timestamp': datetime.utcnow()
+        }
         
-        db.session.add(activity)
-        db.session.commit()
+        audit_writer.submit('activity_logs', dict(record))
         
         # Create notification for critical activities
         if severity in ['error', 'critical']:
+            user_id = resolve_user_ids({email}).get(email)
             create_notification(
                 user_id=user_id,
                 title=f"Critical Activity: {activity_type}",
@@ -387,7 +988,7 @@ def log_activity(email, activity_type, description, target_user=None, severity='
         
         # Send email alert for admin activities
         if activity_type.startswith('admin_') and ENABLE_EMAIL_ALERTS:
-            send_activity_alert_email(activity)
+            send_activity_alert_email(ActivityLog(**record))
             
     except Exception as e:
         print(f"Error logging activity: {e}")
@@ -395,38 +996,26 @@ def log_activity(email, activity_type, description, target_user=None, severity='
 def log_auth_event(email, event_type, details="", ip_address="127.0.0.1", user_agent="", delivery_method=None, risk_level='low'):
     """Log authentication events to database"""
     try:
-        # Get user ID if user exists
-        user = User.query.filter_by(email=email).first()
-        user_id = user.id if user else None
-        
         # Get delivery method from session if not provided
         if not delivery_method:
             delivery_method = session.get('delivery_method', 'N/A')
         
-        log_entry = AuthLog(
-            user_id=user_id,
-            email=email,
-            event_type=event_type,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            delivery_method=delivery_method,
-            risk_level=risk_level
-        )
-        
-        db.session.add(log_entry)
-        db.session.commit()
+        audit_writer.submit('auth_logs', {
+            'email': email,
+            'event_type': event_type,
+            'details': details,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'delivery_method': delivery_method,
+            'risk_level': risk_level,
+            'timestamp': datetime.utcnow()
+        })
         
         # Check for suspicious activity
+        record_auth_counters(email, event_type, ip_address)
         check_suspicious_activity(email, event_type, ip_address)
         
-        # Clean up old logs (keep last 10000 entries)
-        log_count = AuthLog.query.count()
-        if log_count > 10000:
-            old_logs = AuthLog.query.order_by(AuthLog.timestamp.asc()).limit(log_count - 10000).all()
-            for log in old_logs:
-                db.session.delete(log)
-            db.session.commit()
+        # Old logs are trimmed by the retention job, not on the request path
             
     except Exception as e:
         db.session.rollback()
@@ -445,6 +1034,7 @@ def create_notification(user_id, title, message, notification_type='info', sever
         
         db.session.add(notification)
         db.session.commit()
+        dashboard_cache.bump('notifications')
         
         # Send email for critical notifications
         if severity in ['error', 'critical'] and ENABLE_EMAIL_ALERTS:
@@ -456,6 +1046,25 @@ def create_notification(user_id, title, message, notification_type='info', sever
         print(f"Error creating notification: {e}")
         return None
 
+def notify_admins(title, message, notification_type='info', severity='info'):
+    """Add one notification per admin as a single bulk insert; the caller commits"""
+    recipients = get_admin_recipients()
+    if not recipients:
+        return []
+    
+    created_at = datetime.utcnow()
+    return db.session.scalars(
+        insert(Notification).returning(Notification.id),
+        [{
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'notification_type': notification_type,
+            'severity': severity,
+            'created_at': created_at
+        } for user_id, _ in recipients]
+    ).all()
+
 def create_security_alert(alert_type, description, affected_user=None, ip_address=None, severity='medium'):
     """Create security alert"""
     try:
@@ -467,23 +1076,20 @@ def create_security_alert(alert_type, description, affected_user=None, ip_addres
             severity=severity
         )
         
+        # The alert and every admin notification share one commit
         db.session.add(alert)
+        notification_ids = notify_admins(
+            title=f"Security Alert: {alert_type}",
+            message=description,
+            notification_type='security',
+            severity=severity
+        )
         db.session.commit()
+        dashboard_cache.bump('security_alerts', 'notifications')
         
-        # Send email alert for high/critical severity
+        # One email to all admins for high/critical severity also covers their notifications
         if severity in ['high', 'critical'] and ENABLE_EMAIL_ALERTS:
-            send_security_alert_email(alert)
-        
-        # Create notification for all admins
-        admin_users = User.query.filter_by(role='admin').all()
-        for admin in admin_users:
-            create_notification(
-                user_id=admin.id,
-                title=f"Security Alert: {alert_type}",
-                message=description,
-                notification_type='security',
-                severity=severity
-            )
+            send_security_alert_email(alert, notification_ids)
         
         return alert
     except Exception as e:
@@ -496,13 +1102,9 @@ def check_suspicious_activity(email, event_type, ip_address):
     try:
         # Check for multiple failed login attempts
         if event_type == 'login_failed':
-            recent_failures = AuthLog.query.filter(
-                and_(
-                    AuthLog.email == email,
-                    AuthLog.event_type == 'login_failed',
-                    AuthLog.timestamp >= datetime.utcnow() - timedelta(minutes=ALERT_THRESHOLD_TIME_WINDOW)
-                )
-            ).count()
+            recent_failures = suspicion_counters.count(
+                ('email', email, 'login_failed'), ALERT_THRESHOLD_TIME_WINDOW * 60
+            )
             
             if recent_failures >= ALERT_THRESHOLD_FAILED_LOGINS:
                 create_security_alert(
@@ -512,18 +1114,25 @@ def check_suspicious_activity(email, event_type, ip_address):
                     ip_address=ip_address,
                     severity='high'
                 )
+            
+            # Check for one IP failing against many accounts
+            if ip_address:
+                ip_failures = suspicion_counters.count(
+                    ('ip', ip_address, 'login_failed'), ALERT_THRESHOLD_TIME_WINDOW * 60
+                )
+                
+                if ip_failures >= ALERT_THRESHOLD_IP_FAILED_LOGINS:
+                    create_security_alert(
+                        alert_type='ip_failed_logins',
+                        description=f'Excessive failed login attempts from IP {ip_address}. {ip_failures} failures in {ALERT_THRESHOLD_TIME_WINDOW} minutes.',
+                        affected_user=email,
+                        ip_address=ip_address,
+                        severity='high'
+                    )
         
         # Check for login from new IP
-        if event_type == 'login_success':
-            previous_ips = db.session.query(AuthLog.ip_address).filter(
-                and_(
-                    AuthLog.email == email,
-                    AuthLog.event_type == 'login_success',
-                    AuthLog.ip_address != ip_address
-                )
-            ).distinct().all()
-            
-            if previous_ips and len(previous_ips) > 0:
+        if event_type == 'login_success' and ip_address:
+            if remember_login_ip(email, ip_address):
                 create_security_alert(
                     alert_type='new_ip_login',
                     description=f'Login from new IP address detected for {email}. New IP: {ip_address}',
@@ -533,19 +1142,17 @@ def check_suspicious_activity(email, event_type, ip_address):
                 )
         
         # Check for rapid successive login attempts
-        if event_type in ['login_attempt', 'login_failed']:
-            recent_attempts = AuthLog.query.filter(
-                and_(
-                    AuthLog.email == email,
-                    AuthLog.event_type.in_(['login_attempt', 'login_failed']),
-                    AuthLog.timestamp >= datetime.utcnow() - timedelta(minutes=5)
-                )
-            ).count()
+        if event_type in COUNTED_AUTH_EVENTS:
+            window = ALERT_RAPID_ATTEMPTS_WINDOW * 60
+            recent_attempts = sum(
+                suspicion_counters.count(('email', email, counted_event), window)
+                for counted_event in COUNTED_AUTH_EVENTS
+            )
             
-            if recent_attempts >= 10:
+            if recent_attempts >= ALERT_THRESHOLD_RAPID_ATTEMPTS:
                 create_security_alert(
                     alert_type='rapid_login_attempts',
-                    description=f'Rapid successive login attempts detected for {email} from IP {ip_address}. {recent_attempts} attempts in 5 minutes.',
+                    description=f'Rapid successive login attempts detected for {email} from IP {ip_address}. {recent_attempts} attempts in {ALERT_RAPID_ATTEMPTS_WINDOW} minutes.',
                     affected_user=email,
                     ip_address=ip_address,
                     severity='high'
@@ -593,20 +1200,19 @@ def send_notification_email(notification):
             html=html_body
         )
         
-        mail.send(msg)
-        
-        # Mark as email sent
-        notification.email_sent = True
-        db.session.commit()
+        notification_id = notification.id
+        outbound_queue.submit(
+            'notification', msg,
+            on_sent=lambda message: mark_notifications_emailed([notification_id])
+        )
         
     except Exception as e:
         print(f"Error sending notification email: {e}")
 
-def send_security_alert_email(alert):
-    """Send security alert email to admins"""
+def send_security_alert_email(alert, notification_ids=None):
+    """Queue a security alert email to admins; their notifications are marked once it is sent"""
     try:
-        admin_users = User.query.filter_by(role='admin').all()
-        admin_emails = [admin.email for admin in admin_users]
+        admin_emails = [email for _, email in get_admin_recipients()]
         
         if not admin_emails:
             admin_emails = [ADMIN_EMAIL]
@@ -651,36 +1257,66 @@ def send_security_alert_email(alert):
             html=html_body
         )
         
-        mail.send(msg)
+        outbound_queue.submit(
+            'security', msg,
+            on_sent=lambda message: mark_notifications_emailed(notification_ids) if notification_ids else None
+        )
+        return True
         
     except Exception as e:
         print(f"Error sending security alert email: {e}")
+        return False
 
 def send_activity_alert_email(activity):
-    """Send activity alert email for admin actions"""
+    """Queue an activity alert for admin actions; bursts by one admin go out as a single digest"""
     try:
-        admin_users = User.query.filter_by(role='admin').all()
-        admin_emails = [admin.email for admin in admin_users if admin.email != activity.email]
+        outbound_queue.submit('activity', {
+            'email': activity.email,
+            'activity_type': activity.activity_type,
+            'description': activity.description,
+            'target_user': activity.target_user,
+            'ip_address': activity.ip_address,
+            'timestamp': activity.timestamp
+        }, coalesce_key=('activity', activity.email))
+        
+    except Exception as e:
+        print(f"Error sending activity alert email: {e}")
+
+def deliver_activity_digest(activities):
+    """Email one or more admin activities by the same admin to the other admins"""
+    with app.app_context():
+        actor = activities[0]['email']
+        admin_emails = [email for _, email in get_admin_recipients() if email != actor]
         
         if not admin_emails:
             return
         
-        subject = f"📋 Admin Activity Alert: {activity.activity_type}"
+        if len(activities) == 1:
+            subject = f"📋 Admin Activity Alert: {activities[0]['activity_type']}"
+            heading = activities[0]['activity_type'].replace('_', ' ').title()
+        else:
+            subject = f"📋 Admin Activity Alert: {len(activities)} actions by {actor}"
+            heading = f"{len(activities)} Admin Actions"
+        
+        entries = []
+        for activity in activities:
+            target = f"<p><strong>Target User:</strong> {activity['target_user']}</p>" if activity['target_user'] else ''
+            entries.append(f"""
+                <div style="padding: 20px; background: #f8f9fa; border-radius: 10px; margin-top: 20px;">
+                    <p><strong>Admin User:</strong> {activity['email']}</p>
+                    <p><strong>Activity:</strong> {activity['description']}</p>
+                    {target}
+                    <p><strong>IP Address:</strong> {activity['ip_address']}</p>
+                    <p><strong>Time:</strong> {activity['timestamp'].strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+                </div>""")
         
         html_body = f"""
         <html>
             <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
                 <div style="background: linear-gradient(135deg, #ffc107 0%, #fd7e14 100%); padding: 30px; border-radius: 10px; text-align: center; color: white;">
                     <h2>📋 Admin Activity Alert</h2>
-                    <h3>{activity.activity_type.replace('_', ' ').title()}</h3>
-                </div>
-                <div style="padding: 20px; background: #f8f9fa; border-radius: 10px; margin-top: 20px;">
-                    <p><strong>Admin User:</strong> {activity.email}</p>
-                    <p><strong>Activity:</strong> {activity.description}</p>
-                    {f'<p><strong>Target User:</strong> {activity.target_user}</p>' if activity.target_user else ''}
-                    <p><strong>IP Address:</strong> {activity.ip_address}</p>
-                    <p><strong>Time:</strong> {activity.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
-                </div>
+                    <h3>{heading}</h3>
+                </div>{''.join(entries)}
                 <div style="text-align: center; margin-top: 20px;">
                     <a href="http://localhost:5000/admin/activity-logs" style="background: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">View Activity Logs</a>
                 </div>
@@ -697,53 +1333,254 @@ def send_activity_alert_email(activity):
             html=html_body
         )
         
-        mail.send(msg)
+        send_mail_message(msg)
+
+def mark_notifications_emailed(notification_ids):
+    """Flag notifications whose email has been delivered"""
+    with app.app_context():
+        Notification.query.filter(Notification.id.in_(notification_ids)).update(
+            {'email_sent': True}, synchronize_session=False
+        )
+        db.session.commit()
+
+def get_otp_smtp_pool():
+    """Pooled SMTP sessions for the OTP sender account"""
+    return get_smtp_pool(
+        OTP_SMTP_SERVER, OTP_SMTP_PORT, GMAIL_EMAIL, GMAIL_PASSWORD,
+        use_tls=OTP_SMTP_USE_TLS,
+        max_size=SMTP_POOL_SIZE,
+        idle_timeout=SMTP_POOL_IDLE_TIMEOUT,
+        health_check_after=SMTP_HEALTH_CHECK_AFTER
+    )
+
+def get_mail_smtp_pool():
+    """Pooled SMTP sessions for the Flask-Mail account (shared with OTP if it is the same login)"""
+    return get_smtp_pool(
+        app.config['MAIL_SERVER'], app.config['MAIL_PORT'],
+        app.config['MAIL_USERNAME'], app.config['MAIL_PASSWORD'],
+        use_tls=app.config['MAIL_USE_TLS'],
+        use_ssl=app.config.get('MAIL_USE_SSL', False),
+        max_size=SMTP_POOL_SIZE,
+        idle_timeout=SMTP_POOL_IDLE_TIMEOUT,
+        health_check_after=SMTP_HEALTH_CHECK_AFTER
+    )
+
+def send_mail_message(msg):
+    """Send a Flask-Mail message over a pooled SMTP session"""
+    with app.app_context():
+        if mail.state.suppress:
+            # Testing / MAIL_SUPPRESS_SEND: let Flask-Mail record it without sending
+            mail.send(msg)
+            return
         
-    except Exception as e:
-        print(f"Error sending activity alert email: {e}")
+        def send(smtp):
+            connection = MailConnection(mail.state)
+            connection.host = smtp
+            connection.num_emails = 0
+            connection.send(msg)
+        
+        smtp_breaker.call(get_mail_smtp_pool().run, send)
+
+def deliver_outbound(message):
+    """Transport for the outbound queue: performs one delivery and raises on failure"""
+    if message.kind == 'otp':
+        deliver_otp_email(**message.payload)
+    elif message.kind == 'activity':
+        deliver_activity_digest(message.items)
+    else:
+        send_mail_message(message.payload)
+
+# Outbound delivery queue: SMTP latency stays off the request path
+outbound_queue = OutboundQueue(
+    FakeTransport() if OUTBOUND_TRANSPORT == 'fake' else deliver_outbound,
+    workers=OUTBOUND_WORKERS,
+    max_attempts=OUTBOUND_MAX_ATTEMPTS,
+    backoff=OUTBOUND_RETRY_BACKOFF,
+    max_queue=OUTBOUND_QUEUE_SIZE,
+    coalesce_window=OUTBOUND_COALESCE_SECONDS
+)
+# atexit runs in reverse order: drain the queue first, then close pooled sessions
+atexit.register(close_smtp_pools)
+atexit.register(outbound_queue.close)
 
 # Background Tasks
-def cleanup_old_data():
-    """Clean up old data periodically"""
+def build_cleanup_manager(batch_size=None, pause=None):
+    """Retention policies applied by the daily cleanup job"""
+    batch_size = batch_size or RETENTION_BATCH_SIZE
+    pause = CLEANUP_BATCH_PAUSE if pause is None else pause
+
+    manager = RetentionManager(db)
+    manager.add_policy(RetentionPolicy(
+        'notifications',
+        max_age_days=NOTIFICATION_MAX_AGE_DAYS,
+        timestamp_column='created_at',
+        batch_size=batch_size,
+        max_batches=0,
+        pause=pause
+    ))
+    if not log_partitions:
+        manager.add_policy(RetentionPolicy(
+            'activity_logs',
+            max_age_days=ACTIVITY_LOG_MAX_AGE_DAYS,
+            batch_size=batch_size,
+            max_batches=0,
+            pause=pause
+        ))
+    manager.add_policy(RetentionPolicy(
+        'security_alerts',
+        max_age_days=RESOLVED_ALERT_MAX_AGE_DAYS,
+        timestamp_column='resolved_at',
+        condition="status = 'resolved'",
+        batch_size=batch_size,
+        max_batches=0,
+        pause=pause
+    ))
+    return manager
+
+data_cleanup = build_cleanup_manager()
+
+def acquire_job_lock(name, seconds):
+    """Take the lease on job ``name`` for ``seconds``; False while another process holds it"""
+    now = datetime.utcnow()
+    try:
+        db.session.add(JobLock(name=name, locked_until=now + timedelta(seconds=seconds)))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+    # Take over a lease its holder never released (the process died)
+    taken = JobLock.query.filter(JobLock.name == name, JobLock.locked_until < now).update(
+        {'locked_until': now + timedelta(seconds=seconds)}, synchronize_session=False
+    )
+    db.session.commit()
+    return taken == 1
+
+def release_job_lock(name):
+    JobLock.query.filter(JobLock.name == name).delete(synchronize_session=False)
+    db.session.commit()
+
+def cleanup_old_data(batch_size=None, pause=None, progress=None):
+    """Clean up old data in bounded, separately committed batches"""
+    manager = data_cleanup
+    if batch_size is not None or pause is not None:
+        manager = build_cleanup_manager(batch_size, pause)
+
     try:
         with app.app_context():
-            # Clean up old notifications (keep last 30 days)
-            old_notifications = Notification.query.filter(
-                Notification.created_at < datetime.utcnow() - timedelta(days=30)
-            ).all()
-            
-            for notification in old_notifications:
-                db.session.delete(notification)
-            
-            # Clean up old activity logs (keep last 90 days)
-            old_activities = ActivityLog.query.filter(
-                ActivityLog.timestamp < datetime.utcnow() - timedelta(days=90)
-            ).all()
-            
-            for activity in old_activities:
-                db.session.delete(activity)
-            
-            # Clean up resolved security alerts (keep last 30 days)
-            old_alerts = SecurityAlert.query.filter(
-                and_(
-                    SecurityAlert.status == 'resolved',
-                    SecurityAlert.resolved_at < datetime.utcnow() - timedelta(days=30)
-                )
-            ).all()
-            
-            for alert in old_alerts:
-                db.session.delete(alert)
-            
-            db.session.commit()
-            print(f"Cleaned up old data: {len(old_notifications)} notifications, {len(old_activities)} activities, {len(old_alerts)} alerts")
-            
+            # Every worker's scheduler and the CLI command run this job; the lease lets one through
+            if not acquire_job_lock('cleanup_old_data', CLEANUP_LOCK_SECONDS):
+                print("Cleanup of old data is already running in another process; skipped")
+                return []
+            try:
+                results = manager.enforce_all(progress)
+            finally:
+                release_job_lock('cleanup_old_data')
+            deleted = {result['table']: result['deleted'] for result in results}
+            dashboard_cache.bump(*[table for table, count in deleted.items() if count])
+
+            elapsed = sum(result['elapsed'] for result in results)
+            total = sum(deleted.values())
+            rate = total / elapsed if elapsed > 0 else 0.0
+            print(f"Cleaned up old data: {deleted.get('notifications', 0)} notifications, "
+                  f"{deleted.get('activity_logs', 0)} activities, {deleted.get('security_alerts', 0)} alerts "
+                  f"in {elapsed:.2f}s ({rate:.0f} rows/s)")
+            return results
+
     except Exception as e:
-        db.session.rollback()
         print(f"Error cleaning up old data: {e}")
+        return []
+
+# Log retention policies, enforced in batches by the scheduler
+retention_manager = RetentionManager(db)
+if log_partitions:
+    # Partitions expire as a whole; only rows written before partitioning are deleted
+    for table in PARTITIONED_TABLES:
+        legacy = log_partitions.legacy_table(table)
+        if legacy:
+            retention_manager.add_policy(RetentionPolicy(
+                legacy,
+                name=f'{table}:legacy',
+                max_age_days=LOG_PARTITION_RETENTION_DAYS,
+                batch_size=RETENTION_BATCH_SIZE
+            ))
+else:
+    retention_manager.add_policy(RetentionPolicy(
+        'auth_logs',
+        max_rows=AUTH_LOG_MAX_ROWS,
+        max_age_days=AUTH_LOG_MAX_AGE_DAYS,
+        batch_size=RETENTION_BATCH_SIZE
+    ))
+    retention_manager.add_policy(RetentionPolicy(
+        'activity_logs',
+        max_rows=ACTIVITY_LOG_MAX_ROWS,
+        batch_size=RETENTION_BATCH_SIZE
+    ))
+
+# Rollup compaction: finer buckets are dropped once coarser ones cover the period
+retention_manager.add_policy(RetentionPolicy(
+    'event_rollups',
+    name='event_rollups:minute',
+    max_age_hours=ROLLUP_MINUTE_RETENTION_HOURS,
+    timestamp_column='bucket_start',
+    condition="granularity = 'minute'",
+    batch_size=RETENTION_BATCH_SIZE
+))
+retention_manager.add_policy(RetentionPolicy(
+    'event_rollups',
+    name='event_rollups:hour',
+    max_age_days=ROLLUP_HOUR_RETENTION_DAYS,
+    timestamp_column='bucket_start',
+    condition="granularity = 'hour'",
+    batch_size=RETENTION_BATCH_SIZE
+))
+retention_manager.add_policy(RetentionPolicy(
+    'event_rollups',
+    name='event_rollups:day',
+    max_age_days=ROLLUP_DAY_RETENTION_DAYS,
+    timestamp_column='bucket_start',
+    condition="granularity = 'day'",
+    batch_size=RETENTION_BATCH_SIZE
+))
+
+if CAPTCHA_TOKEN_MODE == 'stateless' and CAPTCHA_NONCE_STORE == 'database':
+    retention_manager.add_policy(RetentionPolicy(
+        'used_captcha_nonces',
+        max_age_hours=1,
+        timestamp_column='expires_at',
+        batch_size=RETENTION_BATCH_SIZE
+    ))
+
+def enforce_log_retention():
+    """Trim log tables according to their retention policies"""
+    try:
+        with app.app_context():
+            for result in retention_manager.enforce_all():
+                if result['deleted']:
+                    print(f"Retention: trimmed {result['deleted']} rows from {result['name']} "
+                          f"in {result['batches']} batches ({result['rows_per_second']:.0f} rows/s)")
+    except Exception as e:
+        print(f"Error enforcing log retention: {e}")
+
+def maintain_log_partitions():
+    """Create upcoming log partitions and drop expired ones"""
+    try:
+        with app.app_context():
+            result = log_partitions.maintain()
+            for name in result['created']:
+                print(f"Partitions: created {name}")
+            for name in result['dropped']:
+                print(f"Partitions: dropped {name}")
+            if result['dropped']:
+                dashboard_cache.bump(*PARTITIONED_TABLES)
+    except Exception as e:
+        print(f"Error maintaining log partitions: {e}")
 
 # Initialize scheduler
 scheduler = BackgroundScheduler()
 scheduler.add_job(func=cleanup_old_data, trigger="interval", hours=24)
+scheduler.add_job(func=enforce_log_retention, trigger="interval", minutes=RETENTION_INTERVAL_MINUTES)
+if log_partitions:
+    scheduler.add_job(func=maintain_log_partitions, trigger="interval", hours=1, next_run_time=datetime.now())
 scheduler.start()
 
 # Shut down the scheduler when exiting the app
@@ -753,6 +1590,8 @@ atexit.register(lambda: scheduler.shutdown())
 def init_db():
     """Initialize database with default data"""
     db.create_all()
+    if log_partitions:
+        log_partitions.maintain()
     
     # Create default admin user if not exists
     admin_user = User.query.filter_by(email='admin@example.com').first()
@@ -830,46 +1669,15 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+STATS_SOURCES = ('users', 'auth_logs', 'security_alerts', 'notifications')
+
 def get_user_stats():
-    """Get user statistics for dashboard"""
+    """Get user statistics for dashboard (cached until a source table changes)"""
     try:
-        total_users = User.query.count()
-        active_users = User.query.filter_by(status='active').count()
-        admin_users = User.query.filter_by(role='admin').count()
-        
-        # Recent activity (last 24 hours)
-        recent_cutoff = datetime.utcnow() - timedelta(days=1)
-        recent_logs = AuthLog.query.filter(AuthLog.timestamp >= recent_cutoff).all()
-        
-        total_logins_today = AuthLog.query.filter(
-            and_(AuthLog.event_type == 'login_success', AuthLog.timestamp >= recent_cutoff)
-        ).count()
-        
-        failed_attempts_today = AuthLog.query.filter(
-            and_(AuthLog.event_type == 'login_failed', AuthLog.timestamp >= recent_cutoff)
-        ).count()
-        
-        # Security alerts
-        active_alerts = SecurityAlert.query.filter_by(status='active').count()
-        critical_alerts = SecurityAlert.query.filter(
-            and_(SecurityAlert.status == 'active', SecurityAlert.severity == 'critical')
-        ).count()
-        
-        # Unread notifications
-        unread_notifications = Notification.query.filter_by(is_read=False).count()
-        
-        return {
-            'total_users': total_users,
-            'active_users': active_users,
-            'admin_users': admin_users,
-            'total_logins_today': total_logins_today,
-            'failed_attempts_today': failed_attempts_today,
-            'recent_activity': len(recent_logs),
-            'active_alerts': active_alerts,
-            'critical_alerts': critical_alerts,
-            'unread_notifications': unread_notifications
-        }
+        return dashboard_cache.get('user_stats', STATS_SOURCES, compute_user_stats)
     except Exception as e:
+        # Zeros for this request only; caching them would hide the real figures until a source table changed
+        db.session.rollback()
         print(f"Error getting user stats: {e}")
         return {
             'total_users': 0,
@@ -883,13 +1691,80 @@ def get_user_stats():
             'unread_notifications': 0
         }
 
+def get_recent_auth_logs(limit=10):
+    """Most recent auth log entries as dictionaries"""
+    return dashboard_cache.get(('recent_auth_logs', limit), ('auth_logs',), lambda: [
+        log.to_dict() for log in AuthLog.query.order_by(desc(AuthLog.timestamp)).limit(limit).all()
+    ])
+
+def get_recent_alerts(limit=5):
+    """Most recent active security alerts as dictionaries"""
+    return dashboard_cache.get(('recent_alerts', limit), ('security_alerts',), lambda: [
+        alert.to_dict() for alert in SecurityAlert.query.filter_by(status='active').order_by(desc(SecurityAlert.created_at)).limit(limit).all()
+    ])
+
+def get_dashboard_chart_counts():
+    """Event type and delivery method totals for the last 24 hours"""
+    def compute():
+        chart_cutoff = datetime.utcnow() - timedelta(days=1)
+        event_counts = get_rollup_totals('auth', 'event_type', chart_cutoff)
+        delivery_counts = get_rollup_totals('auth', 'delivery_method', chart_cutoff)
+        delivery_counts.pop('N/A', None)
+        return event_counts, delivery_counts
+    
+    return dashboard_cache.get('chart_counts_24h', ('auth_logs',), compute)
+
+def compute_user_stats():
+    """Compute user statistics for dashboard"""
+    # Recent activity (last 24 hours) comes from the per-minute rollups
+    recent_cutoff = datetime.utcnow() - timedelta(days=1)
+    recent_events = select(
+        func.coalesce(func.sum(EventRollup.count), 0),
+        func.coalesce(func.sum(case((EventRollup.value == 'login_success', EventRollup.count), else_=0)), 0),
+        func.coalesce(func.sum(case((EventRollup.value == 'login_failed', EventRollup.count), else_=0)), 0)
+    ).where(
+        and_(
+            EventRollup.granularity == 'minute',
+            EventRollup.source == 'auth',
+            EventRollup.dimension == 'event_type',
+            EventRollup.bucket_start >= recent_cutoff
+        )
+    ).subquery()
+    
+    # One round trip for every figure on the dashboard
+    row = db.session.execute(select(
+        select(func.count(User.id)).scalar_subquery(),
+        select(func.count(User.id)).where(User.status == 'active').scalar_subquery(),
+        select(func.count(User.id)).where(User.role == 'admin').scalar_subquery(),
+        select(recent_events.c[1]).scalar_subquery(),
+        select(recent_events.c[2]).scalar_subquery(),
+        select(recent_events.c[0]).scalar_subquery(),
+        select(func.count(SecurityAlert.id)).where(SecurityAlert.status == 'active').scalar_subquery(),
+        select(func.count(SecurityAlert.id)).where(
+            and_(SecurityAlert.status == 'active', SecurityAlert.severity == 'critical')
+        ).scalar_subquery(),
+        select(func.count(Notification.id)).where(Notification.is_read == False).scalar_subquery()
+    )).one()
+    
+    return {
+        'total_users': row[0],
+        'active_users': row[1],
+        'admin_users': row[2],
+        'total_logins_today': row[3],
+        'failed_attempts_today': row[4],
+        'recent_activity': row[5],
+        'active_alerts': row[6],
+        'critical_alerts': row[7],
+        'unread_notifications': row[8]
+    }
+
 def generate_otp():
     """Generate a random 6-digit OTP"""
     return str(random.randint(100000, 999999))
 
-def send_otp_sms(phone, otp):
-    """Send OTP via SMS using Twilio"""
-    if not USE_SMS or not twilio_client:
+def send_otp_sms(phone, otp, email=None):
+    """Queue the OTP SMS; delivery and retries happen on the SMS dispatcher"""
+    if not USE_SMS or not sms_dispatcher:
         print(f"SMS disabled. OTP for {phone}: {otp}")
         return False
     
@@ -902,59 +1777,23 @@ If you didn't request this code, please ignore this message.
 
 - Flask 2FA Demo"""
         
-        message = twilio_client.messages.create(
-            body=message_body,
-            from_=TWILIO_PHONE_NUMBER,
-            to=phone
+        sms_dispatcher.submit(
+            phone, message_body,
+            on_sent=lambda message: print(f"SMS sent successfully. SID: {message.result}"),
+            on_failed=lambda message: report_otp_sms_failure(message, email, otp)
         )
-        
-        print(f"SMS sent successfully. SID: {message.sid}")
         return True
         
     except Exception as e:
-        if TWILIO_AVAILABLE and 'TwilioException' in str(type(e)):
-            print(f"Twilio SMS sending failed: {e}")
-        else:
-            print(f"SMS sending error: {e}")
+        print(f"SMS sending error: {e}")
         print(f"Fallback - OTP for {phone}: {otp}")
         return False
 
 def send_otp_email(email, otp):
-    """Send OTP via email or print to console"""
+    """Queue the OTP email, or print the OTP to console"""
     if USE_EMAIL:
         try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = GMAIL_EMAIL
-            msg['To'] = email
-            msg['Subject'] = "Your 2FA Verification Code"
-            
-            body = f"""
-            <html>
-                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; border-radius: 10px; text-align: center; color: white;">
-                        <h2>🔐 Two-Factor Authentication</h2>
-                        <p style="font-size: 18px; margin: 20px 0;">Your verification code is:</p>
-                        <div style="background: white; color: #333; padding: 15px; border-radius: 8px; font-size: 32px; font-weight: bold; letter-spacing: 5px; margin: 20px 0;">
-                            {otp}
-                        </div>
-                        <p style="font-size: 14px; opacity: 0.9;">This code will expire in 5 minutes.</p>
-                        <p style="font-size: 12px; opacity: 0.8;">If you didn't request this code, please ignore this email.</p>
-                    </div>
-                </body>
-            </html>
-            """
-            
-            msg.attach(MIMEText(body, 'html'))
-            
-            # Gmail SMTP
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(GMAIL_EMAIL, GMAIL_PASSWORD)
-            text = msg.as_string()
-            server.sendmail(GMAIL_EMAIL, email, text)
-            server.quit()
-            
+            outbound_queue.submit('otp', {'email': email, 'otp': otp}, on_failed=report_otp_email_failure)
             return True
         except Exception as e:
             print(f"Email sending failed: {e}")
@@ -971,6 +1810,54 @@ def send_otp_email(email, otp):
         print(f"{'='*50}\n")
         return True
 
+def deliver_otp_email(email, otp):
+    """Send the OTP email over SMTP (runs on an outbound worker)"""
+    # Create message
+    msg = MIMEMultipart()
+    msg['From'] = GMAIL_EMAIL
+    msg['To'] = email
+    msg['Subject'] = "Your 2FA Verification Code"
+    
+    body = f"""
+    <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; border-radius: 10px; text-align: center; color: white;">
+                <h2>🔐 Two-Factor Authentication</h2>
+                <p style="font-size: 18px; margin: 20px 0;">Your verification code is:</p>
+                <div style="background: white; color: #333; padding: 15px; border-radius: 8px; font-size: 32px; font-weight: bold; letter-spacing: 5px; margin: 20px 0;">
+                    {otp}
+                </div>
+                <p style="font-size: 14px; opacity: 0.9;">This code will expire in 5 minutes.</p>
+                <p style="font-size: 12px; opacity: 0.8;">If you didn't request this code, please ignore this email.</p>
+            </div>
+        </body>
+    </html>
+    """
+    
+    msg.attach(MIMEText(body, 'html'))
+    
+    # Gmail SMTP over a pooled, already authenticated session. Bytes, because
+    # Flask-Mail registers utf-8 bodies as 8bit, which as_string() cannot carry
+    smtp_breaker.call(get_otp_smtp_pool().send, GMAIL_EMAIL, [email], msg.as_bytes())
+
+def report_otp_email_failure(message):
+    """Fall back to the console and record the failure once retries are exhausted"""
+    email, otp = message.payload['email'], message.payload['otp']
+    print(f"Email sending failed: {message.error}")
+    print(f"OTP for {email}: {otp}")
+    with app.app_context():
+        log_auth_event(email, 'otp_failed', f'Email delivery failed after {message.attempts} attempts',
+                       delivery_method='email')
+
+def report_otp_sms_failure(message, email, otp):
+    """Fall back to the console and record the failure once SMS retries are exhausted"""
+    print(f"SMS sending failed: {message.error}")
+    print(f"Fallback - OTP for {message.payload['to']}: {otp}")
+    if email:
+        with app.app_context():
+            log_auth_event(email, 'otp_failed', f'SMS delivery failed after {message.attempts} attempts',
+                           delivery_method='sms')
+
 # Routes
 @app.route('/test')
 def test():
@@ -1078,26 +1965,27 @@ def login():
         captcha_details = ""
         
         if captcha_type == 'recaptcha_v2' and ENABLE_RECAPTCHA_V2 and recaptcha_v2_manager:
-            # Verify reCAPTCHA v2
-            result = recaptcha_v2_manager.verify_recaptcha_v2(recaptcha_v2_response, request.remote_addr)
+            # Verify reCAPTCHA v2; the wait is capped by the request budget, not just per-socket timeouts
+            result = recaptcha_v2_manager.result(
+                recaptcha_v2_manager.verify_recaptcha_v2_async(recaptcha_v2_response, request.remote_addr)
+            )
             captcha_valid = result['success']
             captcha_details = f"reCAPTCHA v2 verification: {result}"
             
         elif captcha_type == 'recaptcha_v3' and ENABLE_RECAPTCHA_V3 and recaptcha_v3_manager:
             # Verify reCAPTCHA v3
-            result = recaptcha_v3_manager.verify_recaptcha_v3(
+            result = recaptcha_v3_manager.result(recaptcha_v3_manager.verify_recaptcha_v3_async(
                 recaptcha_v3_token, 
                 'login', 
                 RECAPTCHA_V3_MIN_SCORE, 
                 request.remote_addr
-            )
+            ))
             captcha_valid = result['success']
             captcha_details = f"reCAPTCHA v3 verification: score={result.get('score', 0)}, action={result.get('action', '')}"
             
         else:
             # Verify custom CAPTCHA
-            captcha_answer = session.get('captcha_answer', '')
-            captcha_valid = verify_captcha(captcha_response, captcha_answer)
+            captcha_valid = check_captcha_response(captcha_response, request.form.get('captcha_token'))
             captcha_details = f"Custom CAPTCHA verification"
         
         if not captcha_valid:
@@ -1139,11 +2027,13 @@ def login():
         # Reset failed login attempts on successful login
         session.pop('failed_login_attempts', None)
         session.pop('captcha_answer', None)
+        session.pop('captcha_id', None)
         
         # Reset failed login attempts
         user.failed_login_attempts = 0
         user.last_login = datetime.utcnow()
         user.login_count += 1
+        user.upgrade_password_hash(password)
         db.session.commit()
         
         # Generate and store OTP
@@ -1170,7 +2060,7 @@ def login():
         # Send OTP based on selected method
         if delivery_method == 'sms':
             phone = user.phone
-            if send_otp_sms(phone, otp):
+            if send_otp_sms(phone, otp, email):
                 log_auth_event(email, 'otp_sent', f'OTP sent via SMS to {phone[-4:].rjust(len(phone), "*")}')
                 flash(f'OTP sent to {phone[-4:].rjust(len(phone), "*")} via SMS!', 'success')
             else:
@@ -1304,7 +2194,7 @@ def resend_otp():
     )
     
     if delivery_method == 'sms' and phone:
-        if send_otp_sms(phone, otp):
+        if send_otp_sms(phone, otp, email):
             log_auth_event(email, 'otp_resent', f'OTP resent via SMS to {phone[-4:].rjust(len(phone), "*")}')
             return jsonify({'success': True, 'message': 'OTP resent via SMS!'})
         else:
@@ -1332,36 +2222,132 @@ def logout():
     return redirect(url_for('index'))
 
 # CAPTCHA Routes
+# Issued challenges by id: encoded image, and the question for the audio version (per process)
+issued_captchas = ExpiringStore(ttl=CAPTCHA_IMAGE_TTL)
+
+class DatabaseNonceSet:
+    """Spent CAPTCHA token nonces in the database, so a token is single use across workers"""
+    
+    def __len__(self):
+        return db.session.query(func.count(UsedCaptchaNonce.id)).scalar()
+    
+    def add(self, nonce, expires_at):
+        """Record ``nonce``; returns False if some worker already has"""
+        try:
+            expires_at = datetime.utcfromtimestamp(expires_at)
+        except (OverflowError, OSError, ValueError):
+            return False
+        try:
+            db.session.add(UsedCaptchaNonce(nonce=nonce, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+# Signed challenge tokens replace the session answer in stateless mode
+captcha_signer = None
+if CAPTCHA_AVAILABLE and CAPTCHA_TOKEN_MODE == 'stateless':
+    captcha_signer = CaptchaTokenSigner(
+        CAPTCHA_TOKEN_SECRET,
+        ttl=CAPTCHA_TOKEN_TTL,
+        used_nonces=DatabaseNonceSet() if CAPTCHA_NONCE_STORE == 'database' else None
+    )
+
+def issue_captcha_challenge(captcha_type):
+    """Generate a challenge, remember its answer and image; returns the public fields"""
+    captcha_data = generate_captcha_challenge(captcha_type)
+    
+    token = None
+    if captcha_signer:
+        # The answer travels, signed, in the token; the session is left alone
+        token = captcha_signer.issue(captcha_data['answer'])
+    else:
+        # Store answer in session; the previous challenge's image is no longer needed
+        previous_id = session.get('captcha_id')
+        if previous_id:
+            issued_captchas.pop(previous_id)
+        session['captcha_answer'] = captcha_data['answer']
+        session['captcha_id'] = captcha_data['id']
+    
+    challenge_id = captcha_data['id']
+    issued_captchas.put(challenge_id, {
+        'image': captcha_data['image_bytes'],
+        'mimetype': captcha_data['mimetype'],
+        'question': captcha_data['question'],
+        'audio': None
+    })
+    
+    return {
+        'id': challenge_id,
+        'type': captcha_data['type'],
+        'token': token,
+        'image_url': url_for('captcha_image', challenge_id=challenge_id) if captcha_data['image_bytes'] else None,
+        'mimetype': captcha_data['mimetype'],
+        'audio_url': url_for('captcha_audio', challenge_id=challenge_id) if captcha_audio_enabled else None
+    }
+
+def check_captcha_response(user_input, token=None):
+    """Verify a custom CAPTCHA response against the signed token or the session answer"""
+    if captcha_signer:
+        return captcha_signer.verify(token, user_input)
+    return verify_captcha(user_input, session.get('captcha_answer', ''))
+
 @app.route('/captcha/generate')
 def generate_captcha_route():
     """Generate new CAPTCHA challenge"""
     try:
         captcha_type = request.args.get('type', CAPTCHA_TYPE)
-        captcha_data = generate_captcha_challenge(captcha_type)
-        
-        # Store answer in session
-        session['captcha_answer'] = captcha_data['answer']
-        
         return jsonify({
             'success': True,
-            'captcha': {
-                'type': captcha_data['type'],
-                'question': captcha_data['question'],
-                'image': captcha_data['image'],
-                'audio': captcha_data['audio']
-            }
+            'captcha': issue_captcha_challenge(captcha_type)
         })
+    except CaptchaUnavailable as e:
+        # Render processes are saturated; the client can retry shortly
+        response = jsonify({'success': False, 'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def no_store(response):
+    """Keep challenge media out of browser and proxy caches"""
+    response.headers['Cache-Control'] = 'no-store, max-age=0'
+    response.headers['Pragma'] = 'no-cache'
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+@app.route('/captcha/image/<challenge_id>')
+def captcha_image(challenge_id):
+    """Serve a challenge image as raw bytes"""
+    challenge = issued_captchas.get(challenge_id)
+    if challenge is None or not challenge['image']:
+        return Response('CAPTCHA expired', status=404, mimetype='text/plain')
+    
+    return no_store(Response(challenge['image'], mimetype=challenge['mimetype']))
+
+@app.route('/captcha/audio/<challenge_id>')
+def captcha_audio(challenge_id):
+    """Stream the spoken challenge as WAV, generated in memory on first request"""
+    challenge = issued_captchas.get(challenge_id)
+    if challenge is None or not captcha_audio_enabled:
+        return Response('CAPTCHA expired', status=404, mimetype='text/plain')
+    
+    # Kept with the challenge, so range requests for the same clip see the same audio
+    if challenge['audio'] is None:
+        challenge['audio'] = render_captcha_audio(challenge['question'])
+    if challenge['audio'] is None:
+        return Response('Audio CAPTCHA unavailable', status=404, mimetype='text/plain')
+    
+    return no_store(send_file(BytesIO(challenge['audio']), mimetype='audio/wav', conditional=True))
+
 @app.route('/captcha/verify', methods=['POST'])
 def verify_captcha_route():
     """Verify CAPTCHA response"""
     try:
         user_input = request.json.get('response', '').strip()
-        correct_answer = session.get('captcha_answer', '')
-        
-        is_valid = verify_captcha(user_input, correct_answer)
+        is_valid = check_captcha_response(user_input, request.json.get('token'))
         
         return jsonify({
             'success': True,
@@ -1415,29 +2401,145 @@ def admin_dashboard():
         
         stats = get_user_stats()
         
-        # Get recent logs
-        recent_logs = AuthLog.query.order_by(desc(AuthLog.timestamp)).limit(10).all()
-        recent_logs_dict = [log.to_dict() for log in recent_logs]
-        
-        # Event type distribution for charts (last 100 events)
-        recent_events = AuthLog.query.order_by(desc(AuthLog.timestamp)).limit(100).all()
-        event_counts = Counter([log.event_type for log in recent_events])
-        delivery_counts = Counter([log.delivery_method for log in recent_events if log.delivery_method != 'N/A'])
-        
-        # Get recent security alerts
-        recent_alerts = SecurityAlert.query.filter_by(status='active').order_by(desc(SecurityAlert.created_at)).limit(5).all()
-        alerts_dict = [alert.to_dict() for alert in recent_alerts]
+        # Event type and delivery method distribution for charts (last 24 hours)
+        event_counts, delivery_counts = get_dashboard_chart_counts()
         
         return render_template('admin/dashboard.html', 
                              stats=stats, 
-                             recent_logs=recent_logs_dict,
-                             event_counts=dict(event_counts),
-                             delivery_counts=dict(delivery_counts),
-                             recent_alerts=alerts_dict)
+                             recent_logs=get_recent_auth_logs(10),
+                             event_counts=event_counts,
+                             delivery_counts=delivery_counts,
+                             recent_alerts=get_recent_alerts(5))
     except Exception as e:
         flash(f'Error loading dashboard: {str(e)}', 'error')
         return redirect(url_for('index'))
 
+def build_dashboard_snapshot():
+    """Everything the live admin dashboard displays, as plain JSON data"""
+    with app.app_context():
+        return {
+            'stats': get_user_stats(),
+            'recent_events': get_recent_auth_logs(10),
+            'recent_alerts': get_recent_alerts(5)
+        }
+
+# One producer shared by every connected admin dashboard
+dashboard_broadcaster = SnapshotBroadcaster(
+    build_dashboard_snapshot,
+    interval=DASHBOARD_STREAM_INTERVAL,
+    heartbeat=DASHBOARD_STREAM_HEARTBEAT,
+    max_subscribers=DASHBOARD_STREAM_MAX_CLIENTS
+)
+
+@app.route('/admin/api/stats')
+@admin_required
+def admin_stats_api():
+    """Current dashboard snapshot (polling fallback for the live stream)"""
+    return jsonify(dict(build_dashboard_snapshot(), success=True))
+
+@app.route('/admin/api/stream')
+@admin_required
+def admin_stats_stream():
+    """Server-Sent Events stream of dashboard snapshot changes"""
+    try:
+        # Each open stream holds a worker thread; past the limit the dashboard polls /admin/api/stats
+        subscriber = dashboard_broadcaster.subscribe()
+    except StreamLimitReached as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(DASHBOARD_STREAM_MAX_SECONDS)
+        return response
+    
+    response = Response(
+        dashboard_broadcaster.stream(max_duration=DASHBOARD_STREAM_MAX_SECONDS, subscriber=subscriber),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+    # Frees the slot even if the client leaves before the stream starts
+    response.call_on_close(lambda: dashboard_broadcaster.unsubscribe(subscriber))
+    return response
+
+@app.route('/admin/api/cache')
+@admin_required
+def admin_cache_metrics():
+    """Hit/miss metrics for the dashboard snapshot cache"""
+    return jsonify({'success': True, 'cache': dashboard_cache.metrics()})
+
+@app.route('/admin/api/outbound')
+@admin_required
+def admin_outbound_status():
+    """Outbound delivery queue metrics and recent message statuses"""
+    return jsonify({
+        'metrics': outbound_queue.metrics(),
+        'smtp_pools': smtp_pool_metrics(),
+        'sms': sms_dispatcher.metrics() if sms_dispatcher else None,
+        'recent': outbound_queue.recent(50)
+    })
+
+@app.route('/admin/api/breakers')
+@admin_required
+def admin_breaker_status():
+    """State of the circuit breakers guarding SMTP, SMS and reCAPTCHA"""
+    return jsonify({'success': True, 'breakers': breaker_metrics()})
+
+@app.route('/admin/api/captcha')
+@admin_required
+def admin_captcha_status():
+    """Pre-rendered pool depth, render process load and signed token counters"""
+    return jsonify({
+        'success': True,
+        'pool': captcha_pool_metrics(),
+        'render': captcha_render_metrics(),
+        'tokens': captcha_signer.metrics() if captcha_signer else None
+    })
+
+CHART_RANGES = {
+    '24h': (timedelta(hours=24), 'hour'),
+    '7d': (timedelta(days=7), 'hour'),
+    '30d': (timedelta(days=30), 'day')
+}
+
+@app.route('/admin/api/charts')
+@admin_required
+def admin_chart_data():
+    """Chart data for the admin dashboard, served from the event rollups"""
+    range_key = request.args.get('range', '24h')
+    dimension = request.args.get('dimension', 'event_type')
+    
+    if range_key not in CHART_RANGES:
+        return jsonify({'success': False, 'error': f'Unknown range: {range_key}'}), 400
+    
+    sources = {dim: source for source, dims in ROLLUP_DIMENSIONS.values() for dim in dims}
+    if dimension not in sources:
+        return jsonify({'success': False, 'error': f'Unknown dimension: {dimension}'}), 400
+    
+    span, granularity = CHART_RANGES[range_key]
+    granularity = request.args.get('granularity', granularity)
+    if granularity not in ROLLUP_STEPS:
+        return jsonify({'success': False, 'error': f'Unknown granularity: {granularity}'}), 400
+    
+    since = datetime.utcnow() - span
+    # Finer buckets are not kept that far back, and would only be empty
+    finest = rollup_granularity_for(since)
+    if ROLLUP_GRANULARITIES.index(granularity) < ROLLUP_GRANULARITIES.index(finest):
+        return jsonify({
+            'success': False,
+            'error': f'Granularity {granularity} is not available for range {range_key}; use {finest} or coarser'
+        }), 400
+    source = sources[dimension]
+    
+    return jsonify({
+        'success': True,
+        'range': range_key,
+        'dimension': dimension,
+        'granularity': granularity,
+        'totals': get_rollup_totals(source, dimension, since),
+        'series': get_rollup_series(source, dimension, since, granularity)
+    })
+
 # Database initialization
 def create_tables():
     """Create database tables and initialize data"""
@@ -1457,6 +2559,18 @@ def reset_database():
     init_db()
     print("Database reset complete!")
 
+@app.cli.command('cleanup-old-data')
+@click.option('--batch-size', type=int, default=None, help='Rows deleted per batch')
+@click.option('--pause', type=float, default=None, help='Seconds to wait between batches')
+def cleanup_old_data_command(batch_size, pause):
+    """Delete expired notifications, activity logs and resolved alerts"""
+    def progress(name, deleted, batches):
+        print(f"  {name}: {deleted} rows deleted in {batches} batches")
+
+    for result in cleanup_old_data(batch_size, pause, progress):
+        print(f"{result['name']}: {result['deleted']} rows in {result['batches']} batches, "
+              f"{result['elapsed']:.2f}s ({result['rows_per_second']:.0f} rows/s)")
+
 # CAPTCHA utilities
 def generate_text_captcha():
     """Generate a simple text-based CAPTCHA"""
@@ -1501,80 +2615,6 @@ def generate_text_captcha():
         # Fallback: return text-only CAPTCHA
         return captcha_text, None
 
-def generate_audio_captcha(text):
-    """Generate audio CAPTCHA using gTTS"""
-    try:
-        from gtts import gTTS
-        import tempfile
-        import base64
-        
-        # Add spaces between characters for clarity
-        spaced_text = ' '.join(text)
-        tts = gTTS(text=spaced_text, lang='en', slow=True)
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
-            tts.save(tmp_file.name)
-            
-            # Read and encode as base64
-            with open(tmp_file.name, 'rb') as audio_file:
-                audio_data = base64.b64encode(audio_file.read()).decode()
-            
-            # Clean up
-            os.unlink(tmp_file.name)
-            
-            return f"data:audio/mp3;base64,{audio_data}"
-    except ImportError:
-        print(f"Audio CAPTCHA generation failed: {e}")
-        return None
-
-def verify_recaptcha_v2(response_token):
-    """Verify reCAPTCHA v2 response"""
-    secret_key = os.getenv('RECAPTCHA_SECRET_KEY')
-    if not secret_key:
-        return False
-    
-    verify_url = 'https://www.google.com/recaptcha/api/siteverify'
-    data = {
-        'secret': secret_key,
-        'response': response_token,
-        'remoteip': request.remote_addr
-    }
-    
-    try:
-        response = requests.post(verify_url, data=data, timeout=10)
-        result = response.json()
-        return result.get('success', False)
-    except Exception as e:
-        print(f"reCAPTCHA v2 verification failed: {e}")
-        return False
-
-def verify_recaptcha_v3(response_token):
-    """Verify reCAPTCHA v3 response"""
-    secret_key = os.getenv('RECAPTCHA_V3_SECRET_KEY')
-    if not secret_key:
-        return False
-    
-    verify_url = 'https://www.google.com/recaptcha/api/siteverify'
-    data = {
-        'secret': secret_key,
-        'response': response_token,
-        'remoteip': request.remote_addr
-    }
-    
-    try:
-        response = requests.post(verify_url, data=data, timeout=10)
-        result = response.json()
-        
-        if result.get('success', False):
-            score = result.get('score', 0)
-            min_score = float(os.getenv('RECAPTCHA_V3_MIN_SCORE', 0.5))
-            return score >= min_score
-        return False
-    except Exception as e:
-        print(f"reCAPTCHA v3 verification failed: {e}")
-        return False
-
 # Helper functions
 def log_login_attempt(username, success, captcha_type=None, captcha_success=None):
     """Log login attempt to database"""
@@ -1589,59 +2629,6 @@ def log_login_attempt(username, success, captcha_type=None, captcha_success=None
     db.session.add(attempt)
     db.session.commit()
 
-def create_security_alert(alert_type, message, username=None):
-    """Create a security alert"""
-    alert = SecurityAlert(
-        alert_type=alert_type,
-        message=message,
-        ip_address=request.remote_addr,
-        username=username
-    )
-    db.session.add(alert)
-    db.session.commit()
-    
-    # Send email notification if enabled
-    if os.getenv('ENABLE_EMAIL_ALERTS', 'False').lower() == 'true':
-        send_security_alert_email(alert_type, message, username)
-
-def send_security_alert_email(alert_type, message, username=None):
-    """Send security alert email to admin"""
-    try:
-        admin_email = os.getenv('ADMIN_EMAIL')
-        if admin_email:
-            msg = Message(
-                subject=f'Security Alert: {alert_type}',
-                recipients=[admin_email],
-                body=f"""
-Security Alert Details:
-Type: {alert_type}
-Message: {message}
-Username: {username or 'N/A'}
-IP Address: {request.remote_addr}
-Time: {datetime.utcnow()}
-User Agent: {request.headers.get('User-Agent', 'N/A')}
-                """
-            )
-            mail.send(msg)
-    except Exception as e:
-        print(f"Failed to send security alert email: {e}")
-
-def send_sms_code(phone_number, code):
-    """Send SMS verification code"""
-    if not twilio_client:
-        return False
-    
-    try:
-        message = twilio_client.messages.create(
-            body=f'Your verification code is: {code}',
-            from_=os.getenv('TWILIO_PHONE_NUMBER'),
-            to=phone_number
-        )
-        return True
-    except Exception as e:
-        print(f"SMS sending failed: {e}")
-        return False
-
 def requires_captcha(username):
     """Check if CAPTCHA is required for this user/IP"""
     if not os.getenv('ENABLE_CAPTCHA', 'False').lower() == 'true':
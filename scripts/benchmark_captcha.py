@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Benchmark and load suite for the CAPTCHA subsystem.
+Measures, for utils/captcha_utils.py:
+  - render: challenges per second for text and math, per renderer
+  - payload: image bytes per encoding, and the base64 JSON size they replaced
+  - verify: session answer checks and signed token checks per second
+  - memory: bytes held per issued challenge
+  - load: p50/p99 latency of generate_captcha_challenge under concurrent callers
+  - recaptcha: pooled and concurrent verification against the local stub
+The report is printed as JSON (or written to --output) so runs across
+releases can be compared.
+"""
+
+import sys
+import os
+import time
+import json
+import base64
+import random
+import platform
+import argparse
+import statistics
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path so we can import the captcha utilities
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PIL
+from scripts.stub_siteverify import start_stub_server
+from utils.captcha_utils import (
+    CaptchaGenerator, CaptchaTokenSigner, RecaptchaManager, NUMPY_AVAILABLE, IMAGE_FORMATS,
+    render_captcha_challenge, generate_captcha_challenge, verify_captcha, encode_captcha_image,
+    configure_captcha_pool, set_captcha_renderer, set_captcha_image_format
+)
+
+SECTIONS = ('render', 'payload', 'verify', 'memory', 'load', 'recaptcha')
+CAPTCHA_TYPES = ('text', 'math')
+
+def latency_summary(samples):
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        'requests': len(samples),
+        'mean_ms': statistics.mean(samples) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+def timed(call, *args):
+    started = time.perf_counter()
+    call(*args)
+    return time.perf_counter() - started
+
+def bench_render(args):
+    """Challenges per second for each renderer and type, encoded as PNG"""
+    renderers = ['pil'] + (['numpy'] if NUMPY_AVAILABLE else [])
+    report = {}
+    for renderer in renderers:
+        set_captcha_renderer(renderer)
+        render_captcha_challenge('math')  # font, atlas and warp tables are built once per process
+        report[renderer] = {}
+        for captcha_type in CAPTCHA_TYPES:
+            elapsed = sum(timed(render_captcha_challenge, captcha_type) for _ in range(args.iterations))
+            report[renderer][captcha_type] = {
+                'challenges': args.iterations,
+                'per_second': args.iterations / elapsed,
+                'mean_ms': elapsed / args.iterations * 1000
+            }
+    set_captcha_renderer(args.renderer)
+    return report
+
+def bench_payload(args):
+    """Mean image bytes per encoding, against the base64 data URL in JSON used before"""
+    generator = CaptchaGenerator()
+    images = [generator.render_image(generator.generate_text_captcha()) for _ in range(min(args.iterations, 200))]
+    report = {}
+    for image_format in IMAGE_FORMATS:
+        sizes = []
+        elapsed = 0.0
+        for image in images:
+            started = time.perf_counter()
+            data, mimetype = encode_captcha_image(image, image_format)
+            elapsed += time.perf_counter() - started
+            sizes.append(len(data))
+        report[image_format] = {
+            'mimetype': mimetype,
+            'mean_bytes': statistics.mean(sizes),
+            'encode_ms': elapsed / len(images) * 1000
+        }
+
+    # The data URL in JSON the login page used to receive, for comparison
+    png = statistics.mean(len(encode_captcha_image(image, 'png')[0]) for image in images)
+    report['base64_json_png'] = {'mean_bytes': len('data:image/png;base64,') + 4 * ((png + 2) // 3)}
+    return report
+
+def bench_verify(args):
+    """Response checks per second: session answers and signed tokens"""
+    count = args.iterations * 20
+    answers = [CaptchaGenerator().generate_text_captcha() for _ in range(count)]
+
+    started = time.perf_counter()
+    for answer in answers:
+        verify_captcha(answer.lower(), answer)
+    session = count / (time.perf_counter() - started)
+
+    signer = CaptchaTokenSigner('benchmark', ttl=300)
+    tokens = [signer.issue(answer) for answer in answers]
+    started = time.perf_counter()
+    valid = sum(signer.verify(token, answer) for token, answer in zip(tokens, answers))
+    signed = count / (time.perf_counter() - started)
+    replays = sum(signer.verify(token, answer) for token, answer in zip(tokens, answers))
+
+    return {
+        'checks': count,
+        'session_per_second': session,
+        'signed_token_per_second': signed,
+        'signed_token_valid': valid,
+        'signed_token_replays_accepted': replays
+    }
+
+def bench_memory(args):
+    """Bytes allocated and kept per rendered challenge (as held by the pool or the image store)"""
+    render_captcha_challenge('text')
+    count = min(args.iterations, 200)
+    report = {}
+    for captcha_type in CAPTCHA_TYPES:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        challenges = [render_captcha_challenge(captcha_type) for _ in range(count)]
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report[captcha_type] = {
+            'challenges': count,
+            'bytes_per_challenge': (current - baseline) / count,
+            'image_bytes_per_challenge': statistics.mean(len(c['image_bytes']) for c in challenges),
+            'peak_bytes': peak - baseline
+        }
+    return report
+
+def bench_load(args):
+    """Latency of generate_captcha_challenge with concurrent callers, rendering on demand and from the pool"""
+    def call(captcha_type):
+        return timed(generate_captcha_challenge, captcha_type)
+
+    report = {}
+    for label, pool_size in (('on_demand', 0), ('pool', args.requests)):
+        pool = configure_captcha_pool(pool_size, low_water=max(1, pool_size // 4))
+        if pool:
+            pool.fill()
+        report[label] = {}
+        for concurrency in args.concurrency:
+            types = [random.choice(CAPTCHA_TYPES) for _ in range(args.requests)]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as executor:
+                samples = list(executor.map(call, types))
+            elapsed = time.perf_counter() - started
+            report[label][str(concurrency)] = dict(
+                latency_summary(samples),
+                concurrency=concurrency,
+                per_second=len(samples) / elapsed
+            )
+            if pool:
+                pool.fill()
+    configure_captcha_pool(0)
+    return report
+
+def bench_recaptcha(args):
+    """Verification against the local stub siteverify, sequential and concurrent"""
+    server = start_stub_server(connect_delay=args.connect_ms / 1000, request_delay=args.request_ms / 1000)
+    url = 'http://%s:%d/' % server.server_address
+    concurrency = max(args.concurrency)
+    manager = RecaptchaManager('site', 'benchmark', verify_url=url, pool_size=concurrency, workers=concurrency)
+    try:
+        sequential = [timed(manager.verify_recaptcha_v2, f'seq-{i}') for i in range(args.requests)]
+
+        def verify(token):
+            started = time.perf_counter()
+            manager.result(manager.verify_recaptcha_v2_async(token), timeout=30)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            concurrent = list(executor.map(verify, [f'con-{i}' for i in range(args.requests)]))
+        elapsed = time.perf_counter() - started
+
+        replayed = [timed(manager.verify_recaptcha_v2, f'seq-{i}') for i in range(args.requests)]
+        return {
+            'connect_ms': args.connect_ms,
+            'request_ms': args.request_ms,
+            'sequential': latency_summary(sequential),
+            'concurrent': dict(latency_summary(concurrent), concurrency=concurrency,
+                               per_second=args.requests / elapsed),
+            'replay': latency_summary(replayed),
+            'connections': server.connections,
+            'siteverify_requests': server.requests,
+            'manager': manager.metrics()
+        }
+    finally:
+        manager.close()
+        server.shutdown()
+
+def main():
+    """Run the CAPTCHA benchmark suite"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', nargs='+', choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument('--iterations', type=int, default=300, help='challenges rendered per measurement')
+    parser.add_argument('--requests', type=int, default=400, help='calls per load or reCAPTCHA measurement')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='concurrent callers')
+    parser.add_argument('--renderer', choices=('numpy', 'pil'), default='numpy' if NUMPY_AVAILABLE else 'pil')
+    parser.add_argument('--image-format', choices=tuple(IMAGE_FORMATS), default='png')
+    parser.add_argument('--connect-ms', type=float, default=20.0, help='stub cost per new connection')
+    parser.add_argument('--request-ms', type=float, default=5.0, help='stub cost per verification')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    set_captcha_renderer(args.renderer)
+    set_captcha_image_format(args.image_format)
+    configure_captcha_pool(0)
+
+    benchmarks = {
+        'render': bench_render,
+        'payload': bench_payload,
+        'verify': bench_verify,
+        'memory': bench_memory,
+        'load': bench_load,
+        'recaptcha': bench_recaptcha
+    }
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'environment': {
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'numpy': __import__('numpy').__version__ if NUMPY_AVAILABLE else None,
+            'cpu_count': os.cpu_count(),
+            'renderer': args.renderer,
+            'image_format': args.image_format
+        }
+    }
+    for section in args.sections:
+        started = time.perf_counter()
+        report[section] = benchmarks[section](args)
+        print(f"{section} done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
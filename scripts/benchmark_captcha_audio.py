@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for audio CAPTCHA generation.
+Loads the per-character clip library once, then builds spoken text and math
+challenges with random gaps, pitch jitter and noise, and reports the load
+time, milliseconds per challenge, WAV size and audio length. Everything runs
+in memory; no files are written and no network is used.
+"""
+
+import sys
+import os
+import io
+import time
+import json
+import wave
+import argparse
+import statistics
+
+# Add the parent directory to the path so we can import the generator
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.captcha_utils import (
+    CaptchaGenerator, AUDIO_CAPTCHA_AVAILABLE, get_clip_library, set_captcha_audio_clips
+)
+
+def main():
+    """Run the audio CAPTCHA micro-benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--challenges', type=int, default=500, help='challenges generated per type')
+    parser.add_argument('--clips', default='', help='directory of <char>.wav clips (espeak or tones otherwise)')
+    parser.add_argument('--json', action='store_true', help='emit machine readable JSON')
+    args = parser.parse_args()
+
+    if not AUDIO_CAPTCHA_AVAILABLE:
+        print("Audio CAPTCHAs need NumPy")
+        return 1
+
+    set_captcha_audio_clips(args.clips)
+    started = time.perf_counter()
+    library = get_clip_library()
+    report = {'library': {'load_ms': (time.perf_counter() - started) * 1000, 'sources': library.sources}}
+
+    generator = CaptchaGenerator()
+    challenges = {
+        'text': [generator.generate_text_captcha() for _ in range(args.challenges)],
+        'math': [generator.generate_math_captcha()[0] for _ in range(args.challenges)]
+    }
+
+    for captcha_type, questions in challenges.items():
+        samples = []
+        sizes = []
+        seconds = []
+        for question in questions:
+            started = time.perf_counter()
+            audio = generator.create_audio_captcha(question)
+            samples.append(time.perf_counter() - started)
+            sizes.append(len(audio))
+            with wave.open(io.BytesIO(audio)) as wav:
+                seconds.append(wav.getnframes() / wav.getframerate())
+
+        ordered = sorted(samples)
+        report[captcha_type] = {
+            'challenges': args.challenges,
+            'challenges_per_second': len(samples) / sum(samples),
+            'mean_ms': statistics.mean(samples) * 1000,
+            'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            'mean_bytes': statistics.mean(sizes),
+            'mean_audio_seconds': statistics.mean(seconds)
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        sources = ', '.join(f"{count} {source}" for source, count in library.sources.items() if count)
+        print(f"Clip library loaded in {report['library']['load_ms']:.1f} ms ({sources})")
+        for captcha_type in challenges:
+            stats = report[captcha_type]
+            print(f"{captcha_type:>5} | {stats['challenges_per_second']:8.1f} challenges/s | "
+                  f"mean {stats['mean_ms']:6.2f} ms | p95 {stats['p95_ms']:6.2f} ms | "
+                  f"{stats['mean_bytes'] / 1024:6.1f} KiB WAV, {stats['mean_audio_seconds']:.1f}s of audio")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
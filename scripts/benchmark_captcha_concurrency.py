@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for CAPTCHA rendering.
+Threads generate CAPTCHAs as fast as they can, as concurrent /captcha/generate
+requests would in a threaded worker, while a probe thread repeatedly runs
+the Python part of a login request (form parsing, a CAPTCHA token check and
+an audit record) and times it. Runs with no CAPTCHA load, with rendering in
+the request threads and with rendering in worker processes, and reports
+CAPTCHAs per second and login latency for each.
+"""
+
+import sys
+import os
+import time
+import json
+import argparse
+import threading
+
+# Add the parent directory to the path so we can import the generator
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.captcha_utils import (
+    CaptchaTokenSigner, CaptchaUnavailable, render_captcha_challenge,
+    generate_captcha_challenge, configure_captcha_render_pool, configure_captcha_pool
+)
+
+def login_work(signer):
+    """Stand-in for the Python work of one login request"""
+    form = {'email': 'user@example.com', 'password': 'x' * 12, 'captcha_response': 'AB7KQ'}
+    token = signer.issue(form['captcha_response'])
+    signer.verify(token, form['captcha_response'])
+    record = json.dumps({'email': form['email'], 'event_type': 'login_attempt', 'details': token})
+    return json.loads(record)
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+def run(mode, args):
+    """Generate CAPTCHAs from ``args.threads`` threads while probing login latency"""
+    signer = CaptchaTokenSigner('benchmark')
+    stop = threading.Event()
+    counts = {'generated': 0, 'rejected': 0}
+    lock = threading.Lock()
+
+    if mode == 'threads':
+        render = render_captcha_challenge
+    else:
+        render = generate_captcha_challenge
+
+    def generate():
+        while not stop.is_set():
+            try:
+                render('text')
+                outcome = 'generated'
+            except CaptchaUnavailable:
+                outcome = 'rejected'
+                time.sleep(0.001)
+            with lock:
+                counts[outcome] += 1
+
+    threads = [] if mode == 'idle' else [threading.Thread(target=generate) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+
+    # Logins arrive on a fixed schedule; latency runs from arrival to completion, so it
+    # includes waiting for the GIL after the sleep, as a request waits to be served
+    samples = []
+    interval = args.probe_interval_ms / 1000
+    started = time.perf_counter()
+    arrival = started
+    while arrival - started < args.seconds:
+        time.sleep(max(0.0, arrival - time.perf_counter()))
+        login_work(signer)
+        samples.append(time.perf_counter() - arrival)
+        arrival = max(arrival + interval, time.perf_counter())
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    ordered = sorted(samples)
+    return {
+        'captchas_per_second': counts['generated'] / elapsed,
+        'rejected': counts['rejected'],
+        'logins': len(samples),
+        'login_p50_ms': percentile(ordered, 0.5),
+        'login_p99_ms': percentile(ordered, 0.99),
+        'login_max_ms': ordered[-1] * 1000
+    }
+
+def main():
+    """Run the concurrency benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=5.0, help='duration of each mode')
+    parser.add_argument('--threads', type=int, default=8, help='threads generating CAPTCHAs')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1), help='render processes')
+    parser.add_argument('--queue', type=int, default=32, help='renders queued or running at once')
+    parser.add_argument('--probe-interval-ms', type=float, default=5.0, help='time between login arrivals')
+    parser.add_argument('--json', action='store_true', help='emit machine readable JSON')
+    args = parser.parse_args()
+
+    # Measure rendering itself, not the pre-rendered pool
+    configure_captcha_pool(0)
+    report = {'threads': args.threads, 'workers': args.workers}
+    report['idle'] = run('idle', args)
+    report['threads_render'] = run('threads', args)
+
+    render_pool = configure_captcha_render_pool(args.workers, args.queue, timeout=2.0, overflow='reject')
+    generate_captcha_challenge('text')  # start the worker processes outside the timed run
+    report['process_render'] = run('processes', args)
+    report['process_render']['render'] = render_pool.metrics()
+    render_pool.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for label in ('idle', 'threads_render', 'process_render'):
+            stats = report[label]
+            print(f"{label:>14} | {stats['captchas_per_second']:7.1f} CAPTCHAs/s ({stats['rejected']} rejected) | "
+                  f"login p50 {stats['login_p50_ms']:6.2f} ms | p99 {stats['login_p99_ms']:6.2f} ms | "
+                  f"max {stats['login_max_ms']:6.2f} ms")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
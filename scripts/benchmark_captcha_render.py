@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for CAPTCHA image rendering.
+Renders the same challenges with the previous per-image approach (probe the
+font paths, load the font, draw and rotate a fresh RGBA image per character)
+and with CaptchaGenerator.create_image_captcha using cached glyph sprites,
+through both the PIL renderer and the NumPy renderer, and reports images per
+second for each.
+"""
+
+import sys
+import os
+import time
+import json
+import random
+import argparse
+from io import BytesIO
+from PIL import Image, ImageDraw, ImageFont
+
+# Add the parent directory to the path so we can import the generator
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.captcha_utils import CaptchaGenerator, FONT_PATHS, NUMPY_AVAILABLE
+
+def render_uncached(generator, text):
+    """The rendering steps as they were before the font cache and glyph atlas"""
+    image = Image.new('RGB', (generator.width, generator.height), color='white')
+    draw = ImageDraw.Draw(image)
+
+    for _ in range(generator.noise_level):
+        x = random.randint(0, generator.width)
+        y = random.randint(0, generator.height)
+        draw.point((x, y), fill=(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)))
+
+    for _ in range(5):
+        start = (random.randint(0, generator.width), random.randint(0, generator.height))
+        end = (random.randint(0, generator.width), random.randint(0, generator.height))
+        draw.line([start, end], fill=(random.randint(100, 200), random.randint(100, 200), random.randint(100, 200)), width=1)
+
+    font = None
+    for font_path in FONT_PATHS:
+        if os.path.exists(font_path):
+            font = ImageFont.truetype(font_path, generator.font_size)
+            break
+    if font is None:
+        font = ImageFont.load_default()
+
+    bbox = draw.textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    x = (generator.width - text_width) // 2
+    y = (generator.height - text_height) // 2
+
+    for i, char in enumerate(text):
+        char_x = x + i * (text_width // len(text))
+        char_y = y + random.randint(-5, 5)
+        color = (random.randint(0, 100), random.randint(0, 100), random.randint(0, 100))
+        char_img = Image.new('RGBA', (50, 50), (255, 255, 255, 0))
+        char_draw = ImageDraw.Draw(char_img)
+        char_draw.text((10, 10), char, font=font, fill=color)
+        rotated = char_img.rotate(random.randint(-15, 15), expand=1)
+        image.paste(rotated, (char_x, char_y), rotated)
+
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def images_per_second(render, challenges):
+    started = time.perf_counter()
+    for text in challenges:
+        render(text)
+    return len(challenges) / (time.perf_counter() - started)
+
+def main():
+    """Run the rendering micro-benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=500, help='images rendered per mode and type')
+    parser.add_argument('--json', action='store_true', help='emit machine readable JSON')
+    args = parser.parse_args()
+
+    generator = CaptchaGenerator('pil')
+    renderers = {'pil': generator}
+    if NUMPY_AVAILABLE:
+        renderers['numpy'] = CaptchaGenerator('numpy')
+    challenges = {
+        'text': [generator.generate_text_captcha() for _ in range(args.images)],
+        'math': [generator.generate_math_captcha()[0] for _ in range(args.images)]
+    }
+
+    # Build the font cache and atlas outside the timed loop, as a running server would have
+    for renderer in renderers.values():
+        renderer.create_image_captcha(challenges['math'][0])
+
+    report = {}
+    for captcha_type, texts in challenges.items():
+        before = images_per_second(lambda text: render_uncached(generator, text), texts)
+        stats = {'images': args.images, 'before_images_per_second': before}
+        for name, renderer in renderers.items():
+            after = images_per_second(renderer.create_image_captcha, texts)
+            stats[f'{name}_images_per_second'] = after
+            stats[f'{name}_speedup'] = after / before
+        report[captcha_type] = stats
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for captcha_type, stats in report.items():
+            line = f"{captcha_type:>5} | before {stats['before_images_per_second']:8.1f} img/s"
+            for name in renderers:
+                line += f" | {name} {stats[f'{name}_images_per_second']:8.1f} img/s ({stats[f'{name}_speedup']:.2f}x)"
+            print(line)
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark for password hashing configurations.
+For each scheme and cost (pbkdf2, scrypt, and argon2 when argon2-cffi is
+installed), checks passwords from concurrent threads, as logins arriving at
+a threaded worker would, with hashing in the request thread, in a thread
+pool and in a process pool, and reports logins per second and check latency.
+"""
+
+import sys
+import os
+import time
+import json
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path so we can import the hasher
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.password_utils import PasswordHasher, ARGON2_AVAILABLE
+
+CONFIGURATIONS = {
+    'pbkdf2-600k': {'scheme': 'pbkdf2', 'pbkdf2_iterations': 600000},
+    'pbkdf2-210k': {'scheme': 'pbkdf2', 'pbkdf2_iterations': 210000},
+    'scrypt-n32768': {'scheme': 'scrypt', 'scrypt_n': 32768},
+    'scrypt-n16384': {'scheme': 'scrypt', 'scrypt_n': 16384},
+    'argon2-m64M-t3': {'scheme': 'argon2', 'argon2_memory_cost': 65536, 'argon2_time_cost': 3},
+    'argon2-m19M-t2': {'scheme': 'argon2', 'argon2_memory_cost': 19456, 'argon2_time_cost': 2,
+                       'argon2_parallelism': 1}
+}
+
+def run(options, offload, args):
+    hasher = PasswordHasher(offload=offload, workers=args.workers, **options)
+    password_hash = hasher.hash('Correct-Horse-1')
+    hasher.check(password_hash, 'Correct-Horse-1')  # start pool workers outside the timed run
+
+    def login(_):
+        started = time.perf_counter()
+        hasher.check(password_hash, 'Correct-Horse-1')
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        samples = sorted(executor.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - started
+    hasher.close()
+
+    return {
+        'logins': args.logins,
+        'logins_per_second': args.logins / elapsed,
+        'mean_ms': statistics.mean(samples) * 1000,
+        'p50_ms': samples[len(samples) // 2] * 1000,
+        'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    }
+
+def main():
+    """Run the password hashing benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=40, help='password checks per configuration and mode')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent logins')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='thread or process pool size')
+    parser.add_argument('--offload', nargs='+', choices=('none', 'thread', 'process'),
+                        default=['none', 'thread', 'process'])
+    parser.add_argument('--configurations', nargs='+', choices=tuple(CONFIGURATIONS), default=list(CONFIGURATIONS))
+    parser.add_argument('--json', action='store_true', help='emit machine readable JSON')
+    args = parser.parse_args()
+
+    report = {'concurrency': args.concurrency, 'workers': args.workers, 'results': {}}
+    for name in args.configurations:
+        options = CONFIGURATIONS[name]
+        if options['scheme'] == 'argon2' and not ARGON2_AVAILABLE:
+            continue
+        report['results'][name] = {offload: run(options, offload, args) for offload in args.offload}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        if not ARGON2_AVAILABLE:
+            print("argon2-cffi is not installed; skipping argon2")
+        for name, modes in report['results'].items():
+            for offload, stats in modes.items():
+                print(f"{name:>15} | {offload:>7} | {stats['logins_per_second']:7.1f} logins/s | "
+                      f"mean {stats['mean_ms']:7.1f} ms | p99 {stats['p99_ms']:7.1f} ms")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for reCAPTCHA verification.
+Verifies tokens against a local stub siteverify server three ways: the old
+way (a new connection per requests.post), through RecaptchaManager's pooled
+keep-alive session, and concurrently through its async API. Finally it
+replays every token to show replays are rejected without a round trip.
+"""
+
+import sys
+import os
+import time
+import json
+import argparse
+import statistics
+import requests
+
+# Add the parent directory to the path so we can import the stub and the manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.stub_siteverify import start_stub_server
+from utils.captcha_utils import RecaptchaManager
+
+def summarize(samples):
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        'requests': len(samples),
+        'mean_ms': statistics.mean(samples) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+    }
+
+def time_calls(call, tokens):
+    samples = []
+    for token in tokens:
+        started = time.perf_counter()
+        call(token)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def main():
+    """Run the reCAPTCHA benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200, help='verifications per mode')
+    parser.add_argument('--connect-ms', type=float, default=20.0,
+                        help='simulated TCP/TLS setup cost per new connection')
+    parser.add_argument('--request-ms', type=float, default=5.0, help='simulated siteverify processing time')
+    parser.add_argument('--concurrency', type=int, default=8, help='in-flight verifications for the async mode')
+    parser.add_argument('--json', action='store_true', help='emit machine readable JSON')
+    args = parser.parse_args()
+
+    server = start_stub_server(connect_delay=args.connect_ms / 1000, request_delay=args.request_ms / 1000)
+    url = 'http://%s:%d/' % server.server_address
+    report = {'connect_ms': args.connect_ms, 'request_ms': args.request_ms}
+
+    # Old behaviour: requests.post opens (and closes) a connection every time
+    fresh = time_calls(
+        lambda token: requests.post(url, data={'secret': 's', 'response': token}, timeout=10).json(),
+        [f'fresh-{i}' for i in range(args.requests)]
+    )
+    report['fresh_connection'] = dict(summarize(fresh), connections=server.connections)
+
+    manager = RecaptchaManager('site', 's', verify_url=url, pool_size=args.concurrency, workers=args.concurrency)
+    connections = server.connections
+    pooled_tokens = [f'pooled-{i}' for i in range(args.requests)]
+    pooled = time_calls(manager.verify_recaptcha_v2, pooled_tokens)
+    report['pooled'] = dict(summarize(pooled), connections=server.connections - connections)
+
+    connections = server.connections
+    started = time.perf_counter()
+    futures = [manager.verify_recaptcha_v2_async(f'async-{i}') for i in range(args.requests)]
+    results = [manager.result(future, timeout=30) for future in futures]
+    elapsed = time.perf_counter() - started
+    report['async'] = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'wall_ms': elapsed * 1000,
+        'per_request_ms': elapsed / args.requests * 1000,
+        'valid': sum(1 for result in results if result['success']),
+        'connections': server.connections - connections
+    }
+
+    calls = server.requests
+    replay = time_calls(manager.verify_recaptcha_v2, pooled_tokens)
+    report['replay'] = dict(summarize(replay), siteverify_requests=server.requests - calls)
+    report['manager'] = manager.metrics()
+    report['speedup'] = report['fresh_connection']['mean_ms'] / report['pooled']['mean_ms']
+
+    manager.close()
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for label in ('fresh_connection', 'pooled', 'replay'):
+            stats = report[label]
+            print(f"{label:>16} | mean {stats['mean_ms']:7.2f} ms | p50 {stats['p50_ms']:7.2f} ms | "
+                  f"p95 {stats['p95_ms']:7.2f} ms")
+        print(f"{'async':>16} | {report['async']['per_request_ms']:7.2f} ms per verification "
+              f"with {args.concurrency} in flight")
+        print(f"\nPooled verification is {report['speedup']:.1f}x faster "
+              f"({report['pooled']['connections']} connections for {args.requests} requests, "
+              f"vs {report['fresh_connection']['connections']})")
+        print(f"Replayed tokens rejected locally: {report['manager']['replays_rejected']} "
+              f"({report['replay']['siteverify_requests']} siteverify requests)")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for auth log retention.
+Compares the per-event cost of the old inline COUNT(*) cap check against the
+current write path (insert only, trimming done by the retention job) as the
+auth_logs table grows, then times one out-of-band trim.
+"""
+
+import sys
+import os
+import time
+import json
+import argparse
+import tempfile
+from datetime import datetime
+
+# Run against a throwaway SQLite database, never the real one
+BENCH_DIR = tempfile.mkdtemp(prefix='flask_2fa_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'retention_bench.db')}"
+
+# Add the parent directory to the path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, AuthLog, log_auth_event, retention_manager
+from sqlalchemy import text
+
+SEED_CHUNK = 20000
+
+def seed_rows(target):
+    """Grow auth_logs to ``target`` rows using bulk inserts"""
+    current = db.session.execute(text("SELECT COUNT(*) FROM auth_logs")).scalar()
+    now = datetime.utcnow()
+    while current < target:
+        chunk = min(SEED_CHUNK, target - current)
+        rows = [{
+            'email': f'bench{(current + i) % 500}@example.com',
+            'event_type': 'login_attempt',
+            'details': 'seed',
+            'ip_address': '10.0.0.1',
+            'user_agent': 'bench',
+            'delivery_method': 'email',
+            'timestamp': now,
+            'risk_level': 'low'
+        } for i in range(chunk)]
+        db.session.execute(AuthLog.__table__.insert(), rows)
+        db.session.commit()
+        current += chunk
+    return current
+
+def time_legacy_event(events):
+    """Old behaviour: insert, commit, then COUNT(*) the whole table"""
+    started = time.perf_counter()
+    for _ in range(events):
+        db.session.add(AuthLog(email='legacy@example.com', event_type='login_attempt', details='legacy'))
+        db.session.commit()
+        AuthLog.query.count()
+    return (time.perf_counter() - started) / events
+
+def time_current_event(events):
+    """Current behaviour: log_auth_event with no inline cap enforcement"""
+    started = time.perf_counter()
+    with app.test_request_context('/login', method='POST'):
+        for _ in range(events):
+            log_auth_event('current@example.com', 'logout', 'bench', '10.0.0.2', 'bench', delivery_method='email')
+    return (time.perf_counter() - started) / events
+
+def main():
+    """Run the retention benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='comma separated table sizes to measure at')
+    parser.add_argument('--events', type=int, default=200, help='events timed per size')
+    parser.add_argument('--json', action='store_true', help='emit machine readable JSON')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = []
+
+    with app.app_context():
+        db.create_all()
+
+        # Let the table grow while we measure; the policy is re-enabled for the trim
+        policy = retention_manager.policies['auth_logs']
+        max_rows = policy.max_rows
+        policy.max_rows = None
+
+        for size in sizes:
+            rows = seed_rows(size)
+            legacy = time_legacy_event(args.events)
+            current = time_current_event(args.events)
+            results.append({
+                'rows': rows,
+                'legacy_ms_per_event': legacy * 1000,
+                'current_ms_per_event': current * 1000
+            })
+            if not args.json:
+                print(f"{rows:>10} rows | legacy {legacy * 1000:8.3f} ms/event | current {current * 1000:8.3f} ms/event")
+
+        policy.max_rows = max_rows or 10000
+        policy.max_batches = 0
+        trim = retention_manager.enforce('auth_logs')
+
+    report = {'per_event': results, 'trim': trim}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"\nTrim to {policy.max_rows} rows: deleted {trim['deleted']} rows in {trim['batches']} batches, "
+              f"{trim['elapsed']:.2f}s ({trim['rows_per_second']:.0f} rows/s)")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark for OTP email delivery.
+Sends the same OTP message through a local stub SMTP server twice: once the
+old way (connect, authenticate, send and quit for every message) and once
+through the pooled sessions used by send_otp_email, and reports per-message
+latency for both.
+"""
+
+import sys
+import os
+import time
+import json
+import smtplib
+import argparse
+import statistics
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+# Add the parent directory to the path so we can import the stub and the pool
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.stub_smtp import start_stub_server
+from utils.smtp_utils import SMTPConnectionPool
+
+SENDER = 'bench@example.com'
+PASSWORD = 'bench-password'
+
+def build_message(recipient):
+    """An OTP email the same size as the real one"""
+    msg = MIMEMultipart()
+    msg['From'] = SENDER
+    msg['To'] = recipient
+    msg['Subject'] = "Your 2FA Verification Code"
+    msg.attach(MIMEText("<html><body><div>123456</div></body></html>" * 20, 'html'))
+    return msg.as_string()
+
+def send_fresh(host, port, recipient, message):
+    """Old behaviour: a new authenticated session per message"""
+    server = smtplib.SMTP(host, port, timeout=10)
+    server.login(SENDER, PASSWORD)
+    server.sendmail(SENDER, [recipient], message)
+    server.quit()
+
+def summarize(samples):
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        'messages': len(samples),
+        'mean_ms': statistics.mean(samples) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+def time_sends(send, messages):
+    samples = []
+    for i in range(messages):
+        recipient = f'user{i}@example.com'
+        message = build_message(recipient)
+        started = time.perf_counter()
+        send(recipient, message)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def main():
+    """Run the SMTP benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=200, help='messages sent per mode')
+    parser.add_argument('--handshake-ms', type=float, default=20.0,
+                        help='simulated delay for the greeting and for AUTH')
+    parser.add_argument('--json', action='store_true', help='emit machine readable JSON')
+    args = parser.parse_args()
+
+    server = start_stub_server(handshake_delay=args.handshake_ms / 1000)
+    host, port = server.server_address
+
+    fresh = time_sends(lambda recipient, message: send_fresh(host, port, recipient, message), args.messages)
+
+    pool = SMTPConnectionPool(host, port, SENDER, PASSWORD, use_tls=False, max_size=1)
+    pooled = time_sends(lambda recipient, message: pool.send(SENDER, [recipient], message), args.messages)
+    pool.close()
+    server.shutdown()
+
+    report = {
+        'handshake_ms': args.handshake_ms,
+        'fresh_connection': summarize(fresh),
+        'pooled': summarize(pooled),
+        'pool': pool.metrics(),
+        'received': server.messages
+    }
+    report['speedup'] = report['fresh_connection']['mean_ms'] / report['pooled']['mean_ms']
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for label in ('fresh_connection', 'pooled'):
+            stats = report[label]
+            print(f"{label:>16} | mean {stats['mean_ms']:7.2f} ms | p50 {stats['p50_ms']:7.2f} ms | "
+                  f"p95 {stats['p95_ms']:7.2f} ms | max {stats['max_ms']:7.2f} ms")
+        print(f"\nPooled sessions are {report['speedup']:.1f}x faster per message "
+              f"({report['pool']['connects']} connects for {args.messages} messages)")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -6,12 +6,12 @@ This script handles database schema migrations and data updates.
 
 import sys
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Add the parent directory to the path so we can import the app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app, db, User, AuthLog
+from app import app, db, User, AuthLog, retention_manager, rebuild_event_rollups, log_partitions, PARTITIONED_TABLES
 from sqlalchemy import text
 
 def backup_database():
@@ -71,19 +71,76 @@ def migrate_to_v2():
         print(f"❌ Migration to v2 failed: {e}")
         return False
 
+def migrate_known_ips():
+    """Create the known_ips index and backfill it from successful logins"""
+    print("🔄 Building known login IP index...")
+    
+    try:
+        db.create_all()
+        
+        existing = db.session.execute(text("SELECT COUNT(*) FROM known_ips")).scalar()
+        if existing:
+            print(f"✓ Known IP index already populated ({existing} entries)")
+            return True
+        
+        result = db.session.execute(text(
+            "INSERT INTO known_ips (email, ip_address, first_seen) "
+            "SELECT email, ip_address, MIN(timestamp) FROM auth_logs "
+            "WHERE event_type = 'login_success' AND ip_address IS NOT NULL "
+            "GROUP BY email, ip_address"
+        ))
+        db.session.commit()
+        print(f"✓ Backfilled {result.rowcount} known login IPs")
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Known IP backfill failed: {e}")
+        return False
+
+def migrate_event_rollups():
+    """Create the event rollup table and backfill the last 30 days of counters"""
+    print("🔄 Rebuilding dashboard rollups...")
+    
+    try:
+        db.create_all()
+        rebuild_event_rollups(datetime.utcnow() - timedelta(days=30))
+        print("✓ Event rollups rebuilt for the last 30 days")
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Event rollup rebuild failed: {e}")
+        return False
+
+def migrate_log_partitions():
+    """Convert the log tables to time partitions when LOG_PARTITIONING is enabled"""
+    if not log_partitions:
+        print("✓ Log partitioning disabled, nothing to do")
+        return True
+    
+    print("🔄 Setting up log partitions...")
+    
+    try:
+        for table in PARTITIONED_TABLES:
+            if log_partitions.ensure_partitioned(table):
+                print(f"✓ Converted {table} to partitioned storage")
+        
+        result = log_partitions.maintain()
+        print(f"✓ Log partitions ready ({len(result['created'])} created, {len(result['dropped'])} dropped)")
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Log partitioning failed: {e}")
+        return False
+
 def cleanup_old_logs():
-    """Clean up old authentication logs (keep last 10000 entries)"""
+    """Clean up old logs according to the configured retention policies"""
     try:
-        total_logs = AuthLog.query.count()
-        if total_logs > 10000:
-            # Delete oldest logs
-            old_logs = AuthLog.query.order_by(AuthLog.timestamp.asc()).limit(total_logs - 10000).all()
-            for log in old_logs:
-                db.session.delete(log)
-            db.session.commit()
-            print(f"✓ Cleaned up {len(old_logs)} old log entries")
-        else:
-            print(f"✓ Log cleanup not needed ({total_logs} entries)")
+        results = retention_manager.enforce_all()
+        for result in results:
+            if result['deleted']:
+                print(f"✓ Cleaned up {result['deleted']} old rows from {result['name']} in {result['batches']} batches")
+            else:
+                print(f"✓ Cleanup not needed for {result['name']}")
         return True
     except Exception as e:
         print(f"❌ Log cleanup failed: {e}")
@@ -157,6 +214,15 @@ def main():
                 print("❌ Migration failed")
                 return 1
             
+            if not migrate_known_ips():
+                print("⚠️  Known IP backfill had issues but continuing...")
+            
+            if not migrate_event_rollups():
+                print("⚠️  Rollup rebuild had issues but continuing...")
+            
+            if not migrate_log_partitions():
+                print("⚠️  Log partitioning had issues but continuing...")
+            
             # Clean up old logs
             print("\n🧹 Cleaning up old data...")
             if not cleanup_old_logs():
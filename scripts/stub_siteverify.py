@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Minimal local reCAPTCHA siteverify endpoint for development and benchmarks.
+Accepts any token except ones starting with "bad", answers a repeated token
+with timeout-or-duplicate like Google does, and can add an artificial delay
+to each new connection (standing in for TCP and TLS setup) and to each
+request. Point the app at it with RECAPTCHA_VERIFY_URL=http://127.0.0.1:8081/.
+"""
+
+import time
+import json
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StubSiteverifyHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler, one instance per connection"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; Nagle would hold the body back on reused connections
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.connect_delay)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        token = form.get('response', [''])[0]
+        time.sleep(server.request_delay)
+
+        with server.lock:
+            server.requests += 1
+            duplicate = token in server.tokens
+            server.tokens.add(token)
+
+        if not token:
+            result = {'success': False, 'error-codes': ['missing-input-response']}
+        elif duplicate:
+            result = {'success': False, 'error-codes': ['timeout-or-duplicate']}
+        elif token.startswith('bad'):
+            result = {'success': False, 'error-codes': ['invalid-input-response']}
+        else:
+            result = {
+                'success': True,
+                'challenge_ts': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'hostname': 'localhost',
+                'score': server.score,
+                'action': form.get('action', ['login'])[0]
+            }
+
+        body = json.dumps(result).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (a deadline test); nothing to report
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubSiteverifyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, connect_delay=0.0, request_delay=0.0, score=0.9):
+        super().__init__(address, StubSiteverifyHandler)
+        self.connect_delay = connect_delay
+        self.request_delay = request_delay
+        self.score = score
+        self.connections = 0
+        self.requests = 0
+        self.tokens = set()
+        self.lock = threading.Lock()
+
+
+def start_stub_server(host='127.0.0.1', port=0, connect_delay=0.0, request_delay=0.0):
+    """Start the stub in a background thread; returns the server (``server.server_address`` has the port)"""
+    server = StubSiteverifyServer((host, port), connect_delay, request_delay)
+    threading.Thread(target=server.serve_forever, name='stub-siteverify', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--connect-ms', type=float, default=0.0, help='delay added to each new connection')
+    parser.add_argument('--request-ms', type=float, default=0.0, help='delay added to each verification')
+    args = parser.parse_args()
+
+    server = StubSiteverifyServer((args.host, args.port), args.connect_ms / 1000, args.request_ms / 1000)
+    print(f"Stub siteverify listening on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nServed {server.requests} verifications over {server.connections} connections")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Minimal local SMTP server for development and benchmarks.
+Accepts any login and any message, keeps a count of what it received, and can
+add an artificial delay to the greeting and AUTH to stand in for the TCP, TLS
+and authentication round trips of a real provider. STARTTLS is not offered,
+so point the app at it with OTP_SMTP_USE_TLS=False / MAIL_USE_TLS=False.
+"""
+
+import time
+import argparse
+import threading
+import socketserver
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """One SMTP session"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def handle(self):
+        server = self.server
+        time.sleep(server.handshake_delay)
+        self.reply('220 stub-smtp ESMTP ready')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb in ('EHLO', 'HELO'):
+                self.wfile.write(b'250-stub-smtp\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n')
+                self.wfile.flush()
+            elif verb == 'AUTH':
+                # smtplib sends AUTH PLAIN with the credentials inline; any login is accepted
+                time.sleep(server.handshake_delay)
+                self.reply('235 Authentication successful')
+            elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                with server.lock:
+                    server.messages += 1
+                self.reply('250 OK queued')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, handshake_delay=0.0):
+        super().__init__(address, StubSMTPHandler)
+        self.handshake_delay = handshake_delay
+        self.messages = 0
+        self.lock = threading.Lock()
+
+
+def start_stub_server(host='127.0.0.1', port=0, handshake_delay=0.0):
+    """Start the stub in a background thread; returns the server (``server.server_address`` has the port)"""
+    server = StubSMTPServer((host, port), handshake_delay)
+    threading.Thread(target=server.serve_forever, name='stub-smtp', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1025)
+    parser.add_argument('--handshake-ms', type=float, default=0.0,
+                        help='delay added to the greeting and to AUTH')
+    args = parser.parse_args()
+
+    server = StubSMTPServer((args.host, args.port), args.handshake_ms / 1000)
+    print(f"Stub SMTP server listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nReceived {server.messages} messages")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
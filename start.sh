@@ -1,3 +1,3 @@
 #!/bin/bash
 # This is the start command for Render
-gunicorn --bind 0.0.0.0:$PORT --workers 1 --timeout 120 app:app
+gunicorn --bind 0.0.0.0:$PORT --workers 1 --worker-class gthread --threads 8 --timeout 120 app:app
@@ -0,0 +1,131 @@
+import time
+import threading
+
+
+class AuditWriter:
+    """In-process queue for audit log records.
+
+    Records are handed to ``sink(records)`` as a list of ``(table, row)``
+    tuples so the sink can write each table with a single bulk insert.
+
+    Modes:
+        sync     - every record is written immediately (useful for tests)
+        buffered - records are flushed by a background thread once
+                   ``flush_size`` records are pending or ``flush_interval``
+                   seconds have passed, and on ``close()``
+
+    In buffered mode a batch whose write fails goes back to the front of
+    the queue and is retried with the next flush; after ``max_retries``
+    failures in a row the pending records are counted as failed and dropped.
+    """
+
+    def __init__(self, sink, mode='buffered', flush_size=100, flush_interval=1.0, max_pending=10000, max_retries=3):
+        self.sink = sink
+        self.mode = mode
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+
+        self._pending = []
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            'submitted': 0,
+            'written': 0,
+            'flushes': 0,
+            'failed': 0,
+            'retried': 0,
+            'last_flush_ms': 0.0
+        }
+
+    @property
+    def synchronous(self):
+        return self.mode == 'sync'
+
+    def submit(self, table, row):
+        """Queue one record for ``table``"""
+        if self.synchronous:
+            self.stats['submitted'] += 1
+            self._write([(table, row)])
+            return
+
+        with self._lock:
+            self._pending.append((table, row))
+            self.stats['submitted'] += 1
+            pending = len(self._pending)
+
+        self._ensure_thread()
+
+        if pending >= self.max_pending:
+            # The writer thread is falling behind; apply back-pressure to the caller
+            self.flush()
+        elif pending >= self.flush_size:
+            self._wake.set()
+
+    def pending(self):
+        """Number of records waiting to be written"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write every pending record now"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+
+            if batch:
+                self._write(batch)
+            return len(batch)
+
+    def close(self):
+        """Stop the background thread and flush what is left"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=max(self.flush_interval * 2, 1.0))
+        self.flush()
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            self.sink(batch)
+            self.stats['written'] += len(batch)
+            self._failures = 0
+        except Exception as e:
+            print(f"Error writing {len(batch)} audit records: {e}")
+            self._failures += 1
+            if self.synchronous or self._failures > self.max_retries:
+                self.stats['failed'] += len(batch)
+                self._failures = 0
+            else:
+                # Keep the records, ahead of anything queued since, for the next flush
+                with self._lock:
+                    self._pending[:0] = batch
+                self.stats['retried'] += len(batch)
+        finally:
+            self.stats['flushes'] += 1
+            self.stats['last_flush_ms'] = (time.perf_counter() - started) * 1000
+
+    def _ensure_thread(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        with self._lock:
+            # Re-check under the lock; also covers threads lost across a fork
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
@@ -0,0 +1,234 @@
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} circuit is open; retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(Exception):
+    """The current request has no time left for another outbound call"""
+
+    # One request running out of time says nothing about the dependency
+    retryable = False
+
+
+class Deadline:
+    """An absolute point in time a request must finish by"""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+
+def start_deadline(seconds):
+    """Give the current request a time budget; returns a token for ``end_deadline``"""
+    return _deadline.set(Deadline(seconds))
+
+
+def end_deadline(token):
+    _deadline.reset(token)
+
+
+def current_deadline():
+    return _deadline.get()
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """Run a block under a time budget"""
+    token = start_deadline(seconds)
+    try:
+        yield _deadline.get()
+    finally:
+        end_deadline(token)
+
+
+def budget_timeout(default):
+    """Timeout for the next outbound call: ``default`` capped by the request budget"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded('request deadline exceeded')
+    return min(default, remaining)
+
+
+class CircuitBreaker:
+    """Error-rate and latency circuit breaker for one outbound dependency.
+
+    Outcomes of the last ``window`` seconds are kept. Once at least
+    ``min_calls`` were made, the breaker opens if the share of failures
+    reaches ``failure_rate`` or the share of calls slower than
+    ``slow_call_seconds`` reaches ``slow_call_rate``. An open breaker fails
+    calls immediately for ``open_seconds``, then lets ``half_open_calls``
+    probes through: if they succeed it closes, otherwise it opens again.
+
+    Exceptions listed in ``ignore`` or carrying ``retryable = False`` (the
+    dependency answered, the request was bad) do not count as failures.
+    Calls made after the current request deadline has passed raise
+    ``DeadlineExceeded`` without reaching the dependency.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, window=60.0, min_calls=10, failure_rate=0.5, slow_call_seconds=3.0,
+                 slow_call_rate=0.8, open_seconds=30.0, half_open_calls=1, ignore=()):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.ignore = tuple(ignore)
+
+        self.state = self.CLOSED
+        self._calls = deque()
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'calls': 0,
+            'failures': 0,
+            'slow_calls': 0,
+            'rejected': 0,
+            'opened': 0
+        }
+
+    def call(self, function, *args, **kwargs):
+        """Call ``function`` through the breaker"""
+        deadline = _deadline.get()
+        if deadline is not None and deadline.remaining() <= 0:
+            raise DeadlineExceeded(f"request deadline exceeded before calling {self.name}")
+
+        self._before_call()
+        started = time.monotonic()
+        try:
+            result = function(*args, **kwargs)
+        except Exception as e:
+            failed = not isinstance(e, self.ignore) and getattr(e, 'retryable', True)
+            self._record(time.monotonic() - started, failed=failed)
+            raise
+        self._record(time.monotonic() - started, failed=False)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._close()
+
+    def metrics(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            calls = len(self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slow = sum(1 for _, _, slow in self._calls if slow)
+            retry_in = self._opened_at + self.open_seconds - time.monotonic() if self.state == self.OPEN else 0
+            return dict(
+                self.stats,
+                name=self.name,
+                state=self.state,
+                window_calls=calls,
+                window_failure_rate=failures / calls if calls else 0.0,
+                window_slow_rate=slow / calls if calls else 0.0,
+                retry_in=max(0.0, retry_in)
+            )
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                retry_in = self._opened_at + self.open_seconds - time.monotonic()
+                if retry_in > 0:
+                    self.stats['rejected'] += 1
+                    raise CircuitOpenError(self.name, retry_in)
+                self.state = self.HALF_OPEN
+                self._probes = 0
+
+            if self.state == self.HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.stats['rejected'] += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._probes += 1
+
+    def _record(self, duration, failed):
+        now = time.monotonic()
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['failures'] += failed
+            self.stats['slow_calls'] += slow
+
+            if self.state == self.HALF_OPEN:
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._probes -= 1
+                    if self._probes <= 0:
+                        self._close()
+                return
+
+            self._calls.append((now, failed, slow))
+            self._prune(now)
+            calls = len(self._calls)
+            if self.state == self.CLOSED and calls >= self.min_calls:
+                failures = sum(1 for _, failed, _ in self._calls if failed)
+                slow_calls = sum(1 for _, _, slow in self._calls if slow)
+                if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                    self._open(now)
+
+    def _open(self, now):
+        if self.state != self.OPEN:
+            print(f"Circuit breaker '{self.name}' opened")
+        self.state = self.OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self.stats['opened'] += 1
+
+    def _close(self):
+        if self.state != self.CLOSED:
+            print(f"Circuit breaker '{self.name}' closed")
+        self.state = self.CLOSED
+        self._calls.clear()
+        self._probes = 0
+
+    def _prune(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, **options):
+    """Shared breaker for a dependency; options only apply when it is first created"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **options)
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_metrics():
+    """Metrics for every shared breaker"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.metrics() for breaker in breakers]
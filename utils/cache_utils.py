@@ -0,0 +1,183 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUSet:
+    """Bounded set that forgets the least recently used members first"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, item):
+        with self._lock:
+            if item in self._items:
+                self._items.move_to_end(item)
+                return True
+            return False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def add(self, item):
+        """Add ``item``, evicting the oldest member if the set is full"""
+        with self._lock:
+            self._items[item] = None
+            self._items.move_to_end(item)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, item):
+        """Remove ``item`` if present"""
+        with self._lock:
+            self._items.pop(item, None)
+
+    def clear(self):
+        """Forget every member"""
+        with self._lock:
+            self._items.clear()
+
+
+class GenerationCache:
+    """Cache for computed aggregates, invalidated by per-source generation counters.
+
+    Writers call ``bump(source)`` after changing a source table. A cached
+    value is served while none of its sources has moved on; once one has,
+    the value may still be served for up to ``max_staleness`` seconds after
+    it was computed. Nothing is served past ``max_age`` seconds, which
+    covers changes that do not bump a generation (and time-window drift).
+    """
+
+    def __init__(self, max_staleness=5.0, max_age=300.0):
+        self.max_staleness = max_staleness
+        self.max_age = max_age
+
+        self._generations = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'stale_hits': 0, 'misses': 0}
+
+    def bump(self, *sources):
+        """Mark data from ``sources`` as changed"""
+        with self._lock:
+            for source in sources:
+                self._generations[source] = self._generations.get(source, 0) + 1
+
+    def get(self, key, sources, compute):
+        """Return the cached value for ``key`` or compute and store it"""
+        now = time.monotonic()
+
+        with self._lock:
+            generations = tuple(self._generations.get(source, 0) for source in sources)
+            entry = self._entries.get(key)
+            if entry:
+                value, cached_generations, computed_at = entry
+                age = now - computed_at
+                if age < self.max_age:
+                    if cached_generations == generations:
+                        self._metrics['hits'] += 1
+                        return value
+                    if age < self.max_staleness:
+                        self._metrics['stale_hits'] += 1
+                        return value
+            self._metrics['misses'] += 1
+
+        # Generations were captured before computing, so a concurrent bump
+        # still invalidates the value stored here
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (value, generations, now)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one cached value, or all of them"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def metrics(self):
+        """Hit/miss counters and current generations"""
+        with self._lock:
+            lookups = sum(self._metrics.values())
+            hits = self._metrics['hits'] + self._metrics['stale_hits']
+            return dict(
+                self._metrics,
+                lookups=lookups,
+                hit_ratio=hits / lookups if lookups else 0.0,
+                entries=len(self._entries),
+                generations=dict(self._generations),
+                max_staleness=self.max_staleness,
+                max_age=self.max_age
+            )
+
+
+class ExpiringStore:
+    """Bounded key/value store whose entries expire ``ttl`` seconds after they are stored.
+
+    When full, the oldest entries are evicted; with ``evict=False`` live
+    entries are kept instead and ``add`` refuses new keys until some expire.
+    """
+
+    def __init__(self, ttl=300.0, max_size=10000, evict=True):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.evict = evict
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def put(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._items[key] = (value, now + self.ttl)
+            self._items.move_to_end(key)
+            self._expire(now)
+
+    def add(self, key, value):
+        """Store ``key`` unless it already holds a live value; returns True if it was stored"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[1] > now:
+                return False
+            self._expire(now)
+            if not self.evict and len(self._items) >= self.max_size:
+                return False
+            self._items[key] = (value, now + self.ttl)
+            self._items.move_to_end(key)
+            self._expire(now)
+            return True
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[1] <= now:
+                return default
+            return entry[0]
+
+    def pop(self, key, default=None):
+        """Remove ``key`` and return its value if it has not expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.pop(key, None)
+            if entry is None or entry[1] <= now:
+                return default
+            return entry[0]
+
+    def _expire(self, now):
+        # Entries are in insertion order, so expired and oldest ones are at the front
+        while self._items:
+            _, expires_at = next(iter(self._items.values()))
+            if expires_at > now and (len(self._items) <= self.max_size or not self.evict):
+                break
+            self._items.popitem(last=False)
@@ -1,21 +1,271 @@
 import random
 import string
 import os
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, features
 from io import BytesIO
 import base64
 import json
-from gtts import gTTS
-import tempfile
 import math
+import wave
+import shutil
+import subprocess
+import time
+import hmac
+import secrets
+import hashlib
+import threading
+import contextvars
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 import requests
+from requests.adapters import HTTPAdapter
+from utils.breaker_utils import budget_timeout, DeadlineExceeded
+from utils.cache_utils import ExpiringStore
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Tried in order; the first one that exists is used
+FONT_PATHS = [
+    '/System/Library/Fonts/Arial.ttf',  # macOS
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',  # Linux
+    'C:\\Windows\\Fonts\\arial.ttf',  # Windows
+]
+
+# Every character a text or math challenge can contain
+CAPTCHA_ALPHABET = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
+MATH_SYMBOLS = '0123456789+-×'
+GLYPH_ANGLES = range(-15, 16)
+
+# 'numpy' renders noise, glyphs and warps as array operations; 'pil' draws with ImageDraw
+CAPTCHA_RENDERERS = ('numpy', 'pil')
+_renderer = 'numpy' if NUMPY_AVAILABLE else 'pil'
+
+# Audio challenges: clip file names for symbols, and the words espeak says for them
+AUDIO_SAMPLE_RATE = 16000
+CLIP_NAMES = {'+': 'plus', '-': 'minus', '×': 'times'}
+AUDIO_CAPTCHA_AVAILABLE = NUMPY_AVAILABLE
+_clip_dir = None
+_clip_library = None
+_clip_lock = threading.Lock()
+
+_fonts = {}
+_atlases = {}
+_font_lock = threading.Lock()
+
+# Encodings for challenge images: Pillow format, MIME type and save options
+IMAGE_FORMATS = {
+    'png': ('PNG', 'image/png', {}),
+    'png8': ('PNG', 'image/png', {}),  # 32-colour palette, roughly half the bytes
+    'webp': ('WEBP', 'image/webp', {'quality': 60, 'method': 0})
+}
+_image_format = 'png'
+
+def set_captcha_image_format(image_format):
+    """Choose how challenge images are encoded; 'webp' falls back to 'png' without WebP support"""
+    global _image_format
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown CAPTCHA image format: {image_format}")
+    _image_format = image_format if image_format != 'webp' or features.check('webp') else 'png'
+    return _image_format
+
+def encode_captcha_image(image, image_format=None):
+    """Encode a rendered challenge; returns ``(bytes, mimetype)``"""
+    image_format = image_format or _image_format
+    pil_format, mimetype, options = IMAGE_FORMATS[image_format]
+    if image_format == 'png8':
+        image = image.quantize(colors=32)
+    buffer = BytesIO()
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue(), mimetype
+
+def set_captcha_renderer(renderer):
+    """Choose the default renderer; 'numpy' falls back to 'pil' when NumPy is not installed"""
+    global _renderer
+    if renderer not in CAPTCHA_RENDERERS:
+        raise ValueError(f"Unknown CAPTCHA renderer: {renderer}")
+    _renderer = renderer if renderer != 'numpy' or NUMPY_AVAILABLE else 'pil'
+    return _renderer
+
+def _load_font(size):
+    try:
+        for font_path in FONT_PATHS:
+            if os.path.exists(font_path):
+                return ImageFont.truetype(font_path, size)
+    except OSError:
+        pass
+    return ImageFont.load_default()
+
+def get_captcha_font(size):
+    """CAPTCHA font at ``size``, loaded once per process"""
+    with _font_lock:
+        font = _fonts.get(size)
+        if font is None:
+            font = _fonts[size] = _load_font(size)
+        return font
+
+def get_glyph_atlas(size):
+    """Shared glyph atlas for the CAPTCHA font at ``size``"""
+    font = get_captcha_font(size)
+    with _font_lock:
+        atlas = _atlases.get(size)
+        if atlas is None:
+            atlas = _atlases[size] = GlyphAtlas(font)
+        return atlas
+
+def set_captcha_audio_clips(clip_dir):
+    """Load audio clips from ``clip_dir`` (``<char>.wav``, ``plus.wav``...) on next use"""
+    global _clip_dir, _clip_library
+    with _clip_lock:
+        _clip_dir = clip_dir or None
+        _clip_library = None
+
+def get_clip_library():
+    """Shared clip library, loaded once per process"""
+    global _clip_library
+    with _clip_lock:
+        if _clip_library is None:
+            _clip_library = ClipLibrary(_clip_dir)
+        return _clip_library
+
+_warp_cache = {}
+
+def _warp_tables(height, width, distortion):
+    """Clamped source coordinates for every whole-pixel shift up to ``distortion``.
+    
+    Row ``s + pad`` of the x table holds the column each column reads from
+    when shifted by ``s``; the y table does the same for rows.
+    """
+    key = (height, width, distortion)
+    tables = _warp_cache.get(key)
+    if tables is None:
+        pad = int(np.ceil(distortion))
+        shifts = np.arange(-pad, pad + 1)[:, None]
+        tables = _warp_cache[key] = (
+            np.clip(np.arange(width)[None, :] + shifts, 0, width - 1),
+            np.clip(np.arange(height)[None, :] + shifts, 0, height - 1)
+        )
+    return tables
+
+class GlyphAtlas:
+    """Pre-rotated alpha masks for every CAPTCHA character.
+    
+    Each glyph is drawn once into a 50x50 cell and rotated to every angle in
+    ``angles``, so putting a character on an image is a single paste of a
+    colour through its mask.
+    """
+    
+    def __init__(self, font, chars=CAPTCHA_ALPHABET + MATH_SYMBOLS, angles=GLYPH_ANGLES):
+        self.font = font
+        self.angles = list(angles)
+        self._sprites = {}
+        for char in dict.fromkeys(chars):
+            self._render(char)
+    
+    def _render(self, char):
+        cell = Image.new('L', (50, 50), 0)
+        ImageDraw.Draw(cell).text((10, 10), char, font=self.font, fill=255)
+        sprites = {angle: cell.rotate(angle, expand=1) for angle in self.angles}
+        self._sprites[char] = sprites
+        return sprites
+    
+    def sprite(self, char, angle):
+        """Mask for ``char`` rotated by ``angle`` degrees"""
+        sprites = self._sprites.get(char)
+        if sprites is None:
+            # Characters outside the alphabet are rendered on first use
+            sprites = self._render(char)
+        return sprites[angle]
+
+class ClipLibrary:
+    """A spoken clip for every CAPTCHA character, held in memory as float32 samples.
+    
+    Each clip is read from ``clip_dir`` when the directory has one, spoken
+    once by espeak when it is installed, and otherwise synthesized as a
+    distinct two-tone pattern. Tone clips keep audio challenges working in
+    development and benchmarks but are not meant for people to solve.
+    """
+    
+    def __init__(self, clip_dir=None, sample_rate=AUDIO_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.espeak = shutil.which('espeak-ng') or shutil.which('espeak')
+        self.sources = {'file': 0, 'espeak': 0, 'tone': 0}
+        self.clips = {}
+        for index, char in enumerate(dict.fromkeys(CAPTCHA_ALPHABET + MATH_SYMBOLS)):
+            self.clips[char] = self._load(char, index, clip_dir)
+    
+    def clip(self, char):
+        return self.clips.get(char.upper())
+    
+    def _load(self, char, index, clip_dir):
+        name = CLIP_NAMES.get(char, char)
+        path = os.path.join(clip_dir, f'{name}.wav') if clip_dir else None
+        try:
+            if path and os.path.exists(path):
+                with open(path, 'rb') as clip_file:
+                    clip = self._decode(clip_file.read())
+                self.sources['file'] += 1
+                return clip
+            if self.espeak:
+                spoken = subprocess.run([self.espeak, '--stdout', '-s', '140', name],
+                                        capture_output=True, timeout=10, check=True)
+                clip = self._decode(spoken.stdout)
+                self.sources['espeak'] += 1
+                return clip
+        except (OSError, EOFError, wave.Error, subprocess.SubprocessError) as e:
+            print(f"Audio clip for {name!r} unavailable, using a tone: {e}")
+        self.sources['tone'] += 1
+        return self._tone(index)
+    
+    def _decode(self, data):
+        """16-bit WAV bytes to mono float32 at the library rate, silence trimmed, peak 0.8"""
+        with wave.open(BytesIO(data)) as wav:
+            channels, rate = wav.getnchannels(), wav.getframerate()
+            if wav.getsampwidth() != 2:
+                raise wave.Error('only 16-bit clips are supported')
+            frames = wav.readframes(wav.getnframes())
+        samples = np.frombuffer(frames[:len(frames) // (2 * channels) * 2 * channels], dtype='<i2')
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.float32) / 32768
+        if rate != self.sample_rate:
+            positions = np.arange(0, len(samples) - 1, rate / self.sample_rate)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        
+        loud = np.flatnonzero(np.abs(samples) > 0.02)
+        if not len(loud):
+            raise wave.Error('clip is silent')
+        samples = samples[loud[0]:loud[-1] + 1]
+        return samples * (0.8 / np.abs(samples).max())
+    
+    def _tone(self, index):
+        t = np.arange(int(self.sample_rate * 0.3)) / self.sample_rate
+        low, high = 300 + 45 * (index % 8), 900 + 110 * (index // 8)
+        envelope = np.sin(np.pi * t / t[-1])
+        return (0.4 * envelope * (np.sin(2 * np.pi * low * t) + np.sin(2 * np.pi * high * t))).astype(np.float32)
 
 class CaptchaGenerator:
-    def __init__(self):
+    def __init__(self, renderer=None):
         self.width = 200
         self.height = 80
         self.font_size = 36
         self.noise_level = 50
+        self.renderer = renderer or _renderer
+        if self.renderer == 'numpy' and not NUMPY_AVAILABLE:
+            self.renderer = 'pil'
+        
+        # NumPy renderer: denser speckle, more (curved) lines and a wave warp over the glyphs
+        self.noise_density = 0.03
+        self.noise_lines = 8
+        self.distortion = 3.0
+        
+        # Audio: seconds of silence between clips, +/- speed and pitch change, noise amplitude
+        self.audio_gap = (0.15, 0.45)
+        self.audio_jitter = 0.12
+        self.audio_noise = 0.04
         
     def generate_text_captcha(self, length=5):
         """Generate random text for CAPTCHA"""
@@ -48,6 +298,22 @@ class CaptchaGenerator:
     
     def create_image_captcha(self, text, captcha_type='text'):
         """Create image CAPTCHA"""
+        image = self.render_image(text)
+        
+        # Convert to base64
+        buffer = BytesIO()
+        image.save(buffer, format='PNG')
+        img_str = base64.b64encode(buffer.getvalue()).decode()
+        
+        return f"data:image/png;base64,{img_str}"
+    
+    def render_image(self, text):
+        """Render ``text`` as a distorted RGB image"""
+        if self.renderer == 'numpy':
+            return self._render_numpy(text)
+        return self._render_pil(text)
+    
+    def _render_pil(self, text):
         # Create image
         image = Image.new('RGB', (self.width, self.height), color='white')
         draw = ImageDraw.Draw(image)
@@ -64,24 +330,9 @@ class CaptchaGenerator:
             end = (random.randint(0, self.width), random.randint(0, self.height))
             draw.line([start, end], fill=(random.randint(100, 200), random.randint(100, 200), random.randint(100, 200)), width=1)
         
-        # Try to load a font, fallback to default if not available
-        try:
-            # Try to use a system font
-            font_paths = [
-                '/System/Library/Fonts/Arial.ttf',  # macOS
-                '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',  # Linux
-                'C:\\Windows\\Fonts\\arial.ttf',  # Windows
-            ]
-            font = None
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    font = ImageFont.truetype(font_path, self.font_size)
-                    break
-            
-            if font is None:
-                font = ImageFont.load_default()
-        except:
-            font = ImageFont.load_default()
+        # Fonts and rotated glyphs are loaded once per process, not per image
+        font = get_captcha_font(self.font_size)
+        atlas = get_glyph_atlas(self.font_size)
         
         # Calculate text position
         bbox = draw.textbbox((0, 0), text, font=font)
@@ -99,52 +350,205 @@ class CaptchaGenerator:
             # Random color for each character
             color = (random.randint(0, 100), random.randint(0, 100), random.randint(0, 100))
             
-            # Create temporary image for character rotation
-            char_img = Image.new('RGBA', (50, 50), (255, 255, 255, 0))
-            char_draw = ImageDraw.Draw(char_img)
-            char_draw.text((10, 10), char, font=font, fill=color)
-            
-            # Rotate character slightly
+            # Paint the colour through the pre-rotated glyph mask
             angle = random.randint(-15, 15)
-            rotated = char_img.rotate(angle, expand=1)
-            
-            # Paste rotated character
-            image.paste(rotated, (char_x, char_y), rotated)
+            image.paste(color, (char_x, char_y), atlas.sprite(char, angle))
         
-        # Convert to base64
-        buffer = BytesIO()
-        image.save(buffer, format='PNG')
-        img_str = base64.b64encode(buffer.getvalue()).decode()
+        return image
+    
+    def _render_numpy(self, text):
+        rng = np.random.default_rng()
+        height, width = self.height, self.width
+        font = get_captcha_font(self.font_size)
+        atlas = get_glyph_atlas(self.font_size)
         
-        return f"data:image/png;base64,{img_str}"
+        # Glyphs: PIL pastes each colour through its pre-rotated mask in C
+        image = Image.new('RGB', (width, height), 'white')
+        bbox = font.getbbox(text)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+        x = (width - text_width) // 2
+        y = (height - text_height) // 2
+        step = text_width // len(text)
+        offsets = rng.integers(-5, 6, len(text)).tolist()
+        angles = rng.integers(-15, 16, len(text)).tolist()
+        colors = rng.integers(0, 101, (len(text), 3)).tolist()
+        for i, char in enumerate(text):
+            image.paste(tuple(colors[i]), (x + i * step, y + offsets[i]), atlas.sprite(char, angles[i]))
+        
+        # Wave warp: each row shifts sideways and each column up or down along a random sine,
+        # bending every glyph with one gather over the flattened image
+        shift_x, shift_y = _warp_tables(height, width, self.distortion)
+        pad = (len(shift_x) - 1) // 2
+        offset_x = np.rint(self.distortion * np.sin(np.arange(height) * (2 * np.pi / rng.uniform(30, 60)) + rng.uniform(0, 2 * np.pi)))
+        offset_y = np.rint(self.distortion * 0.6 * np.sin(np.arange(width) * (2 * np.pi / rng.uniform(40, 90)) + rng.uniform(0, 2 * np.pi)))
+        source = shift_y[offset_y.astype(np.intp) + pad].T * width + shift_x[offset_x.astype(np.intp) + pad]
+        canvas = np.asarray(image).reshape(-1, 3).take(source.ravel(), axis=0)
+        
+        # Speckle noise: random colours on a random subset of pixels
+        speckles = int(height * width * self.noise_density)
+        canvas[rng.integers(0, height * width, speckles)] = rng.integers(0, 256, (speckles, 3), dtype=np.uint8)
+        canvas = canvas.reshape(height, width, 3)
+        
+        # Curved noise lines, all drawn with one indexed assignment
+        lines = self.noise_lines
+        t = np.linspace(0, 1, width)
+        start_x, end_x = rng.uniform(0, width, (2, lines, 1))
+        start_y, end_y = rng.uniform(0, height, (2, lines, 1))
+        bend = rng.uniform(2, 8, (lines, 1)) * np.sin(t * rng.uniform(np.pi, 4 * np.pi, (lines, 1)) + rng.uniform(0, 2 * np.pi, (lines, 1)))
+        line_x = np.clip(start_x + (end_x - start_x) * t, 0, width - 1).astype(np.intp)
+        line_y = np.clip(start_y + (end_y - start_y) * t + bend, 0, height - 1).astype(np.intp)
+        canvas[line_y, line_x] = rng.integers(100, 201, (lines, 1, 3), dtype=np.uint8)
+        
+        return Image.fromarray(canvas, 'RGB')
     
     def create_audio_captcha(self, text):
-        """Create audio CAPTCHA - Currently disabled due to dependency issues"""
-        return None  # Temporarily disabled
+        """Create audio CAPTCHA as WAV bytes (None without NumPy)"""
+        if not AUDIO_CAPTCHA_AVAILABLE:
+            return None
+        return self.render_audio(text, self.audio_gap, self.audio_jitter, self.audio_noise)
     
     def create_simple_audio_captcha(self, text):
-        """Create simple audio CAPTCHA - Currently disabled due to dependency issues"""
-        return None  # Temporarily disabled
+        """Create audio CAPTCHA with even gaps and no pitch jitter or noise"""
+        if not AUDIO_CAPTCHA_AVAILABLE:
+            return None
+        return self.render_audio(text, (0.3, 0.3), 0.0, 0.0)
+    
+    def render_audio(self, text, gap, jitter, noise):
+        """Concatenate character clips with random gaps, pitch jitter and noise, in memory"""
+        library = get_clip_library()
+        rate = library.sample_rate
+        rng = np.random.default_rng()
+        
+        parts = [np.zeros(int(rate * 0.3), dtype=np.float32)]
+        for char in text:
+            clip = library.clip(char)
+            if clip is None:
+                continue
+            if jitter:
+                # Resampling by a random step shifts pitch and speed together
+                step = rng.uniform(1 - jitter, 1 + jitter)
+                clip = np.interp(np.arange(0, len(clip) - 1, step), np.arange(len(clip)), clip).astype(np.float32)
+            parts.append(clip * rng.uniform(0.7, 1.0))
+            parts.append(np.zeros(int(rate * rng.uniform(*gap)), dtype=np.float32))
+        
+        signal = np.concatenate(parts)
+        if noise:
+            signal += noise * rng.standard_normal(len(signal), dtype=np.float32)
+            # A low hum, so the noise floor is not flat
+            signal += noise * np.sin(np.arange(len(signal), dtype=np.float32) * np.float32(2 * np.pi * rng.uniform(50, 120) / rate))
+        
+        buffer = BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes((np.clip(signal, -1, 1) * 32767).astype('<i2').tobytes())
+        return buffer.getvalue()
 
 class RecaptchaManager:
-    def __init__(self, site_key, secret_key):
+    """Verifies reCAPTCHA tokens against Google's siteverify endpoint.
+    
+    Requests reuse keep-alive connections from a pooled ``requests.Session``.
+    Every token is remembered for ``token_ttl`` seconds (Google only accepts
+    a token once, within two minutes), so a replayed token is rejected
+    locally without another round trip.
+    """
+    
+    def __init__(self, site_key, secret_key, timeout=10, breaker=None, verify_url=None,
+                 pool_size=10, workers=4, token_ttl=120, max_tokens=10000):
         self.site_key = site_key
         self.secret_key = secret_key
-        self.verify_url = "https://www.google.com/recaptcha/api/siteverify"
+        self.verify_url = verify_url or "https://www.google.com/recaptcha/api/siteverify"
+        self.timeout = timeout
+        self.breaker = breaker
+        self.workers = workers
+        self.token_ttl = token_ttl
+        self.max_tokens = max_tokens
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self.stats = {
+            'verifications': 0,
+            'siteverify_calls': 0,
+            'replays_rejected': 0,
+            'errors': 0
+        }
+    
+    def _siteverify(self, data):
+        """POST to siteverify within the request's time budget, through the breaker if there is one"""
+        # Worked out before the breaker, so a request out of budget is not a siteverify failure
+        timeout = budget_timeout(self.timeout)
+        
+        def post():
+            try:
+                response = self.session.post(self.verify_url, data=data, timeout=timeout)
+            except requests.Timeout as e:
+                if timeout < self.timeout:
+                    # Cut short by this request's budget, not by siteverify being slow
+                    raise DeadlineExceeded(f"request deadline exceeded waiting for siteverify: {e}") from e
+                raise
+            response.raise_for_status()
+            return response.json()
+        
+        self.stats['siteverify_calls'] += 1
+        if self.breaker:
+            return self.breaker.call(post)
+        return post()
+    
+    def _claim_token(self, response_token):
+        """Remember a token and return its key; None if it was already presented within ``token_ttl``"""
+        key = hashlib.sha256(response_token.encode()).hexdigest()
+        now = time.monotonic()
+        with self._lock:
+            self.stats['verifications'] += 1
+            # Entries are in insertion order, so expired ones are at the front
+            while self._tokens and next(iter(self._tokens.values())) <= now:
+                self._tokens.popitem(last=False)
+            
+            if key in self._tokens:
+                self.stats['replays_rejected'] += 1
+                return None
+            
+            self._tokens[key] = now + self.token_ttl
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+            return key
+    
+    def _verify(self, response_token, remote_ip):
+        """Raw siteverify result, or a local rejection for empty and replayed tokens"""
+        if not response_token:
+            return {'success': False, 'error-codes': ['missing-input-response']}
+        key = self._claim_token(response_token)
+        if key is None:
+            return {'success': False, 'error-codes': ['timeout-or-duplicate']}
+        
+        data = {
+            'secret': self.secret_key,
+            'response': response_token
+        }
+        
+        if remote_ip:
+            data['remoteip'] = remote_ip
+        
+        try:
+            return self._siteverify(data)
+        except Exception:
+            # The token may never have reached Google, so let it be tried again
+            with self._lock:
+                self._tokens.pop(key, None)
+            raise
     
     def verify_recaptcha_v2(self, response_token, remote_ip=None):
         """Verify reCAPTCHA v2 response"""
         try:
-            data = {
-                'secret': self.secret_key,
-                'response': response_token
-            }
-            
-            if remote_ip:
-                data['remoteip'] = remote_ip
-            
-            response = requests.post(self.verify_url, data=data, timeout=10)
-            result = response.json()
+            result = self._verify(response_token, remote_ip)
             
             return {
                 'success': result.get('success', False),
@@ -156,6 +560,7 @@ class RecaptchaManager:
             }
             
         except Exception as e:
+            self.stats['errors'] += 1
             print(f"Error verifying reCAPTCHA v2: {e}")
             return {
                 'success': False,
@@ -165,16 +570,7 @@ class RecaptchaManager:
     def verify_recaptcha_v3(self, response_token, expected_action, min_score=0.5, remote_ip=None):
         """Verify reCAPTCHA v3 response"""
         try:
-            data = {
-                'secret': self.secret_key,
-                'response': response_token
-            }
-            
-            if remote_ip:
-                data['remoteip'] = remote_ip
-            
-            response = requests.post(self.verify_url, data=data, timeout=10)
-            result = response.json()
+            result = self._verify(response_token, remote_ip)
             
             success = result.get('success', False)
             score = result.get('score', 0)
@@ -196,40 +592,349 @@ class RecaptchaManager:
             }
             
         except Exception as e:
+            self.stats['errors'] += 1
             print(f"Error verifying reCAPTCHA v3: {e}")
             return {
                 'success': False,
                 'error': str(e)
             }
+    
+    def verify_recaptcha_v2_async(self, response_token, remote_ip=None):
+        """Start a v2 verification on the manager's thread pool; returns a Future"""
+        return self._submit(self.verify_recaptcha_v2, response_token, remote_ip)
+    
+    def verify_recaptcha_v3_async(self, response_token, expected_action, min_score=0.5, remote_ip=None):
+        """Start a v3 verification on the manager's thread pool; returns a Future"""
+        return self._submit(self.verify_recaptcha_v3, response_token, expected_action, min_score, remote_ip)
+    
+    def result(self, future, timeout=None):
+        """Wait for an async verification, at most ``timeout`` seconds or what is left of the request budget"""
+        try:
+            return future.result(timeout=budget_timeout(self.timeout if timeout is None else timeout))
+        except (FutureTimeoutError, DeadlineExceeded):
+            future.cancel()
+            self.stats['errors'] += 1
+            return {
+                'success': False,
+                'error': 'reCAPTCHA verification deadline exceeded'
+            }
+    
+    def _submit(self, verify, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='recaptcha')
+        # Run in a copy of the caller's context so the request deadline still applies
+        return self._executor.submit(contextvars.copy_context().run, verify, *args)
+    
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, remembered_tokens=len(self._tokens))
+    
+    def close(self):
+        """Stop the worker threads and close pooled connections"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False)
+        self.session.close()
+
+class CaptchaUnavailable(Exception):
+    """No challenge could be rendered in time"""
+
+def _init_render_worker(renderer, image_format):
+    """Render pool workers use the parent's renderer and image format"""
+    set_captcha_renderer(renderer)
+    set_captcha_image_format(image_format)
+
+class CaptchaRenderPool:
+    """Renders challenges in worker processes, so image work does not hold the web worker's GIL.
+    
+    At most ``max_pending`` renders are queued or running. A caller waits up
+    to ``timeout`` seconds, capped by the request deadline. When the queue
+    is full or the wait runs out, ``overflow`` decides what happens:
+    'inline' renders in the caller, 'reject' raises ``CaptchaUnavailable``.
+    """
+    
+    OVERFLOW_MODES = ('inline', 'reject')
+    
+    def __init__(self, workers=2, max_pending=32, timeout=2.0, overflow='inline'):
+        if overflow not in self.OVERFLOW_MODES:
+            raise ValueError(f"Unknown CAPTCHA render overflow mode: {overflow}")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.overflow = overflow
+        
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures = set()
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'rendered': 0,
+            'saturated': 0,
+            'timeouts': 0,
+            'inline': 0,
+            'rejected': 0
+        }
+    
+    def render(self, captcha_type, block=False):
+        """Render a challenge in a worker process; ``block`` waits for a free slot and the result"""
+        if not self._slots.acquire(blocking=block):
+            return self._overflow(captcha_type, 'saturated')
+        
+        try:
+            future = self._get_executor().submit(render_captcha_challenge, captcha_type)
+        except BrokenProcessPool as e:
+            self._slots.release()
+            self._reset(e)
+            return self._overflow(captcha_type, 'saturated')
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._finished)
+        
+        try:
+            challenge = future.result(None if block else budget_timeout(self.timeout))
+        except (FutureTimeoutError, DeadlineExceeded):
+            # The worker keeps its slot until it finishes
+            return self._overflow(captcha_type, 'timeouts')
+        except BrokenProcessPool as e:
+            self._reset(e)
+            return self._overflow(captcha_type, 'saturated')
+        
+        with self._lock:
+            self.stats['rendered'] += 1
+        return challenge
+    
+    def metrics(self):
+        with self._lock:
+            return dict(
+                self.stats,
+                workers=self.workers,
+                max_pending=self.max_pending,
+                timeout=self.timeout,
+                overflow=self.overflow
+            )
+    
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            futures = list(self._futures)
+        if executor and self._pid == os.getpid():
+            # Drop queued renders by hand: shutdown(cancel_futures=True) needs Python 3.9
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def _finished(self, future):
+        with self._lock:
+            self._futures.discard(future)
+        self._slots.release()
+    
+    def _overflow(self, captcha_type, reason):
+        with self._lock:
+            self.stats[reason] += 1
+            self.stats['inline' if self.overflow == 'inline' else 'rejected'] += 1
+        if self.overflow == 'inline':
+            return render_captcha_challenge(captcha_type)
+        raise CaptchaUnavailable(f"CAPTCHA rendering unavailable ({reason})")
+    
+    def _get_executor(self):
+        with self._lock:
+            # Started on first use, and again in a forked child, which does not inherit the workers
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_render_worker,
+                    initargs=(_renderer, _image_format)
+                )
+                self._pid = os.getpid()
+            return self._executor
+    
+    def _reset(self, error):
+        print(f"CAPTCHA render pool failed, restarting: {error}")
+        with self._lock:
+            self._executor = None
+
+class CaptchaPool:
+    """Stock of ready-made challenges per type, refilled by a background thread.
+    
+    ``take`` pops a challenge in O(1); each one is handed out once. When a
+    type drops below ``low_water`` the refill thread renders it back up to
+    ``size`` with ``refill_render`` (``render`` unless given). An empty pool
+    falls back to ``render`` in the caller.
+    """
+    
+    def __init__(self, render, types=('text', 'math'), size=200, low_water=50, refill_render=None):
+        self.render = render
+        self.refill_render = refill_render or render
+        self.types = tuple(types)
+        self.size = size
+        self.low_water = low_water
+        
+        self._stock = {captcha_type: deque() for captcha_type in self.types}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        self.stats = {
+            'taken': 0,
+            'misses': 0,
+            'generated': 0,
+            'refills': 0,
+            'refill_seconds': 0.0
+        }
+    
+    def take(self, captcha_type):
+        """A challenge nobody else has been given"""
+        self.start()
+        stock = self._stock.get(captcha_type)
+        if stock is None:
+            return self.render(captcha_type)
+        
+        try:
+            challenge = stock.popleft()
+            hit = True
+        except IndexError:
+            hit = False
+        with self._lock:
+            self.stats['taken' if hit else 'misses'] += 1
+        if not hit:
+            challenge = self.render(captcha_type)
+        
+        if len(stock) < self.low_water:
+            self._wake.set()
+        return challenge
+    
+    def fill(self):
+        """Render every type up to ``size``; returns the number of challenges made"""
+        started = time.perf_counter()
+        made = 0
+        for captcha_type, stock in self._stock.items():
+            while len(stock) < self.size and not self._stopped:
+                stock.append(self.refill_render(captcha_type))
+                made += 1
+        
+        if made:
+            with self._lock:
+                self.stats['generated'] += made
+                self.stats['refills'] += 1
+                self.stats['refill_seconds'] += time.perf_counter() - started
+        return made
+    
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['depth'] = {captcha_type: len(stock) for captcha_type, stock in self._stock.items()}
+        stats['size'] = self.size
+        stats['low_water'] = self.low_water
+        stats['refill_rate'] = stats['generated'] / stats['refill_seconds'] if stats['refill_seconds'] else 0.0
+        return stats
+    
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+    
+    def start(self):
+        """Start the refill thread (and so the initial fill) if it is not running"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            # Also restarts the thread lost across a fork
+            if self._stopped or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name='captcha-pool', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while not self._stopped:
+            try:
+                self.fill()
+            except Exception as e:
+                print(f"CAPTCHA pool refill failed: {e}")
+            self._wake.wait()
+            self._wake.clear()
+
+_captcha_pool = None
+_render_pool = None
+
+def configure_captcha_render_pool(workers=2, max_pending=32, timeout=2.0, overflow='inline'):
+    """Render challenges in worker processes (``workers`` 0 renders in the calling thread).
+    
+    Call it before ``configure_captcha_pool``, so the pre-rendered pool
+    refills through the worker processes too.
+    """
+    global _render_pool
+    if _render_pool:
+        _render_pool.close()
+    _render_pool = CaptchaRenderPool(workers, max_pending, timeout, overflow) if workers > 0 else None
+    return _render_pool
+
+def captcha_render_metrics():
+    return _render_pool.metrics() if _render_pool else None
+
+def _render_challenge(captcha_type):
+    if _render_pool:
+        return _render_pool.render(captcha_type)
+    return render_captcha_challenge(captcha_type)
+
+def _refill_challenge(captcha_type):
+    if _render_pool:
+        return _render_pool.render(captcha_type, block=True)
+    return render_captcha_challenge(captcha_type)
+
+def configure_captcha_pool(size=200, low_water=50):
+    """Serve ``generate_captcha_challenge`` from a pre-rendered pool (``size`` 0 turns it off)"""
+    global _captcha_pool
+    if _captcha_pool:
+        _captcha_pool.close()
+    _captcha_pool = None
+    if size > 0:
+        _captcha_pool = CaptchaPool(_render_challenge, size=size, low_water=low_water, refill_render=_refill_challenge)
+        _captcha_pool.start()
+    return _captcha_pool
+
+def captcha_pool_metrics():
+    return _captcha_pool.metrics() if _captcha_pool else None
 
 def generate_captcha_challenge(captcha_type='text'):
-    """Generate CAPTCHA challenge"""
+    """Generate CAPTCHA challenge (from the pool, or the render processes, when configured)"""
+    if _captcha_pool:
+        return _captcha_pool.take(captcha_type)
+    return _render_challenge(captcha_type)
+
+def render_captcha_challenge(captcha_type='text'):
+    """Render a new CAPTCHA challenge.
+    
+    The image is encoded once, in the configured format, and served as raw
+    bytes under the opaque ``id``.
+    """
     generator = CaptchaGenerator()
     
     if captcha_type == 'math':
         question, answer = generator.generate_math_captcha()
-        image_data = generator.create_image_captcha(question, 'math')
-        audio_data = generator.create_audio_captcha(question)
-        
-        return {
-            'type': 'math',
-            'question': question,
-            'answer': answer,
-            'image': image_data,
-            'audio': audio_data
-        }
     else:  # text captcha
-        text = generator.generate_text_captcha()
-        image_data = generator.create_image_captcha(text, 'text')
-        audio_data = generator.create_audio_captcha(text)
-        
-        return {
-            'type': 'text',
-            'question': text,
-            'answer': text,
-            'image': image_data,
-            'audio': audio_data
-        }
+        captcha_type = 'text'
+        question = answer = generator.generate_text_captcha()
+    
+    image_bytes, mimetype = encode_captcha_image(generator.render_image(question))
+    
+    return {
+        'id': secrets.token_urlsafe(16),
+        'type': captcha_type,
+        'question': question,
+        'answer': answer,
+        'image_bytes': image_bytes,
+        'mimetype': mimetype
+    }
+
+def render_captcha_audio(question):
+    """Spoken version of a challenge as WAV bytes, or None when audio is unavailable"""
+    return CaptchaGenerator().create_audio_captcha(question)
 
 def verify_captcha(user_input, correct_answer):
     """Verify CAPTCHA response"""
@@ -239,6 +944,78 @@ def verify_captcha(user_input, correct_answer):
     # Case-insensitive comparison
     return user_input.strip().upper() == correct_answer.strip().upper()
 
-def create_recaptcha_manager(site_key, secret_key):
+class CaptchaTokenSigner:
+    """Stateless CAPTCHA challenge tokens.
+    
+    A token is ``<expires>.<nonce>.<stamp>.<tag>``. The stamp is an HMAC over
+    the expiry and the nonce, and proves the server issued the token; the
+    tag is an HMAC over both and a hash of the answer salted with the nonce.
+    The answer itself is not in the token, so any worker holding the secret
+    can check a response without session state. Each nonce is accepted once:
+    ``used_nonces`` needs an ``add(nonce, expires_at)`` that returns False
+    for a nonce seen before, and is in-process unless a shared one is given;
+    when the in-process set is full, tokens are refused until nonces expire.
+    Only stamped, unexpired tokens ever reach it.
+    """
+    
+    def __init__(self, secret, ttl=300, used_nonces=None):
+        if isinstance(secret, str):
+            secret = secret.encode()
+        self._key = hashlib.sha256(b'captcha-token:' + secret).digest()
+        self.ttl = ttl
+        if used_nonces is None:
+            # Never evict a live nonce to make room: that would let a spent token through again
+            used_nonces = ExpiringStore(ttl=ttl, max_size=100000, evict=False)
+        self.used_nonces = used_nonces
+        self.stats = {'issued': 0, 'verified': 0, 'rejected': 0, 'expired': 0, 'replayed': 0}
+    
+    def issue(self, answer):
+        """Token for a challenge whose correct response is ``answer``"""
+        expires = int(time.time() + self.ttl)
+        nonce = secrets.token_urlsafe(12)
+        self.stats['issued'] += 1
+        stamp = self._sign(f"{expires}.{nonce}").decode()
+        return f"{expires}.{nonce}.{stamp}.{self._tag(expires, nonce, answer).decode()}"
+    
+    def verify(self, token, user_input):
+        """Check ``user_input`` against ``token``; spends the token either way"""
+        try:
+            expires, nonce, stamp, tag = token.split('.')
+            expires = int(expires)
+            stamp, tag = stamp.encode(), tag.encode()
+            genuine = hmac.compare_digest(stamp, self._sign(f"{expires}.{nonce}"))
+        except (AttributeError, TypeError, ValueError):
+            genuine = False
+        if not genuine:
+            self.stats['rejected'] += 1
+            return False
+        
+        now = time.time()
+        if expires < now or expires > now + self.ttl:
+            self.stats['expired'] += 1
+            return False
+        # Claim before comparing, so a token allows exactly one guess
+        if not self.used_nonces.add(nonce, expires):
+            self.stats['replayed'] += 1
+            return False
+        if not user_input or not hmac.compare_digest(tag, self._tag(expires, nonce, user_input)):
+            self.stats['rejected'] += 1
+            return False
+        
+        self.stats['verified'] += 1
+        return True
+    
+    def metrics(self):
+        return dict(self.stats, ttl=self.ttl, used_nonces=len(self.used_nonces))
+    
+    def _sign(self, message):
+        digest = hmac.new(self._key, message.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=')
+    
+    def _tag(self, expires, nonce, answer):
+        answer_hash = hashlib.sha256(f"{nonce}:{str(answer).strip().upper()}".encode()).hexdigest()
+        return self._sign(f"{expires}.{nonce}.{answer_hash}")
+
+def create_recaptcha_manager(site_key, secret_key, **options):
     """Create reCAPTCHA manager instance"""
-    return RecaptchaManager(site_key, secret_key)
+    return RecaptchaManager(site_key, secret_key, **options)
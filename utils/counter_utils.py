@@ -0,0 +1,119 @@
+import math
+import time
+import threading
+
+
+class SlidingWindowCounter:
+    """Event counter over a ring of fixed-size time buckets"""
+
+    def __init__(self, window_seconds, bucket_seconds):
+        self.bucket_seconds = bucket_seconds
+        self.size = int(math.ceil(window_seconds / bucket_seconds)) + 1
+        self.counts = [0] * self.size
+        self.bucket_ids = [-1] * self.size
+        self.last_seen = 0.0
+
+    def add(self, when, amount=1):
+        """Record ``amount`` events at epoch time ``when``"""
+        bucket_id = int(when // self.bucket_seconds)
+        slot = bucket_id % self.size
+
+        # Reuse the slot once its bucket has rotated out of the window
+        if self.bucket_ids[slot] != bucket_id:
+            self.bucket_ids[slot] = bucket_id
+            self.counts[slot] = 0
+
+        self.counts[slot] += amount
+        self.last_seen = max(self.last_seen, when)
+
+    def count(self, window_seconds, now):
+        """Number of events in the last ``window_seconds`` (bucket resolution)"""
+        newest = int(now // self.bucket_seconds)
+        buckets = min(self.size, int(math.ceil(window_seconds / self.bucket_seconds)))
+        oldest = newest - buckets + 1
+
+        total = 0
+        for bucket_id, amount in zip(self.bucket_ids, self.counts):
+            if oldest <= bucket_id <= newest:
+                total += amount
+        return total
+
+
+class SlidingWindowStore:
+    """Thread-safe collection of sliding-window counters keyed by arbitrary tuples.
+
+    Counters for keys that have been quiet for longer than the window are
+    dropped automatically, and the store never holds more than ``max_keys``
+    counters.
+    """
+
+    def __init__(self, window_seconds=900, bucket_seconds=10, max_keys=100000, sweep_every=1000):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.max_keys = max_keys
+        self.sweep_every = sweep_every
+
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._records_since_sweep = 0
+
+    def record(self, key, when=None, amount=1):
+        """Count an event for ``key``"""
+        when = time.time() if when is None else when
+
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                if len(self._counters) >= self.max_keys:
+                    self._evict(when)
+                counter = SlidingWindowCounter(self.window_seconds, self.bucket_seconds)
+                self._counters[key] = counter
+
+            counter.add(when, amount)
+
+            self._records_since_sweep += 1
+            if self._records_since_sweep >= self.sweep_every:
+                self._expire(when)
+
+    def count(self, key, window_seconds, now=None):
+        """Events recorded for ``key`` within the last ``window_seconds``"""
+        now = time.time() if now is None else now
+
+        with self._lock:
+            counter = self._counters.get(key)
+            return counter.count(window_seconds, now) if counter else 0
+
+    def rebuild(self, events):
+        """Replace all counters from an iterable of ``(key, epoch_time)`` pairs"""
+        with self._lock:
+            self._counters.clear()
+            self._records_since_sweep = 0
+
+        for key, when in events:
+            self.record(key, when)
+
+    def expire(self, now=None):
+        """Drop counters with no events inside the window"""
+        with self._lock:
+            return self._expire(time.time() if now is None else now)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._counters)
+
+    def _expire(self, now):
+        cutoff = now - self.window_seconds
+        stale = [key for key, counter in self._counters.items() if counter.last_seen < cutoff]
+        for key in stale:
+            del self._counters[key]
+        self._records_since_sweep = 0
+        return len(stale)
+
+    def _evict(self, now):
+        if self._expire(now):
+            return
+
+        # Still full of live keys: drop the least recently active tenth
+        victims = sorted(self._counters, key=lambda key: self._counters[key].last_seen)
+        for key in victims[:max(1, len(victims) // 10)]:
+            del self._counters[key]
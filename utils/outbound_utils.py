@@ -0,0 +1,319 @@
+import time
+import heapq
+import random
+import itertools
+import threading
+from collections import OrderedDict
+
+# Lower numbers are delivered first
+PRIORITIES = {
+    'otp': 0,
+    'security': 1,
+    'notification': 2,
+    'activity': 3
+}
+
+
+class OutboundMessage:
+    """One queued delivery and its status"""
+
+    def __init__(self, message_id, kind, payload, coalesce_key=None, on_sent=None, on_failed=None):
+        self.id = message_id
+        self.kind = kind
+        self.priority = PRIORITIES.get(kind, max(PRIORITIES.values()))
+        self.items = [payload]
+        self.coalesce_key = coalesce_key
+        self.on_sent = on_sent
+        self.on_failed = on_failed
+
+        self.status = 'queued'
+        self.attempts = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.sent_at = None
+
+    @property
+    def payload(self):
+        """The first (usually only) payload; coalesced messages carry several in ``items``"""
+        return self.items[0]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'items': len(self.items),
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'sent_at': self.sent_at
+        }
+
+
+class FakeTransport:
+    """Records deliveries in memory instead of sending them (for tests and local runs).
+
+    The first ``fail_times`` deliveries raise, to exercise retries.
+    """
+
+    def __init__(self, fail_times=0, delay=0.0):
+        self.fail_times = fail_times
+        self.delay = delay
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def __call__(self, message):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise ConnectionError('fake transport failure')
+            self.sent.append((message.kind, list(message.items)))
+
+
+class OutboundQueue:
+    """Prioritized delivery queue served by a small pool of worker threads.
+
+    ``transport(message)`` performs the actual delivery and raises on
+    failure; its return value is kept as ``message.result``. Failed
+    messages are retried with exponential backoff up to ``max_attempts``
+    times, unless the exception has ``retryable = False``. Messages
+    submitted with the same ``coalesce_key`` while one is still waiting are
+    merged into it, and coalescible kinds wait ``coalesce_window`` seconds
+    so a burst goes out as one delivery. When ``max_queue`` messages are
+    waiting, a new message displaces the lowest-priority one or is dropped
+    itself.
+    """
+
+    def __init__(self, transport, workers=2, max_attempts=3, backoff=2.0, max_backoff=60.0,
+                 max_queue=1000, coalesce_window=10.0, history=500):
+        self.transport = transport
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_queue = max_queue
+        self.coalesce_window = coalesce_window
+        self.history = history
+
+        self._ready = []
+        self._delayed = []
+        self._waiting = {}
+        self._coalescing = {}
+        self._messages = OrderedDict()
+        self._sequence = itertools.count(1)
+        self._condition = threading.Condition()
+        self._threads = []
+        self._busy = 0
+        self._stopped = False
+
+        self.stats = {
+            'submitted': 0,
+            'sent': 0,
+            'retried': 0,
+            'failed': 0,
+            'coalesced': 0,
+            'dropped': 0
+        }
+
+    def submit(self, kind, payload, coalesce_key=None, on_sent=None, on_failed=None):
+        """Queue ``payload`` for delivery and return the message id"""
+        with self._condition:
+            self.stats['submitted'] += 1
+
+            if coalesce_key is not None:
+                existing = self._coalescing.get(coalesce_key)
+                if existing and existing.status == 'queued':
+                    existing.items.append(payload)
+                    self.stats['coalesced'] += 1
+                    return existing.id
+
+            message = OutboundMessage(next(self._sequence), kind, payload, coalesce_key, on_sent, on_failed)
+            self._remember(message)
+
+            if len(self._waiting) >= self.max_queue and not self._displace(message):
+                message.status = 'dropped'
+                self.stats['dropped'] += 1
+                return message.id
+
+            if coalesce_key is not None:
+                self._coalescing[coalesce_key] = message
+                self._schedule(message, time.monotonic() + self.coalesce_window)
+            else:
+                self._schedule(message)
+
+        self._ensure_workers()
+        return message.id
+
+    def status(self, message_id):
+        """Status of a recent message, or None once it has been forgotten"""
+        with self._condition:
+            message = self._messages.get(message_id)
+            return message.to_dict() if message else None
+
+    def recent(self, limit=50):
+        """Most recent messages, newest first"""
+        with self._condition:
+            messages = list(self._messages.values())[-limit:]
+        return [message.to_dict() for message in reversed(messages)]
+
+    def pending(self):
+        """Messages waiting for delivery or a retry"""
+        with self._condition:
+            return len(self._waiting)
+
+    def metrics(self):
+        with self._condition:
+            return dict(
+                self.stats,
+                pending=len(self._waiting),
+                in_flight=self._busy,
+                workers=len([thread for thread in self._threads if thread.is_alive()])
+            )
+
+    def drain(self, timeout=None):
+        """Block until nothing is waiting or in flight; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._waiting or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Delayed messages become due on their own; poll instead of waiting for a notify
+                self._condition.wait(0.05 if remaining is None else min(remaining, 0.05))
+                self._promote(time.monotonic())
+            return True
+
+    def close(self, timeout=5.0):
+        """Deliver what is due within ``timeout`` and stop the workers"""
+        with self._condition:
+            # Nothing should sit out a coalescing window or backoff at shutdown
+            for _, _, message in self._delayed:
+                heapq.heappush(self._ready, (message.priority, message.id, message))
+            self._delayed = []
+            self._condition.notify_all()
+        self.drain(timeout)
+
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+
+    def _remember(self, message):
+        self._messages[message.id] = message
+        while len(self._messages) > self.history:
+            oldest_id, oldest = next(iter(self._messages.items()))
+            if oldest.status in ('queued', 'sending', 'retrying'):
+                break
+            del self._messages[oldest_id]
+
+    def _schedule(self, message, ready_at=None):
+        self._waiting[message.id] = message
+        if ready_at is None or ready_at <= time.monotonic():
+            heapq.heappush(self._ready, (message.priority, message.id, message))
+        else:
+            heapq.heappush(self._delayed, (ready_at, message.id, message))
+        self._condition.notify()
+
+    def _displace(self, message):
+        # Make room by dropping the newest waiting message of a strictly lower priority
+        victim = max(self._waiting.values(), key=lambda queued: (queued.priority, queued.id), default=None)
+        if not victim or victim.priority <= message.priority:
+            return False
+
+        del self._waiting[victim.id]
+        victim.status = 'dropped'
+        self.stats['dropped'] += 1
+        self._ready = [entry for entry in self._ready if entry[2] is not victim]
+        self._delayed = [entry for entry in self._delayed if entry[2] is not victim]
+        heapq.heapify(self._ready)
+        heapq.heapify(self._delayed)
+        return True
+
+    def _promote(self, now):
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, message = heapq.heappop(self._delayed)
+            heapq.heappush(self._ready, (message.priority, message.id, message))
+
+    def _next_message(self):
+        with self._condition:
+            while not self._stopped:
+                now = time.monotonic()
+                self._promote(now)
+                if self._ready:
+                    _, _, message = heapq.heappop(self._ready)
+                    if message.id not in self._waiting:
+                        continue
+                    del self._waiting[message.id]
+                    if self._coalescing.get(message.coalesce_key) is message:
+                        del self._coalescing[message.coalesce_key]
+                    message.status = 'sending'
+                    self._busy += 1
+                    return message
+
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._condition.wait(timeout)
+            return None
+
+    def _deliver(self, message):
+        message.attempts += 1
+        try:
+            message.result = self.transport(message)
+        except Exception as e:
+            message.error = str(e)
+            with self._condition:
+                self._busy -= 1
+                if message.attempts < self.max_attempts and getattr(e, 'retryable', True):
+                    delay = min(self.max_backoff, self.backoff * 2 ** (message.attempts - 1))
+                    message.status = 'retrying'
+                    self.stats['retried'] += 1
+                    # Jitter keeps a burst of failures from retrying in lockstep
+                    self._schedule(message, time.monotonic() + delay * random.uniform(0.8, 1.2))
+                    return
+                message.status = 'failed'
+                self.stats['failed'] += 1
+                self._condition.notify_all()
+            print(f"Outbound {message.kind} message {message.id} failed after {message.attempts} attempts: {e}")
+            self._callback(message.on_failed, message)
+            return
+
+        with self._condition:
+            self._busy -= 1
+            message.status = 'sent'
+            message.error = None
+            message.sent_at = time.time()
+            self.stats['sent'] += 1
+            self._condition.notify_all()
+        self._callback(message.on_sent, message)
+
+    @staticmethod
+    def _callback(callback, message):
+        if not callback:
+            return
+        try:
+            callback(message)
+        except Exception as e:
+            print(f"Error in outbound {message.kind} callback: {e}")
+
+    def _ensure_workers(self):
+        with self._condition:
+            # Also restarts workers lost across a fork
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            self._stopped = False
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run, name=f'outbound-worker-{len(self._threads) + 1}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            message = self._next_message()
+            if message is None:
+                return
+            self._deliver(message)
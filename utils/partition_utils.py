@@ -0,0 +1,475 @@
+import os
+import re
+import abc
+import glob
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+
+PARTITION_FORMATS = {'day': '%Y%m%d', 'month': '%Y%m'}
+
+# Same layout SQLAlchemy uses for DATETIME columns on SQLite, so bounds compare as strings
+SQLITE_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def partition_range(when, granularity='month'):
+    """Start and end of the partition that holds ``when``"""
+    if granularity == 'day':
+        start = when.replace(hour=0, minute=0, second=0, microsecond=0)
+        return start, start + timedelta(days=1)
+    if granularity == 'month':
+        start = when.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    raise ValueError(f"Unknown partition granularity: {granularity}")
+
+
+def partition_name(table, start, granularity='month'):
+    """Name of the partition of ``table`` starting at ``start``"""
+    return f"{table}_p{start.strftime(PARTITION_FORMATS[granularity])}"
+
+
+class PartitionManager(abc.ABC):
+    """Keeps time-partitioned log tables covered and drops expired partitions.
+
+    ``tables`` maps a table name to its timestamp column. The current
+    partition and the next ``precreate`` ones always exist; a partition is
+    dropped as a whole once its end is older than ``retention_days``.
+    Subclasses implement ``partitions``, ``create_partition`` and
+    ``drop_partition`` for their database.
+    """
+
+    def __init__(self, db, tables, granularity='month', retention_days=90, precreate=1):
+        if granularity not in PARTITION_FORMATS:
+            raise ValueError(f"Unknown partition granularity: {granularity}")
+
+        self.db = db
+        self.tables = dict(tables)
+        self.granularity = granularity
+        self.retention_days = retention_days
+        self.precreate = precreate
+        self._lock = threading.Lock()
+
+    def upcoming_ranges(self, now=None):
+        """The current partition range and the ones created ahead of time"""
+        start, end = partition_range(now or datetime.utcnow(), self.granularity)
+        ranges = [(start, end)]
+        for _ in range(self.precreate):
+            start, end = partition_range(end, self.granularity)
+            ranges.append((start, end))
+        return ranges
+
+    def max_partitions(self):
+        """Most partitions one table can have at once, or None if they never expire"""
+        if not self.retention_days:
+            return None
+        # Periods overlapping the retention window (months are at least 28 days), plus those made ahead
+        shortest = 28 if self.granularity == 'month' else 1
+        return -(-self.retention_days // shortest) + 1 + self.precreate
+
+    def is_expired(self, end, now=None):
+        """True once every row a partition can hold is past retention"""
+        if not self.retention_days or end is None:
+            return False
+        return end <= (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+
+    def maintain(self, now=None):
+        """Create upcoming partitions and drop expired ones"""
+        if not self._lock.acquire(blocking=False):
+            return {'created': [], 'dropped': []}
+
+        try:
+            self.refresh()
+            created = []
+            dropped = []
+            for table in self.tables:
+                existing = {name for name, _, _ in self.partitions(table)}
+                for start, end in self.upcoming_ranges(now):
+                    name = partition_name(table, start, self.granularity)
+                    if name not in existing and self.create_partition(table, start, end):
+                        created.append(name)
+
+                for name, _, end in self.partitions(table):
+                    if self.is_expired(end, now):
+                        self.drop_partition(table, name)
+                        dropped.append(name)
+            return {'created': created, 'dropped': dropped}
+        finally:
+            self._lock.release()
+
+    def install(self):
+        """Hook the manager into the database engine"""
+
+    def refresh(self):
+        """Re-read the partitions that exist (other processes may have added some)"""
+
+    def ensure_partitioned(self, table):
+        """Convert ``table`` to partitioned storage; returns True if it was converted"""
+        return False
+
+    def legacy_table(self, table):
+        """Table still holding rows written before partitioning, if any"""
+        return None
+
+    @abc.abstractmethod
+    def partitions(self, table):
+        """``(name, start, end)`` for each partition of ``table``, oldest first"""
+
+    @abc.abstractmethod
+    def create_partition(self, table, start, end):
+        """Create the partition of ``table`` for ``start``..``end``; returns True if it was created"""
+
+    @abc.abstractmethod
+    def drop_partition(self, table, name):
+        """Drop a partition of ``table`` and every row in it"""
+
+
+def sqlite_attach_limit():
+    """Databases one SQLite connection can attach (10 unless SQLite was built otherwise)"""
+    connection = sqlite3.connect(':memory:')
+    try:
+        return connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    except AttributeError:
+        # Connection.getlimit is new in Python 3.11
+        return 10
+    finally:
+        connection.close()
+
+
+class SQLitePartitionManager(PartitionManager):
+    """Partitions stored as one attached database file per period.
+
+    Each file holds that period's partition of every table. Every pooled
+    connection attaches the files and gets a TEMP view named after each
+    table, which shadows the original (now legacy) table for unqualified
+    queries. INSTEAD OF triggers route inserts into the partition covering
+    the row's timestamp and deletes into every partition, so the models keep
+    working unchanged. A file is detached and unlinked once every partition
+    in it has been dropped.
+    """
+
+    def __init__(self, db, tables, directory, **kwargs):
+        super().__init__(db, tables, **kwargs)
+        self.directory = directory
+        self.generation = 0
+        self._partitions = {table: {} for table in self.tables}
+
+        needed = self.max_partitions()
+        limit = sqlite_attach_limit()
+        if needed is None or needed > limit:
+            raise ValueError(
+                f"SQLite log partitioning can attach at most {limit} partition files, but "
+                f"{self.granularity} partitions kept for {self.retention_days or 'unlimited'} days "
+                f"with {self.precreate} created ahead need up to {needed or 'unlimited'}; "
+                f"use month partitions or a shorter retention"
+            )
+
+    def install(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.refresh()
+        event.listen(self.db.engine, 'checkout', self._on_checkout)
+
+    def refresh(self):
+        found = {table: {} for table in self.tables}
+        pattern = re.compile(r"^p(\d+)\.db$")
+        for path in glob.glob(os.path.join(self.directory, "p*.db")):
+            match = pattern.match(os.path.basename(path))
+            if not match:
+                continue
+            try:
+                start = datetime.strptime(match.group(1), PARTITION_FORMATS[self.granularity])
+            except ValueError:
+                continue
+            end = partition_range(start, self.granularity)[1]
+            connection = sqlite3.connect(path)
+            try:
+                names = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            except sqlite3.Error:
+                continue
+            finally:
+                connection.close()
+            for table in self.tables:
+                name = partition_name(table, start, self.granularity)
+                if name in names:
+                    found[table][name] = (start, end, path)
+
+        if found != self._partitions:
+            self._partitions = found
+            self.generation += 1
+
+    def partitions(self, table):
+        return sorted(
+            ((name, start, end) for name, (start, end, _) in self._partitions.get(table, {}).items()),
+            key=lambda partition: partition[1]
+        )
+
+    def legacy_table(self, table):
+        return f"main.{table}"
+
+    def create_partition(self, table, start, end):
+        name = partition_name(table, start, self.granularity)
+        statements = self._partition_ddl(table, name)
+        if not statements:
+            # The base table does not exist yet; nothing to copy the schema from
+            return False
+
+        path = self._path(start)
+        connection = sqlite3.connect(path)
+        try:
+            for statement in statements:
+                connection.execute(statement)
+            connection.commit()
+        finally:
+            connection.close()
+
+        self._partitions[table][name] = (start, end, path)
+        self.generation += 1
+        return True
+
+    def drop_partition(self, table, name):
+        _, _, path = self._partitions[table].pop(name)
+        self.generation += 1
+
+        # Every table's partition for a period expires at once; the file goes with the last of them
+        if any(entry[2] == path for partitions in self._partitions.values() for entry in partitions.values()):
+            return
+
+        # Pooled connections detach it on their next checkout; their open
+        # handles keep the unlinked file readable until then
+        for suffix in ('', '-journal', '-wal', '-shm'):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def _schema(self, start):
+        """Name the file for the period starting at ``start`` is attached as"""
+        return f"p{start.strftime(PARTITION_FORMATS[self.granularity])}"
+
+    def _path(self, start):
+        return os.path.join(self.directory, f"{self._schema(start)}.db")
+
+    def _partition_ddl(self, table, name):
+        rows = self.db.session.execute(
+            text("SELECT type, sql FROM main.sqlite_master WHERE tbl_name = :table AND sql IS NOT NULL"),
+            {'table': table}
+        ).all()
+
+        statements = []
+        table_pattern = re.compile(rf'^CREATE TABLE\s+"?{re.escape(table)}"?', re.IGNORECASE)
+        index_pattern = re.compile(
+            rf'^CREATE\s+(UNIQUE\s+)?INDEX\s+"?(\w+)"?\s+ON\s+"?{re.escape(table)}"?', re.IGNORECASE
+        )
+        for kind, sql in rows:
+            if kind == 'table':
+                sql = table_pattern.sub(f'CREATE TABLE IF NOT EXISTS "{name}"', sql)
+                # Parent tables live in another file, so foreign keys cannot be enforced here
+                sql = re.sub(r',\s*FOREIGN KEY\s*\([^)]*\)\s*REFERENCES\s+"?\w+"?\s*\([^)]*\)', '', sql)
+                statements.insert(0, sql)
+            elif kind == 'index':
+                sql = index_pattern.sub(
+                    lambda match: f'CREATE {match.group(1) or ""}INDEX IF NOT EXISTS '
+                                  f'"{name}_{match.group(2)}" ON "{name}"',
+                    sql
+                )
+                statements.append(sql)
+        return statements if rows else []
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info.get('partition_generation') != self.generation:
+            generation = self.generation
+            self._sync_connection(dbapi_connection)
+            connection_record.info['partition_generation'] = generation
+
+    def _sync_connection(self, connection):
+        cursor = connection.cursor()
+        try:
+            wanted = {}
+            for table in self.tables:
+                cursor.execute(f'DROP VIEW IF EXISTS temp."{table}"')
+                for start, _, path in self._partitions[table].values():
+                    wanted[self._schema(start)] = path
+
+            attached = {row[1] for row in cursor.execute('PRAGMA database_list').fetchall()}
+            for schema in attached - {'main', 'temp'} - set(wanted):
+                if re.match(r'^p\d+$', schema):
+                    cursor.execute(f'DETACH DATABASE "{schema}"')
+            for schema, path in wanted.items():
+                if schema not in attached:
+                    cursor.execute(f'ATTACH DATABASE ? AS "{schema}"', (path,))
+
+            for table, timestamp_column in self.tables.items():
+                partitions = self.partitions(table)
+                if not partitions:
+                    continue
+                columns = [row[1] for row in cursor.execute(f'PRAGMA main.table_info("{table}")').fetchall()]
+                if not columns:
+                    continue
+                for statement in self._routing_ddl(table, timestamp_column, columns, partitions):
+                    cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    def _routing_ddl(self, table, timestamp_column, columns, partitions):
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        sources = [f'main."{table}"'] + [f'"{self._schema(start)}"."{name}"' for name, start, _ in partitions]
+
+        view = f'CREATE TEMP VIEW "{table}" AS ' + ' UNION ALL '.join(
+            f'SELECT {column_list} FROM {source}' for source in sources
+        )
+
+        # Ids stay unique across files: each partition's MAX(id) is an index lookup
+        next_id = (
+            'COALESCE(NEW."id", (SELECT MAX(id) FROM (' +
+            ' UNION ALL '.join(f'SELECT MAX("id") AS id FROM {source}' for source in sources) +
+            ')) + 1, 1)'
+        )
+        values = ', '.join(next_id if column == 'id' else f'NEW."{column}"' for column in columns)
+
+        inserts = []
+        for position, (name, start, end) in enumerate(partitions):
+            # The oldest and newest partitions also catch rows outside every range
+            conditions = []
+            if position > 0:
+                conditions.append(f"NEW.\"{timestamp_column}\" >= '{start.strftime(SQLITE_DATETIME_FORMAT)}'")
+            if position < len(partitions) - 1:
+                conditions.append(
+                    f"(NEW.\"{timestamp_column}\" < '{end.strftime(SQLITE_DATETIME_FORMAT)}' "
+                    f"OR NEW.\"{timestamp_column}\" IS NULL)"
+                )
+            inserts.append(
+                f'INSERT INTO "{name}" ({column_list}) SELECT {values} WHERE {" AND ".join(conditions) or "1"};'
+            )
+
+        deletes = [f'DELETE FROM "{name}" WHERE "id" = OLD."id";' for name, _, _ in partitions]
+
+        return [
+            view,
+            f'CREATE TEMP TRIGGER "{table}_partition_insert" INSTEAD OF INSERT ON "{table}" '
+            f'BEGIN {" ".join(inserts)} END',
+            f'CREATE TEMP TRIGGER "{table}_partition_delete" INSTEAD OF DELETE ON "{table}" '
+            f'BEGIN {" ".join(deletes)} END'
+        ]
+
+
+class PostgresPartitionManager(PartitionManager):
+    """Native PostgreSQL range partitions on the timestamp column.
+
+    ``ensure_partitioned`` converts an existing table once: the old table is
+    renamed to ``<table>_legacy`` and attached as the partition for
+    everything up to the end of the current period, so no rows are copied.
+    A default partition catches rows outside every range.
+    """
+
+    def refresh(self):
+        pass
+
+    def is_partitioned(self, table):
+        kind = self.db.session.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {'table': table}
+        ).scalar()
+        return kind == 'p'
+
+    def ensure_partitioned(self, table):
+        if self.is_partitioned(table):
+            return False
+
+        timestamp_column = self.tables[table]
+        legacy = f"{table}_legacy"
+        _, legacy_end = partition_range(datetime.utcnow(), self.granularity)
+        index_columns = self._index_columns(table)
+
+        try:
+            self.db.session.execute(text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+            sequence = self.db.session.execute(
+                text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': legacy}
+            ).scalar()
+            self.db.session.execute(text(
+                f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                f'PARTITION BY RANGE ("{timestamp_column}")'
+            ))
+            # Unique constraints on a partitioned table must include the partition key
+            self.db.session.execute(text(f'ALTER TABLE "{table}" ADD PRIMARY KEY ("id", "{timestamp_column}")'))
+            if sequence:
+                # Keep the id sequence alive when the legacy partition is dropped
+                self.db.session.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{table}"."id"'))
+            self.db.session.execute(text(
+                f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" '
+                f"FOR VALUES FROM (MINVALUE) TO ('{legacy_end.isoformat(sep=' ')}')"
+            ))
+            self.db.session.execute(text(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT'))
+            for column in index_columns:
+                self.db.session.execute(text(f'CREATE INDEX ON "{table}" ("{column}")'))
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        return True
+
+    def partitions(self, table):
+        rows = self.db.session.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:table)"
+        ), {'table': table}).all()
+
+        partitions = []
+        for name, bound in rows:
+            match = re.search(r"FROM \((.+?)\) TO \((.+?)\)", bound or '')
+            if not match:
+                # The default partition is never dropped
+                continue
+            start, end = (self._parse_bound(value) for value in match.groups())
+            partitions.append((name, start, end))
+        return sorted(partitions, key=lambda partition: partition[1] or datetime.min)
+
+    def create_partition(self, table, start, end):
+        if not self.is_partitioned(table):
+            return False
+
+        name = partition_name(table, start, self.granularity)
+        try:
+            self.db.session.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start.isoformat(sep=' ')}') TO ('{end.isoformat(sep=' ')}')"
+            ))
+            self.db.session.commit()
+        except Exception as e:
+            # Fails if the default partition already holds rows for this range
+            self.db.session.rollback()
+            print(f"Error creating partition {name}: {e}")
+            return False
+        return True
+
+    def drop_partition(self, table, name):
+        try:
+            self.db.session.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            self.db.session.execute(text(f'DROP TABLE "{name}"'))
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+    def _index_columns(self, table):
+        rows = self.db.session.execute(text(
+            "SELECT a.attname FROM pg_index x "
+            "JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = x.indkey[0] "
+            "WHERE x.indrelid = to_regclass(:table) AND x.indnatts = 1 AND NOT x.indisprimary"
+        ), {'table': table}).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _parse_bound(value):
+        if value in ('MINVALUE', 'MAXVALUE'):
+            return None
+        return datetime.fromisoformat(value.strip("'"))
+
+
+def create_partition_manager(db, tables, directory=None, **kwargs):
+    """Pick the partition manager for the configured database, or None if unsupported"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return SQLitePartitionManager(db, tables, directory, **kwargs)
+    if dialect == 'postgresql':
+        return PostgresPartitionManager(db, tables, **kwargs)
+    print(f"Log partitioning is not supported on {dialect}; using a single table")
+    return None
@@ -0,0 +1,136 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+try:
+    from argon2 import PasswordHasher as Argon2Hasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+PASSWORD_SCHEMES = ('pbkdf2', 'scrypt', 'argon2')
+OFFLOAD_MODES = ('none', 'thread', 'process')
+
+
+def _hash_password(scheme, params, password):
+    if scheme == 'argon2':
+        return Argon2Hasher(**params).hash(password)
+    return generate_password_hash(password, method=params['method'])
+
+
+def _check_password(stored_hash, password):
+    """Check ``password`` against a hash made by any supported scheme"""
+    if stored_hash.startswith('$argon2'):
+        if not ARGON2_AVAILABLE:
+            print("Cannot check an argon2 password hash: argon2-cffi is not installed")
+            return False
+        try:
+            # Cost parameters are read from the hash itself
+            return Argon2Hasher().verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(stored_hash, password)
+
+
+class PasswordHasher:
+    """Hashes passwords with one scheme and cost; checks hashes made with any of them.
+
+    ``needs_rehash`` flags a hash made with another scheme or cost, so it can
+    be replaced after the next successful login. With ``offload`` 'thread'
+    or 'process', hashing and checking run in a pool of ``workers``: at most
+    that many hashes are computed at once, and with processes the web
+    worker's GIL stays free while they run. The hash functions release the
+    GIL themselves, so threads already let a threaded worker serve other
+    requests meanwhile.
+    """
+
+    def __init__(self, scheme='pbkdf2', pbkdf2_iterations=600000, scrypt_n=32768, scrypt_r=8, scrypt_p=1,
+                 argon2_time_cost=3, argon2_memory_cost=65536, argon2_parallelism=4, offload='none', workers=2):
+        if scheme not in PASSWORD_SCHEMES:
+            raise ValueError(f"Unknown password hashing scheme: {scheme}")
+        if offload not in OFFLOAD_MODES:
+            raise ValueError(f"Unknown password hashing offload mode: {offload}")
+        if scheme == 'argon2' and not ARGON2_AVAILABLE:
+            print("argon2-cffi is not installed; hashing passwords with scrypt")
+            scheme = 'scrypt'
+
+        self.scheme = scheme
+        if scheme == 'argon2':
+            self.params = {
+                'time_cost': argon2_time_cost,
+                'memory_cost': argon2_memory_cost,
+                'parallelism': argon2_parallelism
+            }
+            self._argon2 = Argon2Hasher(**self.params)
+        elif scheme == 'scrypt':
+            self.params = {'method': f'scrypt:{scrypt_n}:{scrypt_r}:{scrypt_p}'}
+        else:
+            self.params = {'method': f'pbkdf2:sha256:{pbkdf2_iterations}'}
+
+        self.offload = offload
+        self.workers = workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.stats = {'hashed': 0, 'checked': 0, 'check_seconds': 0.0}
+
+    def hash(self, password):
+        """Hash ``password`` with the configured scheme and cost"""
+        password_hash = self._run(_hash_password, self.scheme, self.params, password)
+        with self._lock:
+            self.stats['hashed'] += 1
+        return password_hash
+
+    def check(self, stored_hash, password):
+        """True if ``password`` matches ``stored_hash``"""
+        if not stored_hash:
+            return False
+        started = time.perf_counter()
+        valid = self._run(_check_password, stored_hash, password)
+        with self._lock:
+            self.stats['checked'] += 1
+            self.stats['check_seconds'] += time.perf_counter() - started
+        return valid
+
+    def needs_rehash(self, stored_hash):
+        """True if ``stored_hash`` was made with another scheme or cost"""
+        if self.scheme == 'argon2':
+            if not stored_hash.startswith('$argon2'):
+                return True
+            try:
+                return self._argon2.check_needs_rehash(stored_hash)
+            except InvalidHashError:
+                return True
+        return stored_hash.split('$', 1)[0] != self.params['method']
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['check_ms'] = stats.pop('check_seconds') / stats['checked'] * 1000 if stats['checked'] else 0.0
+        return dict(stats, scheme=self.scheme, params=self.params, offload=self.offload, workers=self.workers)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor and self._pid == os.getpid():
+            executor.shutdown(wait=False)
+
+    def _run(self, function, *args):
+        if self.offload == 'none':
+            return function(*args)
+        return self._get_executor().submit(function, *args).result()
+
+    def _get_executor(self):
+        with self._lock:
+            # Started on first use, and again in a forked child, which does not inherit the workers
+            if self._executor is None or self._pid != os.getpid():
+                if self.offload == 'process':
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hasher')
+                self._pid = os.getpid()
+            return self._executor
@@ -0,0 +1,180 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+
+class RetentionPolicy:
+    def __init__(self, table, max_rows=None, max_age_days=None, timestamp_column='timestamp',
+                 id_column='id', batch_size=1000, max_batches=100, pause=0.0, condition=None,
+                 name=None, max_age_hours=None):
+        self.table = table
+        self.name = name or table
+        self.condition = condition
+        self.max_age_hours = max_age_hours or None
+        self.max_rows = max_rows or None
+        self.max_age_days = max_age_days or None
+        self.timestamp_column = timestamp_column
+        self.id_column = id_column
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.pause = pause
+
+    def is_enabled(self):
+        """Return True if the policy trims anything at all"""
+        return bool(self.max_rows or self.max_age_days or self.max_age_hours)
+
+    def age_cutoff(self):
+        """Oldest timestamp kept by the age rule, or None"""
+        if self.max_age_hours:
+            return datetime.utcnow() - timedelta(hours=self.max_age_hours)
+        if self.max_age_days:
+            return datetime.utcnow() - timedelta(days=self.max_age_days)
+        return None
+
+    def describe(self):
+        """Human readable summary of the policy"""
+        rules = []
+        if self.max_rows:
+            rules.append(f"keep last {self.max_rows} rows")
+        if self.max_age_hours:
+            rules.append(f"keep last {self.max_age_hours} hours")
+        elif self.max_age_days:
+            rules.append(f"keep last {self.max_age_days} days")
+        if self.condition:
+            rules.append(f"where {self.condition}")
+        return f"{self.name}: {', '.join(rules) or 'disabled'}"
+
+
+class RetentionManager:
+    """Enforces per-table retention policies out of band.
+
+    Row caps are applied against a high-water mark on the primary key, so
+    nothing on the write path has to count rows. Deletes run as bounded
+    ``DELETE ... WHERE id IN (SELECT ... LIMIT n)`` batches with a commit
+    per batch, which keeps write locks short on SQLite.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.policies = {}
+        self.high_water_marks = {}
+        self.trimmed_through = {}
+        self._lock = threading.Lock()
+
+    def add_policy(self, policy):
+        """Register (or replace) a retention policy; policies are keyed by name"""
+        self.policies[policy.name] = policy
+        self.trimmed_through.pop(policy.name, None)
+        return policy
+
+    def get_high_water_mark(self, name):
+        """Read the current maximum id of a policy's table (a single index lookup)"""
+        policy = self.policies[name]
+        result = self.db.session.execute(
+            text(f"SELECT MAX({policy.id_column}) FROM {policy.table}")
+        ).scalar()
+        high_water = result or 0
+        self.high_water_marks[name] = high_water
+        return high_water
+
+    def delete_in_batches(self, policy, where_sql, params=None, progress=None):
+        """Delete rows matching ``where_sql`` in bounded, separately committed batches"""
+        params = dict(params or {})
+        params['batch_size'] = policy.batch_size
+        if policy.condition:
+            where_sql = f"({where_sql}) AND ({policy.condition})"
+        statement = text(
+            f"DELETE FROM {policy.table} WHERE {policy.id_column} IN ("
+            f"SELECT {policy.id_column} FROM {policy.table} WHERE {where_sql} "
+            f"ORDER BY {policy.id_column} LIMIT :batch_size)"
+        )
+
+        deleted = 0
+        batches = 0
+        started = time.perf_counter()
+
+        while not policy.max_batches or batches < policy.max_batches:
+            result = self.db.session.execute(statement, params)
+            self.db.session.commit()
+
+            batch_deleted = result.rowcount or 0
+            if batch_deleted <= 0:
+                break
+
+            deleted += batch_deleted
+            batches += 1
+
+            if progress:
+                progress(policy.name, deleted, batches)
+
+            if batch_deleted < policy.batch_size:
+                break
+
+            # Yield between chunks so request threads can grab the write lock
+            time.sleep(policy.pause)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'table': policy.table,
+            'deleted': deleted,
+            'batches': batches,
+            'elapsed': elapsed,
+            'rows_per_second': deleted / elapsed if elapsed > 0 else 0.0
+        }
+
+    def enforce(self, name, progress=None):
+        """Apply one retention policy"""
+        policy = self.policies.get(name)
+        table = policy.table if policy else name
+        if not policy or not policy.is_enabled():
+            return {'name': name, 'table': table, 'deleted': 0, 'batches': 0, 'elapsed': 0.0, 'rows_per_second': 0.0}
+
+        totals = {'name': name, 'table': table, 'deleted': 0, 'batches': 0, 'elapsed': 0.0}
+
+        if policy.max_rows:
+            high_water = self.get_high_water_mark(name)
+            cutoff_id = high_water - policy.max_rows
+
+            # Nothing new has crossed the cap since the last trim
+            if cutoff_id > self.trimmed_through.get(name, 0):
+                stats = self.delete_in_batches(
+                    policy, f"{policy.id_column} <= :cutoff_id", {'cutoff_id': cutoff_id}, progress
+                )
+                self._merge_stats(totals, stats)
+
+                if not policy.max_batches or stats['batches'] < policy.max_batches:
+                    self.trimmed_through[name] = cutoff_id
+
+        cutoff = policy.age_cutoff()
+        if cutoff:
+            stats = self.delete_in_batches(
+                policy, f"{policy.timestamp_column} < :cutoff", {'cutoff': cutoff}, progress
+            )
+            self._merge_stats(totals, stats)
+
+        totals['rows_per_second'] = totals['deleted'] / totals['elapsed'] if totals['elapsed'] > 0 else 0.0
+        return totals
+
+    def enforce_all(self, progress=None):
+        """Apply every registered policy; skips the run if another one is in progress"""
+        if not self._lock.acquire(blocking=False):
+            return []
+
+        try:
+            results = []
+            for name in list(self.policies):
+                try:
+                    results.append(self.enforce(name, progress))
+                except Exception as e:
+                    self.db.session.rollback()
+                    print(f"Error enforcing retention for {name}: {e}")
+            return results
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _merge_stats(totals, stats):
+        totals['deleted'] += stats['deleted']
+        totals['batches'] += stats['batches']
+        totals['elapsed'] += stats['elapsed']
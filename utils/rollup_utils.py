@@ -0,0 +1,29 @@
+from collections import Counter
+
+
+def bucket_start(timestamp, granularity='minute'):
+    """Truncate a datetime to the start of its rollup bucket"""
+    if granularity == 'minute':
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+
+def aggregate_rollups(rows, source, dimensions, granularities=('minute',), timestamp_key='timestamp', default='N/A'):
+    """Count rows per (granularity, bucket, source, dimension, value).
+
+    ``rows`` are dicts; ``dimensions`` names the keys to count by. Missing
+    values are counted under ``default`` so they still land in a bucket.
+    """
+    counts = Counter()
+    for row in rows:
+        timestamp = row[timestamp_key]
+        for granularity in granularities:
+            bucket = bucket_start(timestamp, granularity)
+            for dimension in dimensions:
+                value = row.get(dimension) or default
+                counts[(granularity, bucket, source, dimension, value)] += 1
+    return counts
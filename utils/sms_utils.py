@@ -0,0 +1,154 @@
+import abc
+import time
+import random
+import threading
+
+from utils.outbound_utils import OutboundQueue
+
+try:
+    from twilio.rest import Client
+    from twilio.http.http_client import TwilioHttpClient
+    from twilio.base.exceptions import TwilioRestException
+    TWILIO_AVAILABLE = True
+except ImportError:
+    TWILIO_AVAILABLE = False
+
+
+class SMSDeliveryError(Exception):
+    """An SMS provider refused or failed a message"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class SMSProvider(abc.ABC):
+    """Interface for SMS providers: ``send`` returns the provider's message id or raises"""
+
+    name = 'base'
+
+    def __init__(self, timeout=5.0):
+        self.timeout = timeout
+
+    @abc.abstractmethod
+    def send(self, to, body):
+        """Send ``body`` to ``to``; raises SMSDeliveryError if the provider refuses or fails it"""
+
+
+class TwilioProvider(SMSProvider):
+    """Twilio REST API with a bounded HTTP timeout and keep-alive connections"""
+
+    name = 'twilio'
+
+    def __init__(self, account_sid, auth_token, from_number, timeout=5.0):
+        super().__init__(timeout)
+        if not TWILIO_AVAILABLE:
+            raise RuntimeError('twilio is not installed')
+        self.from_number = from_number
+        self.client = Client(account_sid, auth_token, http_client=TwilioHttpClient(timeout=timeout))
+
+    def send(self, to, body):
+        try:
+            message = self.client.messages.create(body=body, from_=self.from_number, to=to)
+        except TwilioRestException as e:
+            # Bad numbers and auth problems will not fix themselves; throttling and 5xx might
+            retryable = e.status == 429 or e.status >= 500
+            raise SMSDeliveryError(f"Twilio error {e.status}: {e.msg}", retryable=retryable) from e
+        return message.sid
+
+
+class FakeSMSProvider(SMSProvider):
+    """In-process stand-in that simulates provider latency and failures.
+
+    Each send sleeps ``latency`` seconds (plus up to ``jitter``) and fails
+    with probability ``failure_rate``. Delivered messages are kept in
+    ``sent`` so tests can inspect them.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, timeout=5.0, seed=None):
+        super().__init__(timeout)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.sent = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def send(self, to, body):
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+
+        if delay > self.timeout:
+            time.sleep(self.timeout)
+            raise SMSDeliveryError(f"Fake provider timed out after {self.timeout}s")
+        time.sleep(delay)
+        if fail:
+            raise SMSDeliveryError('Fake provider failure')
+
+        with self._lock:
+            self._sequence += 1
+            self.sent.append((to, body))
+            return f"FAKE{self._sequence:08d}"
+
+
+class SMSDispatcher:
+    """Non-blocking SMS delivery through a provider.
+
+    ``submit`` returns a message id immediately; a bounded pool of workers
+    sends through ``provider`` with exponential retry, and outcomes are
+    tracked per message and in aggregate. With a ``breaker``, sends fail
+    fast while the provider is known to be down.
+    """
+
+    def __init__(self, provider, workers=2, max_attempts=3, backoff=1.0, max_queue=1000, breaker=None):
+        self.provider = provider
+        self.breaker = breaker
+        self.queue = OutboundQueue(
+            self._deliver,
+            workers=workers,
+            max_attempts=max_attempts,
+            backoff=backoff,
+            max_queue=max_queue
+        )
+        self._latencies = []
+        self._lock = threading.Lock()
+
+    def submit(self, to, body, kind='otp', on_sent=None, on_failed=None):
+        """Queue one SMS and return its message id"""
+        return self.queue.submit(kind, {'to': to, 'body': body}, on_sent=on_sent, on_failed=on_failed)
+
+    def status(self, message_id):
+        return self.queue.status(message_id)
+
+    def drain(self, timeout=None):
+        return self.queue.drain(timeout)
+
+    def close(self, timeout=5.0):
+        self.queue.close(timeout)
+
+    def metrics(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        metrics = dict(self.queue.metrics(), provider=self.provider.name, timeout=self.provider.timeout)
+        if self.breaker:
+            metrics['breaker'] = self.breaker.state
+        if latencies:
+            metrics['p50_ms'] = latencies[len(latencies) // 2] * 1000
+            metrics['p95_ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        return metrics
+
+    def _deliver(self, message):
+        started = time.perf_counter()
+        try:
+            if self.breaker:
+                return self.breaker.call(self.provider.send, message.payload['to'], message.payload['body'])
+            return self.provider.send(message.payload['to'], message.payload['body'])
+        finally:
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+                # A rolling sample is enough for percentiles
+                del self._latencies[:-1000]
@@ -0,0 +1,194 @@
+import time
+import smtplib
+import threading
+from contextlib import contextmanager
+
+# Errors that mean the session is gone and a fresh connection may succeed
+DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP sessions open between messages.
+
+    A connection that has been idle for longer than ``health_check_after``
+    seconds is probed with NOOP before reuse; idle connections older than
+    ``idle_timeout`` are closed instead. If the server drops a session
+    mid-send the message is retried once on a fresh connection.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True, use_ssl=False,
+                 max_size=4, timeout=10.0, idle_timeout=120.0, health_check_after=5.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+
+        self._idle = []
+        self._open = 0
+        self._condition = threading.Condition()
+        self.stats = {
+            'connects': 0,
+            'reuses': 0,
+            'health_checks': 0,
+            'reconnects': 0,
+            'discarded': 0,
+            'sends': 0
+        }
+
+    def send(self, from_addr, to_addrs, message):
+        """Send one message (a string or bytes) using a pooled session"""
+        return self.run(lambda smtp: smtp.sendmail(from_addr, to_addrs, message))
+
+    def run(self, operation):
+        """Call ``operation(smtp)`` on a pooled session, reconnecting once if it was dropped"""
+        for attempt in range(2):
+            try:
+                with self.connection() as smtp:
+                    result = operation(smtp)
+                    self.stats['sends'] += 1
+                    return result
+            except DISCONNECT_ERRORS:
+                if attempt:
+                    raise
+                self.stats['reconnects'] += 1
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connected, authenticated session"""
+        smtp = self._acquire()
+        try:
+            yield smtp
+        except DISCONNECT_ERRORS:
+            self._discard(smtp)
+            raise
+        except smtplib.SMTPRecipientsRefused:
+            # The session itself is fine
+            self._release(smtp)
+            raise
+        except Exception:
+            # Unknown state mid-transaction; do not hand it to the next sender
+            self._discard(smtp)
+            raise
+        else:
+            self._release(smtp)
+
+    def close(self):
+        """Close every idle session"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            self._discard(smtp)
+
+    def metrics(self):
+        with self._condition:
+            return dict(self.stats, open=self._open, idle=len(self._idle), max_size=self.max_size)
+
+    def _acquire(self):
+        while True:
+            with self._condition:
+                while not self._idle and self._open >= self.max_size:
+                    self._condition.wait()
+                if self._idle:
+                    smtp, released_at = self._idle.pop()
+                else:
+                    self._open += 1
+                    smtp = None
+
+            if smtp is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._condition:
+                        self._open -= 1
+                        self._condition.notify()
+                    raise
+
+            idle_for = time.monotonic() - released_at
+            if idle_for > self.idle_timeout:
+                self._discard(smtp)
+                continue
+            if idle_for > self.health_check_after and not self._is_alive(smtp):
+                self._discard(smtp)
+                continue
+
+            self.stats['reuses'] += 1
+            return smtp
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls and not self.use_ssl:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.stats['connects'] += 1
+        return smtp
+
+    def _is_alive(self, smtp):
+        self.stats['health_checks'] += 1
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _release(self, smtp):
+        with self._condition:
+            self._idle.append((smtp, time.monotonic()))
+            self._condition.notify()
+
+    def _discard(self, smtp):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+        with self._condition:
+            self._open -= 1
+            self.stats['discarded'] += 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(host, port, username=None, password=None, **options):
+    """Shared pool for a server and login; every caller with the same account reuses it"""
+    key = (host, port, username)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.password != password:
+            if pool:
+                pool.close()
+            pool = SMTPConnectionPool(host, port, username, password, **options)
+            _pools[key] = pool
+        return pool
+
+
+def smtp_pool_metrics():
+    """Metrics for every shared pool"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return [
+        dict(pool.metrics(), host=host, port=port, username=username)
+        for (host, port, username), pool in pools
+    ]
+
+
+def close_smtp_pools():
+    """Close idle sessions in every shared pool"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
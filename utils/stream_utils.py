@@ -0,0 +1,153 @@
+import json
+import time
+import queue
+import threading
+
+
+def format_sse(data, event=None, event_id=None, retry=None):
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if retry is not None:
+        lines.append(f"retry: {int(retry)}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    for line in json.dumps(data, default=str).splitlines() or ['']:
+        lines.append(f"data: {line}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def snapshot_diff(previous, current):
+    """Top-level keys of ``current`` whose values differ from ``previous``"""
+    if previous is None:
+        return dict(current)
+    return {key: value for key, value in current.items() if previous.get(key) != value}
+
+
+class StreamLimitReached(Exception):
+    """Every stream slot is taken; the client should poll instead"""
+
+
+class SnapshotBroadcaster:
+    """Shares one periodically computed snapshot between many stream subscribers.
+
+    A single producer thread calls ``producer()`` every ``interval`` seconds
+    while at least one subscriber is connected, and pushes only the keys that
+    changed. The thread stops when the last subscriber leaves, so idle
+    dashboards cost nothing. Each open stream holds a server thread, so at
+    most ``max_subscribers`` are served at once.
+    """
+
+    def __init__(self, producer, interval=5.0, heartbeat=15.0, retry_ms=5000, max_queue=20, max_subscribers=None):
+        self.producer = producer
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._snapshot = None
+        self._event_id = 0
+        self.stats = {'snapshots': 0, 'events': 0, 'errors': 0, 'refused': 0}
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def latest(self):
+        """Most recent snapshot, computing one if the producer has not run yet"""
+        with self._lock:
+            snapshot, event_id = self._snapshot, self._event_id
+        if snapshot is None:
+            snapshot = self._produce()
+            event_id = self._publish(snapshot)
+        return event_id, snapshot
+
+    def subscribe(self):
+        """Register a new subscriber queue; raises StreamLimitReached when every slot is taken"""
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                self.stats['refused'] += 1
+                raise StreamLimitReached(f"{self.max_subscribers} streams already open")
+            self._subscribers.add(subscriber)
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='snapshot-broadcaster', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, max_duration=None, subscriber=None):
+        """Generator of SSE messages for one client: full snapshot first, then diffs"""
+        if subscriber is None:
+            subscriber = self.subscribe()
+        started = time.monotonic()
+        try:
+            event_id, snapshot = self.latest()
+            yield format_sse(snapshot, event='snapshot', event_id=event_id, retry=self.retry_ms)
+
+            while not max_duration or time.monotonic() - started < max_duration:
+                try:
+                    event, event_id, data = subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Comment lines keep proxies from closing an idle connection
+                    yield ': heartbeat\n\n'
+                    continue
+                yield format_sse(data, event=event, event_id=event_id)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _produce(self):
+        try:
+            snapshot = self.producer()
+            self.stats['snapshots'] += 1
+            return snapshot
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Error producing dashboard snapshot: {e}")
+            return self._snapshot or {}
+
+    def _publish(self, snapshot):
+        with self._lock:
+            changes = snapshot_diff(self._snapshot, snapshot)
+            if self._snapshot is not None and not changes:
+                return self._event_id
+
+            self._snapshot = snapshot
+            self._event_id += 1
+            event_id = self._event_id
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(('diff', event_id, changes))
+            except queue.Full:
+                # A slow client missed diffs; resynchronise it with a full snapshot
+                self._drain(subscriber)
+                subscriber.put_nowait(('snapshot', event_id, snapshot))
+            self.stats['events'] += 1
+        return event_id
+
+    @staticmethod
+    def _drain(subscriber):
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            self._publish(self._produce())
+            time.sleep(self.interval)